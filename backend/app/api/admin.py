@@ -0,0 +1,66 @@
+"""
+Admin API endpoints - runtime statistics for operators
+
+Requires the ``X-Admin-Token`` header to match the ADMIN_TOKEN environment
+variable; admin endpoints are disabled when ADMIN_TOKEN is not set.
+"""
+import hmac
+import os
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from app.middleware.response_cache import response_caches
+from app.services.single_flight import query_flight
+from app.services.slow_queries import SAMPLES_PER_FINGERPRINT, SLOW_QUERY_LOG, SLOW_QUERY_MS, slow_query_log
+
+router = APIRouter()
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    """Check a token against ADMIN_TOKEN (constant-time)"""
+    expected = os.getenv("ADMIN_TOKEN")
+    return bool(expected and token) and hmac.compare_digest(token, expected)
+
+
+def require_admin(response: Response, x_admin_token: Optional[str] = Header(None)):
+    """Dependency guarding admin endpoints; also keeps them out of every cache"""
+    if not os.getenv("ADMIN_TOKEN"):
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN is not set)")
+    if not is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    response.headers["Cache-Control"] = "no-store"
+
+
+@router.get("/admin/stats", dependencies=[Depends(require_admin)])
+async def get_runtime_stats() -> Dict[str, Any]:
+    """Get query coalescing and response cache statistics"""
+    return {
+        "data": {
+            "single_flight": query_flight.snapshot(),
+            "response_cache": [cache.snapshot() for cache in response_caches]
+        },
+        "assumptions": {
+            "single_flight": ("coalesced = requests that shared an identical in-flight query instead of running it; "
+                              "abandoned = waiters that hit their own deadline or disconnected first"),
+            "response_cache": "hit_ratio counts 304 revalidations as hits; counters reset on restart"
+        }
+    }
+
+
+@router.get("/admin/slow-queries", dependencies=[Depends(require_admin)])
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=500, description="Number of query fingerprints"),
+    sort: str = Query("p95", pattern="^(p50|p95|p99|max|total)$", description="Percentile (or max/total) to rank by")
+) -> Dict[str, Any]:
+    """Get the slowest query fingerprints with p50/p95/p99 and their last captured plan"""
+    return {
+        "data": slow_query_log.top(limit, sort),
+        "assumptions": {
+            "fingerprint": "SQL with literals replaced by ?; bind params (dates, thresholds) do not split fingerprints",
+            "percentiles": f"Nearest-rank over the last {SAMPLES_PER_FINGERPRINT} executions per fingerprint, in ms; "
+                           "coalesced waiters are not counted; queries stopped by a time budget count "
+                           "with the time they ran",
+            "slow_calls": f"Executions of at least {SLOW_QUERY_MS:g}ms, plus every budget timeout, logged with "
+                          f"params, outcome and plan to {SLOW_QUERY_LOG}",
+            "timeouts": "Executions stopped at the request's time budget (cancelled: client disconnected)",
+        }
+    }
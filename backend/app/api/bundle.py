@@ -0,0 +1,266 @@
+"""
+Bundle API endpoint - one request per dashboard page
+
+Each frontend page (Overview, Question1 ... Question8) shows several panels
+that used to be fetched with one API call each. ``GET /bundle/{page}`` runs
+all of a page's panel endpoints concurrently on a dedicated thread pool, each
+with its own database session (and therefore its own read connection), and
+returns them in one payload:
+
+    {"data": {"page": "question1", "elapsed_ms": 41.2, "panels": {
+        "zone-revenue": {"status": 200, "elapsed_ms": 38.0, "body": {"data": [...], "assumptions": {...}}},
+        "negative-zones": {"status": 500, "elapsed_ms": 2.1, "error": "OperationalError: ..."}
+    }}, "assumptions": {...}}
+
+Panel names match the frontend's React Query keys and ``body`` is exactly
+what the panel's own endpoint returns. A failing panel is reported in place
+(status + error) without failing the rest of the bundle.
+"""
+import asyncio
+import contextvars
+import inspect
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Annotated, Any, Callable, Dict, List, Optional
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import Response
+from fastapi.params import Depends as DependsParam
+from pydantic import TypeAdapter, ValidationError
+from app.api import congestion, efficiency, incentives, overview, simulation, surge, variability, wait_time, zones
+from app.api.dependencies import response_format
+from app.database.connection import SessionLocal
+from app.pipelines.rollups import RollupsMissing
+from app.services.query_budget import QueryCancelled, QueryTimeout
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Query params consumed by the bundle itself rather than forwarded to panels
+BUNDLE_PARAMS = {"start_date", "end_date", "format"}
+
+
+@dataclass(frozen=True)
+class Panel:
+    """One dashboard panel: an endpoint function plus fixed query params"""
+    name: str
+    endpoint: Callable[..., Any]
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+# Panels per frontend page, with the params each page passes today
+PAGES: Dict[str, List[Panel]] = {
+    "overview": [
+        Panel("overview", overview.get_overview),
+    ],
+    "question1": [
+        Panel("zone-revenue", zones.get_zone_revenue, {"limit": 20}),
+        Panel("zone-net-profit", zones.get_zone_net_profit, {"idle_cost_per_hour": 30.0}),
+        Panel("negative-zones", zones.get_negative_zones, {"idle_cost_per_hour": 30.0}),
+    ],
+    "question2": [
+        Panel("efficiency-timeseries", efficiency.get_efficiency_timeseries),
+        Panel("demand-efficiency-correlation", efficiency.get_demand_efficiency_correlation),
+    ],
+    "question3": [
+        Panel("surge-correlation", surge.get_surge_revenue_correlation, {"threshold": 0.2}),
+    ],
+    "question4": [
+        Panel("wait-time-current", wait_time.get_current_wait_time),
+        Panel("wait-time-tradeoffs", wait_time.get_wait_time_tradeoffs),
+    ],
+    "question5": [
+        Panel("congestion-zones", congestion.get_congestion_zones),
+        Panel("congestion-throughput", congestion.get_throughput_analysis),
+        Panel("congestion-short-trips", congestion.get_short_trip_impact, {"short_trip_threshold": 1.0}),
+    ],
+    "question6": [
+        Panel("driver-incentives", incentives.get_driver_incentives),
+        Panel("system-efficiency", incentives.get_system_efficiency),
+        Panel("incentive-misalignment", incentives.get_incentive_misalignment),
+    ],
+    "question7": [
+        Panel("variability-heatmap", variability.get_variability_heatmap),
+        Panel("duration-distribution", variability.get_duration_distribution),
+        Panel("variability-trends", variability.get_variability_trends),
+    ],
+    "question8": [
+        Panel("simulation", simulation.simulate_min_distance, {"threshold": 1.0}),
+        Panel("sensitivity-analysis", simulation.get_sensitivity_analysis),
+    ],
+}
+
+# Panels run here rather than on the shared AnyIO threadpool, so a bundle
+# cannot starve ordinary requests of threads
+BUNDLE_WORKERS = int(os.getenv("BUNDLE_WORKERS", "8"))
+bundle_executor = ThreadPoolExecutor(max_workers=BUNDLE_WORKERS, thread_name_prefix="bundle")
+
+# Panels submitted to bundle_executor and not yet finished, and those of them
+# running; the difference is waiting for a thread (threadpool_stat on /metrics)
+_panel_counts = {"submitted": 0, "running": 0}
+_panel_lock = threading.Lock()
+
+
+def panel_counts() -> Dict[str, int]:
+    """Panels running on the bundle executor and panels queued for one of its threads"""
+    with _panel_lock:
+        return {"running": _panel_counts["running"], "queued": _panel_counts["submitted"] - _panel_counts["running"]}
+
+
+def _count_panel(key: str, delta: int):
+    with _panel_lock:
+        _panel_counts[key] += delta
+
+
+def _run_counted(*args) -> Dict[str, Any]:
+    _count_panel("running", 1)
+    try:
+        return run_panel(*args)
+    finally:
+        _count_panel("running", -1)
+
+
+def submit_panel(*args) -> asyncio.Future:
+    """Run ``run_panel(*args)`` on the bundle executor in a copy of the current context"""
+    _count_panel("submitted", 1)
+    future = bundle_executor.submit(contextvars.copy_context().run, _run_counted, *args)
+    # Also fires for a panel cancelled before it started
+    future.add_done_callback(lambda _: _count_panel("submitted", -1))
+    return asyncio.wrap_future(future)
+
+
+def _coerce(parameter: inspect.Parameter, value: Any) -> Any:
+    """Validate a forwarded query param against the endpoint's annotation and Query() constraints"""
+    metadata = getattr(parameter.default, "metadata", [])
+    annotation = parameter.annotation if parameter.annotation is not inspect.Parameter.empty else Any
+    if metadata:
+        annotation = Annotated[(annotation, *metadata)]
+    try:
+        return TypeAdapter(annotation).validate_python(value)
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=f"{parameter.name}: {e.errors()[0]['msg']}")
+
+
+def _resolve_arguments(
+    panel: Panel,
+    db,
+    overrides: Dict[str, Any],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    result_format: str
+) -> Dict[str, Any]:
+    """
+    Build the keyword arguments for calling a panel endpoint directly
+
+    Mirrors what FastAPI would inject: Query() defaults, the date range
+    dependency (with the bundle's start_date/end_date), the response format
+    and a database session. ``overrides`` are the bundle's other query params.
+    """
+    arguments = {}
+    for name, parameter in inspect.signature(panel.endpoint).parameters.items():
+        default = parameter.default
+        if name == "db":
+            arguments[name] = db
+        elif isinstance(default, DependsParam):
+            if default.dependency is response_format:
+                arguments[name] = result_format
+            else:
+                # Date range dependencies (see app.api.dependencies.date_range)
+                arguments[name] = default.dependency(start_date=start_date, end_date=end_date)
+        elif name in overrides:
+            arguments[name] = _coerce(parameter, overrides[name])
+        elif name in panel.params:
+            arguments[name] = panel.params[name]
+        else:
+            arguments[name] = getattr(default, "default", default)
+    return arguments
+
+
+def run_panel(
+    panel: Panel,
+    overrides: Dict[str, Any],
+    start_date: Optional[date],
+    end_date: Optional[date],
+    result_format: str
+) -> Dict[str, Any]:
+    """
+    Run one panel endpoint on its own session and capture its result or error
+
+    Returns:
+        {"status", "elapsed_ms", "body"} on success, {"status", "elapsed_ms", "error"} on failure
+    """
+    started = time.perf_counter()
+    db = SessionLocal()
+    try:
+        arguments = _resolve_arguments(panel, db, overrides, start_date, end_date, result_format)
+        result = panel.endpoint(**arguments)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(result)
+        if isinstance(result, Response):
+            # Already-encoded JSON is embedded as-is instead of being parsed again
+            result = orjson.Fragment(result.body)
+        outcome = {"status": 200, "body": result}
+    except HTTPException as e:
+        outcome = {"status": e.status_code, "error": str(e.detail)}
+    except QueryTimeout as e:
+        outcome = {"status": 503, "error": str(e), "cost": e.cost}
+    except QueryCancelled as e:
+        outcome = {"status": 499, "error": str(e), "cost": e.cost}
+    except RollupsMissing as e:
+        outcome = {"status": 503, "error": str(e)}
+    except Exception as e:
+        print(f"Bundle panel {panel.name} failed: {type(e).__name__}: {e}")
+        outcome = {"status": 500, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        db.close()
+    outcome["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    return outcome
+
+
+@router.get("/bundle/{page}")
+async def get_page_bundle(
+    page: str,
+    request: Request,
+    start_date: Optional[date] = Query(None, description="First pickup date, inclusive (default: each panel's own window)"),
+    end_date: Optional[date] = Query(None, description="Last pickup date, inclusive (default: each panel's own window)"),
+    result_format: str = Query("records", alias="format", pattern="^(records|columns)$",
+                               description="JSON layout of every panel (records or columns)")
+) -> Response:
+    """Get all panels of a dashboard page in one response, run concurrently"""
+    panels = PAGES.get(page)
+    if panels is None:
+        raise HTTPException(status_code=404, detail=f"Unknown page '{page}'. Available: {', '.join(PAGES)}")
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+
+    # Any other query param (e.g. threshold on question8) goes to every panel that declares it
+    overrides = {name: value for name, value in request.query_params.items() if name not in BUNDLE_PARAMS}
+
+    started = time.perf_counter()
+    # Each panel runs in a copy of the request context, sharing its query budget
+    outcomes = await asyncio.gather(*(
+        submit_panel(panel, overrides, start_date, end_date, result_format)
+        for panel in panels
+    ))
+
+    # Returned as a ready response: panel bodies are pre-encoded orjson Fragments
+    response = FastJSONResponse({
+        "data": {
+            "page": page,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+            "panels": dict(zip((panel.name for panel in panels), outcomes))
+        },
+        "assumptions": {
+            "execution": "Panels run concurrently, each on its own database session",
+            "partial_results": "A failed panel reports status and error in place of body; other panels are unaffected",
+            "panel_body": "Identical to the panel's own endpoint response"
+        }
+    })
+    if any(outcome["status"] != 200 for outcome in outcomes):
+        # Keep partial results out of the response cache so the next request retries
+        response.headers["Cache-Control"] = "no-store"
+    return response
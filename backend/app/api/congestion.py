@@ -4,15 +4,21 @@ Congestion API endpoints - Question 5: High Trip, High Congestion Zones
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, january_range, response_format
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import duration_minutes, is_sqlite
+from app.utils.helpers import format_response
 from typing import Dict, Any
 
 router = APIRouter()
 
 
 @router.get("/congestion/zones")
-async def get_congestion_zones(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_congestion_zones(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get congestion metrics by zone"""
     db_service = DatabaseService(db)
     
@@ -25,8 +31,8 @@ async def get_congestion_zones(db: Session = Depends(get_db)) -> Dict[str, Any]:
             -- Congestion Index: Duration / Distance (higher = more congestion)
             AVG({duration_minutes()}) / NULLIF(AVG(trip_distance), 0) AS congestion_index
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
             AND trip_distance > 0
         GROUP BY pulocationid
@@ -34,19 +40,20 @@ async def get_congestion_zones(db: Session = Depends(get_db)) -> Dict[str, Any]:
         ORDER BY congestion_index DESC
     """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "congestion_index": "Average duration / Average distance",
-            "interpretation": "Higher index = more time per mile = more congestion"
-        }
-    }
+    return format_response(data, {
+        "congestion_index": "Average duration / Average distance",
+        "interpretation": "Higher index = more time per mile = more congestion"
+    }, result_format)
 
 
 @router.get("/congestion/throughput")
-async def get_throughput_analysis(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_throughput_analysis(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get throughput analysis (trips per unit time)"""
     db_service = DatabaseService(db)
     
@@ -60,8 +67,8 @@ async def get_throughput_analysis(db: Session = Depends(get_db)) -> Dict[str, An
                 -- Throughput: Trips per hour (simplified - doesn't include idle time)
                 COUNT(*) / NULLIF((julianday(MAX(tpep_pickup_datetime)) - julianday(MIN(tpep_pickup_datetime))) * 24, 0) AS throughput_per_hour
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-02-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
             GROUP BY pulocationid
             HAVING COUNT(*) >= 50
@@ -77,28 +84,27 @@ async def get_throughput_analysis(db: Session = Depends(get_db)) -> Dict[str, An
                 -- Throughput: Trips per hour (simplified - doesn't include idle time)
                 COUNT(*) / NULLIF(EXTRACT(EPOCH FROM (MAX(tpep_pickup_datetime) - MIN(tpep_pickup_datetime))) / 3600, 0) AS throughput_per_hour
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-02-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
             GROUP BY pulocationid
             HAVING COUNT(*) >= 50
             ORDER BY trip_count DESC, throughput_per_hour ASC
         """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "throughput_calculation": "Trips per hour (simplified)",
-            "note": "Full throughput requires idle time calculation"
-        }
-    }
+    return format_response(data, {
+        "throughput_calculation": "Trips per hour (simplified)",
+        "note": "Full throughput requires idle time calculation"
+    }, result_format)
 
 
 @router.get("/congestion/short-trips")
-async def get_short_trip_impact(
+def get_short_trip_impact(
     short_trip_threshold: float = 1.0,
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Analyze impact of short trips on productivity metrics"""
@@ -116,22 +122,19 @@ async def get_short_trip_impact(
             SUM(total_amount) AS total_revenue,
             SUM(total_amount) / NULLIF(COUNT(*), 0) AS revenue_per_trip
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY pulocationid
         HAVING COUNT(*) >= 50
         ORDER BY short_trip_percentage DESC
     """
     
-    result = db_service.execute_query(query, {"threshold": short_trip_threshold})
+    data = db_service.fetch_data(query, {**dates.params, "threshold": short_trip_threshold}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "short_trip_threshold": f"{short_trip_threshold} miles",
-            "productivity_impact": "Short trips may distort productivity metrics",
-            "note": "High short trip percentage may indicate low productivity despite high trip count"
-        }
-    }
+    return format_response(data, {
+        "short_trip_threshold": f"{short_trip_threshold} miles",
+        "productivity_impact": "Short trips may distort productivity metrics",
+        "note": "High short trip percentage may indicate low productivity despite high trip count"
+    }, result_format)
 
@@ -0,0 +1,91 @@
+"""
+Shared FastAPI dependencies for the analytics routers
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Optional
+from fastapi import Header, HTTPException, Query
+
+
+@dataclass(frozen=True)
+class DateRange:
+    """Pickup date window; ``end`` is inclusive, SQL uses the exclusive ``end_exclusive``"""
+    start: date
+    end: date
+
+    @property
+    def end_exclusive(self) -> date:
+        return self.end + timedelta(days=1)
+
+    @property
+    def params(self) -> Dict[str, str]:
+        """Bind parameters for sargable ``col >= :range_start AND col < :range_end`` predicates"""
+        return {
+            "range_start": self.start.isoformat(),
+            "range_end": self.end_exclusive.isoformat(),
+        }
+
+    def describe(self) -> str:
+        return f"{self.start.isoformat()} to {self.end.isoformat()}"
+
+
+def date_range(default_start: str, default_end: str) -> Callable[..., DateRange]:
+    """
+    Build a date range dependency with endpoint-specific defaults
+
+    Args:
+        default_start: Inclusive start date used when start_date is omitted
+        default_end: Inclusive end date used when end_date is omitted
+
+    Returns:
+        Dependency resolving ``start_date``/``end_date`` query params to a DateRange
+    """
+    fallback_start = date.fromisoformat(default_start)
+    fallback_end = date.fromisoformat(default_end)
+
+    def dependency(
+        start_date: Optional[date] = Query(None, description=f"First pickup date, inclusive (default {default_start})"),
+        end_date: Optional[date] = Query(None, description=f"Last pickup date, inclusive (default {default_end})")
+    ) -> DateRange:
+        dates = DateRange(start_date or fallback_start, end_date or fallback_end)
+        if dates.start > dates.end:
+            raise HTTPException(status_code=422, detail="start_date must not be after end_date")
+        return dates
+
+    return dependency
+
+
+# Accept header media types negotiated onto a response format
+ACCEPT_FORMATS = {
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.parquet": "parquet",
+    "application/x-parquet": "parquet",
+}
+
+
+def response_format(
+    result_format: Optional[str] = Query(
+        None, alias="format", pattern="^(records|columns|arrow|parquet)$",
+        description="records (default): list of row objects; columns: {columns, data: {column: [values]}}; "
+                    "arrow: Arrow IPC stream; parquet: Parquet file"
+    ),
+    accept: Optional[str] = Header(None)
+) -> str:
+    """
+    Resolve the response format of a tabular endpoint
+
+    An explicit ``format`` query param wins; otherwise an Arrow or Parquet
+    media type in the Accept header selects that format.
+    """
+    if result_format:
+        return result_format
+    for media_type in (accept or "").split(","):
+        negotiated = ACCEPT_FORMATS.get(media_type.split(";")[0].strip().lower())
+        if negotiated:
+            return negotiated
+    return "records"
+
+
+# Default windows used by the analytics endpoints
+january_range = date_range("2025-01-01", "2025-01-31")
+full_period_range = date_range("2025-01-01", "2025-04-30")
@@ -1,50 +1,79 @@
 """
 Efficiency API endpoints - Question 2: Demand vs Efficiency
 """
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, january_range, response_format
 from app.services.db_service import DatabaseService
-from app.services.sql_compat import duration_minutes, date_trunc_hour, extract_hour, extract_dow
-from typing import Dict, Any
+from app.services.downsample import downsample_indices
+from app.services.sql_compat import duration_minutes, date_trunc, date_trunc_hour, extract_hour, extract_dow
+from app.utils.helpers import dataframe_data, format_response
+from typing import Dict, Any, Optional
+import pandas as pd
 
 router = APIRouter()
 
 
 @router.get("/efficiency/timeseries")
-async def get_efficiency_timeseries(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_efficiency_timeseries(
+    resolution: str = Query("hour", pattern="^(hour|day|week)$", description="Bucket size, aggregated in the database"),
+    points: Optional[int] = Query(None, ge=3, le=10000, description="Downsample the series to at most this many points"),
+    downsample: str = Query("lttb", pattern="^(lttb|minmax)$", description="Downsampling method when points is set"),
+    metric: str = Query("efficiency", pattern="^(efficiency|total_trips|total_revenue|avg_duration_minutes)$",
+                        description="Series whose shape the downsampling preserves"),
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get system efficiency over time"""
     db_service = DatabaseService(db)
+    bucket = date_trunc('tpep_pickup_datetime', resolution, start=':range_start')
     
     query = f"""
         SELECT 
-            {date_trunc_hour('tpep_pickup_datetime')} AS hour,
+            {bucket} AS hour,
             COUNT(*) AS total_trips,
             SUM(total_amount) AS total_revenue,
             AVG({duration_minutes()}) AS avg_duration_minutes,
             -- System efficiency: Revenue per vehicle hour (simplified)
             SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS efficiency
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
-        GROUP BY {date_trunc_hour('tpep_pickup_datetime')}
+        GROUP BY {bucket}
         ORDER BY hour
     """
     
-    result = db_service.execute_query(query)
+    result = db_service.execute_query(query, dates.params)
+    source_points = len(result)
+    
+    if points is not None and source_points > points:
+        x = pd.to_datetime(result['hour']).astype('int64').to_numpy()
+        keep = downsample_indices(x, result[metric].to_numpy(dtype=float), points, downsample)
+        result = result.iloc[keep]
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "efficiency_calculation": "Revenue per vehicle hour (simplified - doesn't include idle time)",
-            "note": "Full efficiency calculation requires idle time analysis"
+    return format_response(dataframe_data(result, result_format), {
+        "efficiency_calculation": "Revenue per vehicle hour (simplified - doesn't include idle time)",
+        "note": "Full efficiency calculation requires idle time analysis",
+        "resolution": f"One row per {resolution}; 'hour' is the bucket start "
+                      "(weeks start on Monday; the first one at start_date)",
+        "downsampling": {
+            "method": downsample if points is not None and source_points > points else None,
+            "metric": metric,
+            "source_points": source_points,
+            "returned_points": len(result)
         }
-    }
+    }, result_format)
 
 
 @router.get("/efficiency/heatmap")
-async def get_efficiency_heatmap(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_efficiency_heatmap(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get efficiency by hour of day and day of week"""
     db_service = DatabaseService(db)
     
@@ -56,26 +85,27 @@ async def get_efficiency_heatmap(db: Session = Depends(get_db)) -> Dict[str, Any
             SUM(total_amount) AS total_revenue,
             SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS efficiency
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY {extract_dow('tpep_pickup_datetime')}, {extract_hour('tpep_pickup_datetime')}
         ORDER BY day_of_week, hour_of_day
     """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "efficiency_calculation": "Revenue per vehicle hour",
-            "day_of_week": "0 = Sunday, 6 = Saturday"
-        }
-    }
+    return format_response(data, {
+        "efficiency_calculation": "Revenue per vehicle hour",
+        "day_of_week": "0 = Sunday, 6 = Saturday"
+    }, result_format)
 
 
 @router.get("/efficiency/demand-correlation")
-async def get_demand_efficiency_correlation(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_demand_efficiency_correlation(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get correlation between demand (trips) and efficiency"""
     db_service = DatabaseService(db)
     
@@ -85,21 +115,18 @@ async def get_demand_efficiency_correlation(db: Session = Depends(get_db)) -> Di
             COUNT(*) AS demand_trips,
             SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS efficiency
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY {date_trunc_hour('tpep_pickup_datetime')}
         HAVING COUNT(*) > 10  -- Filter out low-volume hours
         ORDER BY demand_trips DESC
     """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "correlation_analysis": "Shows relationship between trip count and efficiency",
-            "note": "Negative correlation indicates times when increased demand reduces efficiency"
-        }
-    }
+    return format_response(data, {
+        "correlation_analysis": "Shows relationship between trip count and efficiency",
+        "note": "Negative correlation indicates times when increased demand reduces efficiency"
+    }, result_format)
 
@@ -4,15 +4,21 @@ Incentives API endpoints - Question 6: Driver Incentive Misalignment
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, full_period_range, january_range, response_format
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import duration_minutes, extract_hour, is_sqlite
+from app.utils.helpers import format_response
 from typing import Dict, Any
 
 router = APIRouter()
 
 
 @router.get("/incentives/driver")
-async def get_driver_incentives(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_driver_incentives(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get driver incentive metrics by zone and time"""
     try:
         db_service = DatabaseService(db)
@@ -27,8 +33,8 @@ async def get_driver_incentives(db: Session = Depends(get_db)) -> Dict[str, Any]
                 -- Driver Incentive Score: Earnings per minute
                 AVG(fare_amount + tip_amount) / NULLIF(AVG({duration_minutes()}), 0) AS driver_incentive_score
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-05-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
             GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
             HAVING COUNT(*) >= 10
@@ -36,15 +42,12 @@ async def get_driver_incentives(db: Session = Depends(get_db)) -> Dict[str, Any]
             LIMIT 1000
         """
         
-        result = db_service.execute_query(query)
+        data = db_service.fetch_data(query, dates.params, result_format)
         
-        return {
-            "data": result.to_dict('records'),
-            "assumptions": {
-                "driver_incentive_score": "(Fare + Tip) / Trip Duration",
-                "interpretation": "Higher score = better driver incentive"
-            }
-        }
+        return format_response(data, {
+            "driver_incentive_score": "(Fare + Tip) / Trip Duration",
+            "interpretation": "Higher score = better driver incentive"
+        }, result_format)
     except Exception as e:
         import traceback
         print(f"Error in get_driver_incentives: {e}")
@@ -53,7 +56,11 @@ async def get_driver_incentives(db: Session = Depends(get_db)) -> Dict[str, Any]
 
 
 @router.get("/incentives/system")
-async def get_system_efficiency(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_system_efficiency(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get system efficiency metrics by zone and time"""
     db_service = DatabaseService(db)
     
@@ -67,27 +74,28 @@ async def get_system_efficiency(db: Session = Depends(get_db)) -> Dict[str, Any]
             -- System Efficiency Score: Revenue per vehicle hour (simplified)
             SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS system_efficiency_score
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-05-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
         HAVING COUNT(*) >= 10
         ORDER BY system_efficiency_score DESC
     """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "system_efficiency_score": "Total Revenue / Total Vehicle Hours",
-            "note": "Simplified - doesn't include idle time"
-        }
-    }
+    return format_response(data, {
+        "system_efficiency_score": "Total Revenue / Total Vehicle Hours",
+        "note": "Simplified - doesn't include idle time"
+    }, result_format)
 
 
 @router.get("/incentives/misalignment")
-async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_incentive_misalignment(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Identify zones/times where driver incentives and system efficiency are misaligned"""
     db_service = DatabaseService(db)
     
@@ -101,8 +109,8 @@ async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str,
                     AVG(fare_amount + tip_amount) / NULLIF(AVG({duration_minutes()}), 0) AS driver_score,
                     COUNT(*) AS trip_count
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
                 GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
                 HAVING COUNT(*) >= 10
@@ -114,8 +122,8 @@ async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str,
                     SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS system_score,
                     COUNT(*) AS trip_count
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
                 GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
                 HAVING COUNT(*) >= 10
@@ -151,8 +159,8 @@ async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str,
                     {extract_hour('tpep_pickup_datetime')} AS hour_of_day,
                     AVG(fare_amount + tip_amount) / NULLIF(AVG({duration_minutes()}), 0) AS driver_score
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
                 GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
                 HAVING COUNT(*) >= 10
@@ -163,8 +171,8 @@ async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str,
                     {extract_hour('tpep_pickup_datetime')} AS hour_of_day,
                     SUM(total_amount) / NULLIF(COUNT(*) * AVG({duration_minutes()}) / 60, 0) AS system_score
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
                 GROUP BY pulocationid, {extract_hour('tpep_pickup_datetime')}
                 HAVING COUNT(*) >= 10
@@ -186,14 +194,11 @@ async def get_incentive_misalignment(db: Session = Depends(get_db)) -> Dict[str,
             ORDER BY d.driver_score DESC, s.system_score ASC
         """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "misalignment_definition": "High driver incentive but low system efficiency",
-            "threshold": "Top 25% driver score, bottom 50% system score",
-            "interpretation": "Zones where drivers are incentivized but system efficiency is low"
-        }
-    }
+    return format_response(data, {
+        "misalignment_definition": "High driver incentive but low system efficiency",
+        "threshold": "Top 25% driver score, bottom 50% system score",
+        "interpretation": "Zones where drivers are incentivized but system efficiency is low"
+    }, result_format)
 
@@ -0,0 +1,108 @@
+"""
+Jobs API endpoints - run long analyses in the background
+
+    POST /jobs {"endpoint": "/api/v1/surge/events", "params": {"threshold": 0.3}}
+        -> 202 with the job (200 if an identical job is running or its result is stored)
+    GET  /jobs/{id}         -> status and progress
+    GET  /jobs/{id}/result  -> the endpoint's response, once the job succeeded
+
+See app.services.jobs for execution and persistence.
+"""
+from typing import Any, Dict, Union
+from fastapi import APIRouter, HTTPException, Path, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+from pydantic import BaseModel, Field
+from starlette.routing import Match
+from app.database.connection import get_read_engine
+from app.services.dataset_version import read_dataset_version
+from app.services.jobs import JOB_TIMEOUT_SECONDS, JobQueueFull, job_manager
+from app.utils.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Endpoints that cannot be run as jobs
+EXCLUDED_PREFIXES = ("/api/v1/jobs", "/api/v1/admin")
+
+# Job ids are hex digests; also keeps them safe to use as file names
+JOB_ID = Path(..., pattern="^[0-9a-f]{24}$")
+
+# Job state is polled and must never be served from the response cache
+NO_STORE = {"Cache-Control": "no-store"}
+
+
+class JobRequest(BaseModel):
+    endpoint: str = Field(..., description="Analytics endpoint, e.g. /api/v1/surge/events or surge/events")
+    params: Dict[str, Union[str, int, float, bool, list]] = Field(default_factory=dict, description="Query parameters")
+
+
+def _endpoint_path(app, endpoint: str) -> str:
+    """Normalize ``endpoint`` to an /api/v1 path and check it is a GET analytics endpoint"""
+    path = endpoint.split("?")[0].strip()
+    if not path.startswith("/api/"):
+        path = "/api/v1/" + path.lstrip("/")
+    path = path.rstrip("/")
+    if path.startswith(EXCLUDED_PREFIXES):
+        raise HTTPException(status_code=422, detail=f"{path} cannot be run as a job")
+    scope = {"type": "http", "path": path, "method": "GET", "root_path": "", "headers": [], "query_string": b""}
+    if any(route.matches(scope)[0] == Match.FULL for route in app.router.routes):
+        return path
+    raise HTTPException(status_code=404, detail=f"Unknown endpoint {path}")
+
+
+def _job_view(job: Dict[str, Any]) -> Dict[str, Any]:
+    view = {key: value for key, value in job.items() if key != "instance"}
+    view["links"] = {"status": f"/api/v1/jobs/{job['id']}"}
+    if job["status"] == "succeeded":
+        view["links"]["result"] = f"/api/v1/jobs/{job['id']}/result"
+    return view
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(job_request: JobRequest, request: Request):
+    """Run an analytics endpoint as a background job"""
+    path = _endpoint_path(request.app, job_request.endpoint)
+    dataset_version = await run_in_threadpool(read_dataset_version, get_read_engine())
+    try:
+        job, created = await job_manager.submit(request.app, path, job_request.params, dataset_version)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "30"})
+
+    return FastJSONResponse(
+        status_code=202 if created else 200,
+        content={
+            "data": _job_view(job),
+            "assumptions": {
+                "reuse": "Jobs are identified by endpoint, params and dataset version; "
+                         "identical submissions share one job and its stored result",
+                "time_budget_seconds": JOB_TIMEOUT_SECONDS,
+            }
+        },
+        headers=NO_STORE
+    )
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str = JOB_ID):
+    """Get a job's status and progress"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse({"data": _job_view(job), "assumptions": {
+        "progress": "queries_completed / rows_fetched / db_ms so far; final cost once the job finished"
+    }}, headers=NO_STORE)
+
+
+@router.get("/jobs/{job_id}/result")
+def get_job_result(job_id: str = JOB_ID):
+    """Get the stored response of a succeeded job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    return FileResponse(
+        job_manager.store.result_path(job_id),
+        media_type=job["content_type"] or "application/json",
+        headers=NO_STORE
+    )
@@ -4,6 +4,7 @@ Overview API endpoints
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, january_range
 from app.services.db_service import DatabaseService
 from typing import Dict, Any
 
@@ -11,7 +12,10 @@ router = APIRouter()
 
 
 @router.get("/overview")
-async def get_overview(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_overview(
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get overview statistics"""
     db_service = DatabaseService(db)
     
@@ -19,10 +23,10 @@ async def get_overview(db: Session = Depends(get_db)) -> Dict[str, Any]:
     total_trips_query = """
         SELECT COUNT(*) as total_trips
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
     """
-    total_trips = db_service.execute_scalar(total_trips_query)
+    total_trips = db_service.execute_scalar(total_trips_query, dates.params)
     
     # Date range
     # SQLite uses different date functions
@@ -31,23 +35,28 @@ async def get_overview(db: Session = Depends(get_db)) -> Dict[str, Any]:
             MIN(tpep_pickup_datetime) as start_date,
             MAX(tpep_pickup_datetime) as end_date
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
     """
-    date_range = db_service.execute_query(date_range_query).iloc[0]
+    date_range = db_service.fetch_one(date_range_query, dates.params)
     
     # Total zones
-    zones_query = "SELECT COUNT(DISTINCT pulocationid) as zone_count FROM trips"
-    zone_count = db_service.execute_scalar(zones_query)
+    zones_query = """
+        SELECT COUNT(DISTINCT pulocationid) as zone_count
+        FROM trips
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
+    """
+    zone_count = db_service.execute_scalar(zones_query, dates.params)
     
     # Total revenue
     revenue_query = """
         SELECT SUM(total_amount) as total_revenue
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
     """
-    total_revenue = db_service.execute_scalar(revenue_query) or 0
+    total_revenue = db_service.execute_scalar(revenue_query, dates.params) or 0
     
     return {
         "data": {
@@ -58,7 +67,7 @@ async def get_overview(db: Session = Depends(get_db)) -> Dict[str, Any]:
             "total_revenue": float(total_revenue) if total_revenue else 0.0
         },
         "assumptions": {
-            "date_range": "2025-01-01 to 2025-01-31",
+            "date_range": dates.describe(),
             "data_source": "NYC TLC Yellow Taxi Trip Records"
         }
     }
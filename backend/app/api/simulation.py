@@ -4,6 +4,7 @@ Simulation API endpoints - Question 8: Minimum Distance Threshold Simulation
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, full_period_range, january_range
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import duration_minutes, count_filter, is_sqlite
 from typing import Dict, Any, Optional
@@ -12,8 +13,9 @@ router = APIRouter()
 
 
 @router.get("/simulation/min-distance")
-async def simulate_min_distance(
+def simulate_min_distance(
     threshold: float = Query(1.0, description="Minimum distance threshold in miles"),
+    dates: DateRange = Depends(january_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Simulate impact of removing trips below minimum distance threshold"""
@@ -28,8 +30,8 @@ async def simulate_min_distance(
                 AVG({duration_minutes()}) AS avg_duration_minutes,
                 {count_filter('trip_distance < :threshold')} AS trips_below_threshold
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-02-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
         """
     else:
@@ -40,12 +42,12 @@ async def simulate_min_distance(
                 AVG(EXTRACT(EPOCH FROM (tpep_dropoff_datetime - tpep_pickup_datetime)) / 60) AS avg_duration_minutes,
                 COUNT(*) FILTER (WHERE trip_distance < :threshold) AS trips_below_threshold
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-02-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
         """
     
-    before_result = db_service.execute_query(before_query, {"threshold": threshold}).iloc[0]
+    before_result = db_service.fetch_one(before_query, {**dates.params, "threshold": threshold})
     
     # After simulation (remove trips below threshold)
     after_query = f"""
@@ -54,17 +56,17 @@ async def simulate_min_distance(
             SUM(total_amount) AS total_revenue,
             AVG({duration_minutes()}) AS avg_duration_minutes
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-05-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
             AND trip_distance >= :threshold
     """
     
-    after_result = db_service.execute_query(after_query, {"threshold": threshold}).iloc[0]
+    after_result = db_service.fetch_one(after_query, {**dates.params, "threshold": threshold})
     
     # Calculate impact
     trips_removed = int(before_result['total_trips']) - int(after_result['total_trips'])
-    revenue_impact = float(before_result['total_revenue']) - float(after_result['total_revenue'])
+    revenue_impact = float(before_result['total_revenue'] or 0) - float(after_result['total_revenue'] or 0)
     revenue_percentage = (revenue_impact / float(before_result['total_revenue'])) * 100 if before_result['total_revenue'] else 0
     
     return {
@@ -72,13 +74,13 @@ async def simulate_min_distance(
             "threshold_miles": threshold,
             "before": {
                 "total_trips": int(before_result['total_trips']),
-                "total_revenue": float(before_result['total_revenue']),
+                "total_revenue": float(before_result['total_revenue'] or 0),
                 "avg_duration_minutes": float(before_result['avg_duration_minutes']) if before_result['avg_duration_minutes'] else 0,
-                "trips_below_threshold": int(before_result['trips_below_threshold'])
+                "trips_below_threshold": int(before_result['trips_below_threshold'] or 0)
             },
             "after": {
                 "total_trips": int(after_result['total_trips']),
-                "total_revenue": float(after_result['total_revenue']),
+                "total_revenue": float(after_result['total_revenue'] or 0),
                 "avg_duration_minutes": float(after_result['avg_duration_minutes']) if after_result['avg_duration_minutes'] else 0
             },
             "impact": {
@@ -103,17 +105,21 @@ async def simulate_min_distance(
 
 
 @router.get("/simulation/results")
-async def get_simulation_results(
+def get_simulation_results(
     threshold: float = Query(1.0),
+    dates: DateRange = Depends(january_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get detailed simulation results"""
     # Similar to POST endpoint but returns cached results
-    return await simulate_min_distance(threshold, db)
+    return simulate_min_distance(threshold, dates, db)
 
 
 @router.get("/simulation/sensitivity")
-async def get_sensitivity_analysis(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_sensitivity_analysis(
+    dates: DateRange = Depends(full_period_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Run sensitivity analysis with multiple thresholds"""
     db_service = DatabaseService(db)
     
@@ -130,8 +136,8 @@ async def get_sensitivity_analysis(db: Session = Depends(get_db)) -> Dict[str, A
                     SUM(total_amount) AS total_revenue,
                     SUM(CASE WHEN trip_distance >= :threshold THEN total_amount ELSE 0 END) AS revenue_after
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-05-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
             """
         else:
@@ -143,20 +149,20 @@ async def get_sensitivity_analysis(db: Session = Depends(get_db)) -> Dict[str, A
                     SUM(total_amount) AS total_revenue,
                     SUM(CASE WHEN trip_distance >= :threshold THEN total_amount ELSE 0 END) AS revenue_after
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-05-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND tpep_dropoff_datetime > tpep_pickup_datetime
             """
         
-        result = db_service.execute_query(query, {"threshold": threshold}).iloc[0]
+        result = db_service.fetch_one(query, {**dates.params, "threshold": threshold})
         results.append({
             "threshold": threshold,
             "total_trips": int(result['total_trips']),
-            "trips_removed": int(result['trips_below']),
-            "trips_removed_percentage": (int(result['trips_below']) / int(result['total_trips'])) * 100 if result['total_trips'] else 0,
-            "revenue_before": float(result['total_revenue']),
-            "revenue_after": float(result['revenue_after']),
-            "revenue_impact_percentage": ((float(result['total_revenue']) - float(result['revenue_after'])) / float(result['total_revenue'])) * 100 if result['total_revenue'] else 0
+            "trips_removed": int(result['trips_below'] or 0),
+            "trips_removed_percentage": (int(result['trips_below'] or 0) / int(result['total_trips'])) * 100 if result['total_trips'] else 0,
+            "revenue_before": float(result['total_revenue'] or 0),
+            "revenue_after": float(result['revenue_after'] or 0),
+            "revenue_impact_percentage": ((float(result['total_revenue'] or 0) - float(result['revenue_after'] or 0)) / float(result['total_revenue'])) * 100 if result['total_revenue'] else 0
         })
     
     return {
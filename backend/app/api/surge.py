@@ -4,16 +4,20 @@ Surge Pricing API endpoints - Question 3: Surge Pricing Paradox
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, full_period_range, response_format
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import is_sqlite, count_filter
+from app.utils.helpers import format_response
 from typing import Dict, Any
 
 router = APIRouter()
 
 
 @router.get("/surge/events")
-async def get_surge_events(
+def get_surge_events(
     threshold: float = 0.2,
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Detect surge pricing events"""
@@ -27,8 +31,8 @@ async def get_surge_events(
                     pulocationid,
                     AVG(fare_amount) AS avg_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             )
@@ -43,8 +47,8 @@ async def get_surge_events(
                 END AS is_surge
             FROM trips t
             JOIN zone_avg_fares zaf ON t.pulocationid = zaf.pulocationid
-            WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                AND t.tpep_pickup_datetime < '2025-05-01'
+            WHERE t.tpep_pickup_datetime >= :range_start
+                AND t.tpep_pickup_datetime < :range_end
                 AND t.fare_amount > zaf.avg_fare * (1 + :threshold)
             ORDER BY t.tpep_pickup_datetime DESC
             LIMIT 1000
@@ -56,8 +60,8 @@ async def get_surge_events(
                     pulocationid,
                     PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY fare_amount) AS median_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             )
@@ -72,28 +76,27 @@ async def get_surge_events(
                 END AS is_surge
             FROM trips t
             JOIN base_fares bf ON t.pulocationid = bf.pulocationid
-            WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                AND t.tpep_pickup_datetime < '2025-05-01'
+            WHERE t.tpep_pickup_datetime >= :range_start
+                AND t.tpep_pickup_datetime < :range_end
                 AND t.fare_amount > bf.median_fare * (1 + :threshold)
             ORDER BY t.tpep_pickup_datetime DESC
             LIMIT 1000
         """
     
-    result = db_service.execute_query(query, {"threshold": threshold})
+    data = db_service.fetch_data(query, {**dates.params, "threshold": threshold}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "surge_threshold": f"{threshold * 100}% above median fare",
-            "base_fare": "Average fare for each zone (SQLite uses AVG instead of median for performance)",
-            "detection_method": "Statistical comparison to zone median"
-        }
-    }
+    return format_response(data, {
+        "surge_threshold": f"{threshold * 100}% above median fare",
+        "base_fare": "Average fare for each zone (SQLite uses AVG instead of median for performance)",
+        "detection_method": "Statistical comparison to zone median"
+    }, result_format)
 
 
 @router.get("/surge/correlation")
-async def get_surge_revenue_correlation(
+def get_surge_revenue_correlation(
     threshold: float = 0.2,
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get correlation between surge events and daily revenue"""
@@ -107,8 +110,8 @@ async def get_surge_revenue_correlation(
                     pulocationid,
                     AVG(fare_amount) AS avg_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             ),
@@ -120,8 +123,8 @@ async def get_surge_revenue_correlation(
                     SUM(t.total_amount) AS daily_revenue
                 FROM trips t
                 JOIN zone_avg_fares zaf ON t.pulocationid = zaf.pulocationid
-                WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                    AND t.tpep_pickup_datetime < '2025-05-01'
+                WHERE t.tpep_pickup_datetime >= :range_start
+                    AND t.tpep_pickup_datetime < :range_end
                 GROUP BY DATE(t.tpep_pickup_datetime), t.pulocationid
             )
             SELECT 
@@ -141,8 +144,8 @@ async def get_surge_revenue_correlation(
                     pulocationid,
                     PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY fare_amount) AS median_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             ),
@@ -154,8 +157,8 @@ async def get_surge_revenue_correlation(
                     SUM(t.total_amount) AS daily_revenue
                 FROM trips t
                 JOIN base_fares bf ON t.pulocationid = bf.pulocationid
-                WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                    AND t.tpep_pickup_datetime < '2025-05-01'
+                WHERE t.tpep_pickup_datetime >= :range_start
+                    AND t.tpep_pickup_datetime < :range_end
                 GROUP BY DATE(t.tpep_pickup_datetime), t.pulocationid
             )
             SELECT 
@@ -169,21 +172,20 @@ async def get_surge_revenue_correlation(
             ORDER BY avg_surge_events DESC
         """
     
-    result = db_service.execute_query(query, {"threshold": threshold})
+    data = db_service.fetch_data(query, {**dates.params, "threshold": threshold}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "surge_threshold": f"{threshold * 100}% above median fare",
-            "correlation_analysis": "Compares surge frequency to daily revenue",
-            "note": "Negative correlation zones indicate surge pricing paradox"
-        }
-    }
+    return format_response(data, {
+        "surge_threshold": f"{threshold * 100}% above median fare",
+        "correlation_analysis": "Compares surge frequency to daily revenue",
+        "note": "Negative correlation zones indicate surge pricing paradox"
+    }, result_format)
 
 
 @router.get("/surge/zones")
-async def get_surge_zones(
+def get_surge_zones(
     threshold: float = 0.2,
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get zone-level surge analysis"""
@@ -197,8 +199,8 @@ async def get_surge_zones(
                     pulocationid,
                     AVG(fare_amount) AS avg_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             )
@@ -210,21 +212,21 @@ async def get_surge_zones(
                 SUM(t.total_amount) AS total_revenue
             FROM trips t
             JOIN zone_avg_fares zaf ON t.pulocationid = zaf.pulocationid
-            WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                AND t.tpep_pickup_datetime < '2025-05-01'
+            WHERE t.tpep_pickup_datetime >= :range_start
+                AND t.tpep_pickup_datetime < :range_end
             GROUP BY t.pulocationid
             HAVING COUNT(*) >= 100
             ORDER BY surge_percentage DESC
         """
     else:
-        query = """
+        query = f"""
             WITH base_fares AS (
                 SELECT 
                     pulocationid,
                     PERCENTILE_CONT(0.5) WITHIN GROUP (ORDER BY fare_amount) AS median_fare
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                     AND fare_amount > 0
                 GROUP BY pulocationid
             )
@@ -236,20 +238,17 @@ async def get_surge_zones(
                 SUM(t.total_amount) AS total_revenue
             FROM trips t
             JOIN base_fares bf ON t.pulocationid = bf.pulocationid
-            WHERE t.tpep_pickup_datetime >= '2025-01-01'
-                AND t.tpep_pickup_datetime < '2025-05-01'
+            WHERE t.tpep_pickup_datetime >= :range_start
+                AND t.tpep_pickup_datetime < :range_end
             GROUP BY t.pulocationid
             HAVING COUNT(*) >= 100
             ORDER BY surge_percentage DESC
         """
     
-    result = db_service.execute_query(query, {"threshold": threshold})
+    data = db_service.fetch_data(query, {**dates.params, "threshold": threshold}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "surge_threshold": f"{threshold * 100}% above median fare",
-            "minimum_trips": 100
-        }
-    }
+    return format_response(data, {
+        "surge_threshold": f"{threshold * 100}% above median fare",
+        "minimum_trips": 100
+    }, result_format)
 
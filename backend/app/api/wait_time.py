@@ -4,15 +4,21 @@ Wait Time API endpoints - Question 4: Wait Time Reduction Levers
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, january_range, response_format
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import date_trunc_hour, is_sqlite
+from app.utils.helpers import format_response
 from typing import Dict, Any
 
 router = APIRouter()
 
 
 @router.get("/wait-time/current")
-async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]:
+def get_current_wait_time(
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
     """Get current wait time metrics (demand/supply ratio)"""
     db_service = DatabaseService(db)
     
@@ -25,8 +31,8 @@ async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]
                     {date_trunc_hour('tpep_pickup_datetime')} AS hour,
                     COUNT(*) AS demand
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                 GROUP BY pulocationid, {date_trunc_hour('tpep_pickup_datetime')}
             ),
             supply AS (
@@ -35,8 +41,8 @@ async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]
                     {date_trunc_hour('tpep_dropoff_datetime')} AS hour,
                     COUNT(*) AS supply
                 FROM trips
-                WHERE tpep_dropoff_datetime >= '2025-01-01'
-                    AND tpep_dropoff_datetime < '2025-02-01'
+                WHERE tpep_dropoff_datetime >= :range_start
+                    AND tpep_dropoff_datetime < :range_end
                 GROUP BY dolocationid, {date_trunc_hour('tpep_dropoff_datetime')}
             ),
             combined AS (
@@ -80,8 +86,8 @@ async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]
                     {date_trunc_hour('tpep_pickup_datetime')} AS hour,
                     COUNT(*) AS demand
                 FROM trips
-                WHERE tpep_pickup_datetime >= '2025-01-01'
-                    AND tpep_pickup_datetime < '2025-02-01'
+                WHERE tpep_pickup_datetime >= :range_start
+                    AND tpep_pickup_datetime < :range_end
                 GROUP BY pulocationid, {date_trunc_hour('tpep_pickup_datetime')}
             ),
             supply AS (
@@ -90,8 +96,8 @@ async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]
                     {date_trunc_hour('tpep_dropoff_datetime')} AS hour,
                     COUNT(*) AS supply
                 FROM trips
-                WHERE tpep_dropoff_datetime >= '2025-01-01'
-                    AND tpep_dropoff_datetime < '2025-02-01'
+                WHERE tpep_dropoff_datetime >= :range_start
+                    AND tpep_dropoff_datetime < :range_end
                 GROUP BY dolocationid, {date_trunc_hour('tpep_dropoff_datetime')}
             )
             SELECT 
@@ -110,16 +116,13 @@ async def get_current_wait_time(db: Session = Depends(get_db)) -> Dict[str, Any]
             LIMIT 1000
         """
     
-    result = db_service.execute_query(query)
+    data = db_service.fetch_data(query, dates.params, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "wait_time_proxy": "Demand/Supply ratio (higher = longer wait times)",
-            "supply_definition": "Dropoff count as proxy for available vehicles",
-            "note": "This is a proxy metric, not actual wait time data"
-        }
-    }
+    return format_response(data, {
+        "wait_time_proxy": "Demand/Supply ratio (higher = longer wait times)",
+        "supply_definition": "Dropoff count as proxy for available vehicles",
+        "note": "This is a proxy metric, not actual wait time data"
+    }, result_format)
 
 
 @router.post("/wait-time/simulate")
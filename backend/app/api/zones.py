@@ -4,16 +4,20 @@ Zones API endpoints - Question 1: High Revenue Zones
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.database.connection import get_db
+from app.api.dependencies import DateRange, full_period_range, january_range, response_format
 from app.services.db_service import DatabaseService
 from app.services.sql_compat import duration_minutes
+from app.utils.helpers import format_response
 from typing import Dict, Any, Optional
 
 router = APIRouter()
 
 
 @router.get("/zones/revenue")
-async def get_zone_revenue(
+def get_zone_revenue(
     limit: Optional[int] = Query(20, description="Number of top zones to return"),
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get revenue metrics by zone"""
@@ -30,30 +34,29 @@ async def get_zone_revenue(
             AVG(trip_distance) AS avg_distance,
             AVG({duration_sql}) AS avg_duration_minutes
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY pulocationid
         ORDER BY total_revenue DESC
         LIMIT :limit
     """.format(duration_sql=duration_minutes())
     
-    result = db_service.execute_query(query, {"limit": limit})
+    data = db_service.fetch_data(query, {**dates.params, "limit": limit}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "idle_time_cost": "Not yet calculated - requires zone-level idle time analysis",
-            "empty_return_cost": "Not yet calculated - requires return trip probability analysis",
-            "note": "Net profit calculation requires additional metrics (idle time, empty returns)"
-        }
-    }
+    return format_response(data, {
+        "idle_time_cost": "Not yet calculated - requires zone-level idle time analysis",
+        "empty_return_cost": "Not yet calculated - requires return trip probability analysis",
+        "note": "Net profit calculation requires additional metrics (idle time, empty returns)"
+    }, result_format)
 
 
 @router.get("/zones/net-profit")
-async def get_zone_net_profit(
+def get_zone_net_profit(
     idle_cost_per_hour: float = Query(30.0, description="Cost per hour of idle time"),
     empty_return_cost_multiplier: float = Query(0.5, description="Cost multiplier for empty returns"),
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(january_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Calculate net profit by zone (revenue - costs)"""
@@ -73,31 +76,31 @@ async def get_zone_net_profit(
             -- Simplified cost calculation (placeholder)
             SUM(total_amount) - (COUNT(*) * :idle_cost_per_hour * AVG({duration_sql}) / 60) AS net_profit
         FROM trips
-        WHERE tpep_pickup_datetime >= '2025-01-01'
-            AND tpep_pickup_datetime < '2025-02-01'
+        WHERE tpep_pickup_datetime >= :range_start
+            AND tpep_pickup_datetime < :range_end
             AND tpep_dropoff_datetime > tpep_pickup_datetime
         GROUP BY pulocationid
         ORDER BY net_profit DESC
     """.format(duration_sql=duration_minutes())
-    result = db_service.execute_query(query, {
+    data = db_service.fetch_data(query, {
+        **dates.params,
         "idle_cost_per_hour": idle_cost_per_hour,
         "empty_return_cost_multiplier": empty_return_cost_multiplier
-    })
+    }, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "idle_time_calculation": "Zone-level average idle time (simplified)",
-            "idle_cost_per_hour": idle_cost_per_hour,
-            "empty_return_cost": "Not yet fully implemented",
-            "note": "This is a simplified calculation. Full implementation requires spatiotemporal analysis"
-        }
-    }
+    return format_response(data, {
+        "idle_time_calculation": "Zone-level average idle time (simplified)",
+        "idle_cost_per_hour": idle_cost_per_hour,
+        "empty_return_cost": "Not yet fully implemented",
+        "note": "This is a simplified calculation. Full implementation requires spatiotemporal analysis"
+    }, result_format)
 
 
 @router.get("/zones/negative-zones")
-async def get_negative_zones(
+def get_negative_zones(
     idle_cost_per_hour: float = Query(30.0),
+    result_format: str = Depends(response_format),
+    dates: DateRange = Depends(full_period_range),
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """Get zones that become net negative after accounting for costs"""
@@ -111,8 +114,8 @@ async def get_negative_zones(
                 COUNT(*) AS trip_count,
                 AVG({duration_sql}) AS avg_duration_minutes
             FROM trips
-            WHERE tpep_pickup_datetime >= '2025-01-01'
-                AND tpep_pickup_datetime < '2025-05-01'
+            WHERE tpep_pickup_datetime >= :range_start
+                AND tpep_pickup_datetime < :range_end
                 AND tpep_dropoff_datetime > tpep_pickup_datetime
             GROUP BY pulocationid
         )
@@ -126,14 +129,11 @@ async def get_negative_zones(
         WHERE gross_revenue - (trip_count * :idle_cost_per_hour * avg_duration_minutes / 60) < 0
         ORDER BY net_profit ASC
     """.format(duration_sql=duration_minutes())
-    result = db_service.execute_query(query, {"idle_cost_per_hour": idle_cost_per_hour})
+    data = db_service.fetch_data(query, {**dates.params, "idle_cost_per_hour": idle_cost_per_hour}, result_format)
     
-    return {
-        "data": result.to_dict('records'),
-        "assumptions": {
-            "idle_cost_per_hour": idle_cost_per_hour,
-            "calculation_method": "Simplified - uses average duration as proxy for idle time",
-            "note": "Full implementation requires zone-level idle time and empty return analysis"
-        }
-    }
+    return format_response(data, {
+        "idle_cost_per_hour": idle_cost_per_hour,
+        "calculation_method": "Simplified - uses average duration as proxy for idle time",
+        "note": "Full implementation requires zone-level idle time and empty return analysis"
+    }, result_format)
 
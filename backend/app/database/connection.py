@@ -1,11 +1,29 @@
 """
 Database connection and session management
+
+Two engines:
+* ``engine`` - read-write, used at startup to create tables and rollups
+  (the ETL keeps its own writer engine in app.pipelines.etl)
+* ``read_engine`` - read-only, behind SessionLocal/get_db for the analytics
+  routers. On SQLite it opens the file with ``mode=ro`` + ``query_only`` and
+  is tuned for large scans and GROUP BY sorts (mmap, small page cache).
+
+Both point at DATABASE_URL, or at the database published through the
+blue/green pointer (app.database.serving), and are replaced by
+``switch_database`` when a new one is published; look them up through the
+module (or ``get_read_engine``) rather than importing them by name.
+
+``PRAGMA optimize`` is not run per connection; see ``optimize_database``.
 """
 import os
-from sqlalchemy import create_engine, event
+import sqlite3
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from dotenv import load_dotenv
+from app.database.serving import serving_url
 
 load_dotenv()
 
@@ -16,11 +34,31 @@ DATABASE_URL = os.getenv(
     "sqlite:///./nyc_taxi.db"
 )
 
-# Create engine
-# SQLite-specific configuration
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL,
+# Worker threads available to sync endpoints (AnyIO's default limiter is 40);
+# the read pool is sized to match so a thread never waits for a connection
+THREADPOOL_SIZE = int(os.getenv("THREADPOOL_SIZE", "40"))
+
+# SQLite read connection tuning
+SQLITE_MMAP_MB = int(os.getenv("SQLITE_MMAP_MB", "2048"))  # capped by SQLite's compile-time maximum
+SQLITE_CACHE_MB = int(os.getenv("SQLITE_CACHE_MB", "16"))  # per connection; mmap serves most page reads
+# Where sorter/GROUP BY spill goes. MEMORY measured ~60% slower than temp files
+# on multi-million row GROUP BYs (benchmarks/sqlite_pragmas.py), so keep the default
+SQLITE_TEMP_STORE = os.getenv("SQLITE_TEMP_STORE", "DEFAULT").upper()
+
+def create_write_engine(database_url: str):
+    """Read-write engine (startup table creation, rollups, PRAGMA optimize)"""
+    if not database_url.startswith("sqlite"):
+        # PostgreSQL configuration
+        return create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=20
+        )
+
+    # SQLite-specific configuration
+    write_engine = create_engine(
+        database_url,
         connect_args={
             "check_same_thread": False,  # SQLite requirement
             "timeout": 300,  # 5 minute timeout for long queries
@@ -29,7 +67,7 @@ if DATABASE_URL.startswith("sqlite"):
         echo=False
     )
     # Set SQLite optimizations on connection
-    @event.listens_for(engine, "connect")
+    @event.listens_for(write_engine, "connect")
     def set_sqlite_pragma(dbapi_conn, connection_record):
         cursor = dbapi_conn.cursor()
         # Enable WAL mode for better concurrency
@@ -38,20 +76,64 @@ if DATABASE_URL.startswith("sqlite"):
         cursor.execute("PRAGMA cache_size=-256000")
         # Set synchronous to NORMAL (faster than FULL, still safe with WAL)
         cursor.execute("PRAGMA synchronous=NORMAL")
-        # Enable query planner optimizations
-        cursor.execute("PRAGMA optimize")
         cursor.close()
-else:
-    # PostgreSQL configuration
-    engine = create_engine(
-        DATABASE_URL,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
+
+    return write_engine
+
+
+def create_read_engine(database_url: str):
+    """Read-only engine behind SessionLocal, sized to the worker threadpool"""
+    if not database_url.startswith("sqlite"):
+        return create_engine(
+            database_url,
+            pool_pre_ping=True,
+            pool_size=10,
+            max_overflow=max(THREADPOOL_SIZE - 10, 0),
+            connect_args={"options": "-c default_transaction_read_only=on"}
+        )
+
+    # Read-only engine: opened through a file: URI so SQLite itself refuses writes
+    database_path = os.path.abspath(make_url(database_url).database or "")
+
+    def connect_read_only():
+        return sqlite3.connect(
+            f"file:{database_path}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            timeout=300
+        )
+
+    sqlite_read_engine = create_engine(
+        "sqlite://",
+        creator=connect_read_only,
+        poolclass=QueuePool,  # "sqlite://" alone would imply an in-memory database
+        pool_size=THREADPOOL_SIZE,
+        max_overflow=10,  # bundle panels run on their own executor
+        echo=False
     )
 
-# Create session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    @event.listens_for(sqlite_read_engine, "connect")
+    def set_sqlite_read_pragma(dbapi_conn, connection_record):
+        cursor = dbapi_conn.cursor()
+        # Refuse writes even if the file permissions would allow them
+        cursor.execute("PRAGMA query_only=ON")
+        # Read table pages straight from the OS page cache instead of copying them
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}")
+        cursor.execute(f"PRAGMA temp_store={SQLITE_TEMP_STORE}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}")
+        cursor.close()
+
+    return sqlite_read_engine
+
+
+# Database actually served: the blue/green pointer's database if one is
+# published (see app.database.serving), otherwise DATABASE_URL
+SERVING_URL = serving_url(DATABASE_URL)
+engine = create_write_engine(SERVING_URL)
+read_engine = create_read_engine(SERVING_URL)
+
+# Create session factory (analytics endpoints only read)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 
 # Base class for models
 Base = declarative_base()
@@ -65,3 +147,53 @@ def get_db():
     finally:
         db.close()
 
+
+def get_read_engine():
+    """The current read engine (replaced when a new serving database is published)"""
+    return read_engine
+
+
+def switch_database(database_url: str):
+    """
+    Serve another database from now on
+
+    New sessions bind to engines for ``database_url``; sessions already open
+    keep their connection to the previous database until they close.
+
+    Args:
+        database_url: Database to serve; must use the same dialect as DATABASE_URL
+
+    Returns:
+        The previous (engine, read_engine), for the caller to drain and dispose
+    """
+    global SERVING_URL, engine, read_engine
+    if make_url(database_url).get_backend_name() != make_url(DATABASE_URL).get_backend_name():
+        raise ValueError(f"Cannot switch from {make_url(DATABASE_URL).get_backend_name()} "
+                         f"to {make_url(database_url).get_backend_name()}: SQL is generated per dialect at import")
+    new_engine, new_read_engine = create_write_engine(database_url), create_read_engine(database_url)
+    try:
+        # Refuse a database that cannot serve before any request is routed to it
+        with new_read_engine.connect() as conn:
+            conn.execute(text("SELECT 1 FROM trips LIMIT 1"))
+    except Exception:
+        new_read_engine.dispose()
+        new_engine.dispose()
+        raise
+    previous = engine, read_engine
+    SERVING_URL, engine, read_engine = database_url, new_engine, new_read_engine
+    SessionLocal.configure(bind=new_read_engine)
+    return previous
+
+
+def optimize_database():
+    """
+    Refresh query planner statistics (SQLite ``PRAGMA optimize``)
+
+    Only re-analyzes tables whose statistics look stale, but still too
+    costly to run on every new connection; main.py runs it on a schedule
+    and at shutdown. PostgreSQL relies on autovacuum's ANALYZE instead.
+    """
+    if not DATABASE_URL.startswith("sqlite"):
+        return
+    with engine.connect() as conn:
+        conn.execute(text("PRAGMA optimize"))
@@ -1,7 +1,7 @@
 """
 SQLAlchemy models for NYC TLC data
 """
-from sqlalchemy import Column, Integer, Float, String, DateTime, Index
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Index
 from sqlalchemy.sql import func
 from app.database.connection import Base
 
@@ -44,3 +44,27 @@ class TaxiZone(Base):
     zone = Column(String)
     service_zone = Column(String)
 
+
+
+class DurationHistogram(Base):
+    """Trip duration histogram rollup (built by the ETL, see app.pipelines.rollups)"""
+    __tablename__ = "duration_histogram"
+
+    pickup_date = Column(Date, primary_key=True)
+    hour_of_day = Column(Integer, primary_key=True)
+    distance_bin = Column(String, primary_key=True)
+    duration_bin = Column(Integer, primary_key=True)
+    trip_count = Column(Integer, nullable=False)
+    duration_sum = Column(Float, nullable=False)
+    duration_sq_sum = Column(Float, nullable=False)
+    duration_min = Column(Float, nullable=False)
+    duration_max = Column(Float, nullable=False)
+
+
+class DatasetVersion(Base):
+    """Single-row counter bumped by the ETL whenever trips or rollups change"""
+    __tablename__ = "dataset_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
@@ -2,9 +2,12 @@
 -- This file contains SQL DDL statements for creating tables and indexes
 -- Note: Some PostgreSQL-specific features may not work with SQLite
 
--- Create trips table
+-- Create trips table, range partitioned by pickup month
+-- The ETL manages the partitions (app/pipelines/partitions.py); on SQLite
+-- each month is a trips_YYYY_MM table and trips is a UNION ALL view over them
+CREATE SEQUENCE IF NOT EXISTS trips_id_seq;
 CREATE TABLE IF NOT EXISTS trips (
-    id SERIAL PRIMARY KEY,
+    id BIGINT NOT NULL DEFAULT nextval('trips_id_seq'),
     tpep_pickup_datetime TIMESTAMP NOT NULL,
     tpep_dropoff_datetime TIMESTAMP NOT NULL,
     pulocationid INTEGER NOT NULL,
@@ -20,8 +23,13 @@ CREATE TABLE IF NOT EXISTS trips (
     ratecodeid INTEGER,
     passenger_count INTEGER,
     vendorid INTEGER,
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (id, tpep_pickup_datetime)
+) PARTITION BY RANGE (tpep_pickup_datetime);
+
+-- One partition per month, e.g.
+CREATE TABLE IF NOT EXISTS trips_2025_01 PARTITION OF trips
+    FOR VALUES FROM ('2025-01-01') TO ('2025-02-01');
 
 -- Create taxi_zones table
 CREATE TABLE IF NOT EXISTS taxi_zones (
@@ -31,13 +39,11 @@ CREATE TABLE IF NOT EXISTS taxi_zones (
     service_zone VARCHAR(255)
 );
 
--- Create indexes for performance
-CREATE INDEX IF NOT EXISTS idx_pickup_datetime ON trips(tpep_pickup_datetime);
-CREATE INDEX IF NOT EXISTS idx_dropoff_datetime ON trips(tpep_dropoff_datetime);
-CREATE INDEX IF NOT EXISTS idx_pulocationid ON trips(pulocationid);
-CREATE INDEX IF NOT EXISTS idx_dolocationid ON trips(dolocationid);
-CREATE INDEX IF NOT EXISTS idx_pickup_location_time ON trips(pulocationid, tpep_pickup_datetime);
-CREATE INDEX IF NOT EXISTS idx_dropoff_location_time ON trips(dolocationid, tpep_dropoff_datetime);
+-- Create indexes for performance (cascade to every month partition)
+CREATE INDEX IF NOT EXISTS idx_trips_pickup ON trips(tpep_pickup_datetime);
+CREATE INDEX IF NOT EXISTS idx_trips_dropoff ON trips(tpep_dropoff_datetime);
+CREATE INDEX IF NOT EXISTS idx_trips_pickup_location_time ON trips(pulocationid, tpep_pickup_datetime);
+CREATE INDEX IF NOT EXISTS idx_trips_dropoff_location_time ON trips(dolocationid, tpep_dropoff_datetime);
 
 -- Note: Materialized views are not supported in SQLite
 -- Use regular views instead for SQLite compatibility
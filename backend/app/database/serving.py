@@ -0,0 +1,163 @@
+"""
+Blue/green serving database
+
+With SERVING_POINTER set, the API serves the database named by a small JSON
+pointer file instead of DATABASE_URL:
+
+    {"generation": 4, "database_url": "sqlite:////srv/data/nyc_taxi.g4.db",
+     "dataset_version": 12, "published_at": "...", "history": [...]}
+
+app.pipelines.bluegreen builds a complete database next to the live one
+(trips, indexes, rollups, ANALYZE) and publishes it by replacing the pointer
+with ``os.replace``, which is atomic. Every API process polls the pointer
+every SERVING_POINTER_INTERVAL seconds; on a new generation it checks the
+new database can serve, binds new sessions to it and disposes the previous
+engines once the requests still using them have returned their
+connections (waiting at most SERVING_DRAIN_SECONDS). No request is refused
+and no process restarts, so loads and deploys never stop web.service.
+
+The dataset version recorded in the new database is always above every
+version served before, so response caches never confuse the two.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# JSON pointer to the database to serve; unset = always serve DATABASE_URL
+SERVING_POINTER = os.getenv("SERVING_POINTER", "")
+SERVING_POINTER_INTERVAL = float(os.getenv("SERVING_POINTER_INTERVAL", "5"))
+# Longest a retired database is kept open for requests still running on it
+SERVING_DRAIN_SECONDS = float(os.getenv("SERVING_DRAIN_SECONDS", "600"))
+
+
+def read_pointer(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Read the serving pointer (None if it is not configured or not published yet)"""
+    path = path if path is not None else SERVING_POINTER
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_pointer(pointer: Dict[str, Any], path: Optional[str] = None):
+    """
+    Replace the serving pointer atomically
+
+    Readers see either the previous pointer or the new one, never a partial
+    file: the JSON goes to a temporary file in the same directory, is synced
+    and then renamed over the pointer.
+    """
+    path = path if path is not None else SERVING_POINTER
+    if not path:
+        raise ValueError("SERVING_POINTER is not set")
+    pointer = dict(pointer, published_at=datetime.now(timezone.utc).isoformat(timespec="seconds"))
+    temporary = f"{path}.tmp-{os.getpid()}"
+    with open(temporary, "w") as f:
+        json.dump(pointer, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporary, path)
+
+
+def serving_url(default: str) -> str:
+    """Database URL to serve: the pointer's if one is published, else ``default``"""
+    pointer = read_pointer()
+    return pointer["database_url"] if pointer else default
+
+
+class ServingSwitcher:
+    """
+    Follows the serving pointer and switches the app's engines when it changes
+
+    ``check`` is cheap when nothing changed (one stat call) and blocks while
+    the new database is opened, so main.py runs it on the default executor.
+    """
+
+    def __init__(self, path: str = SERVING_POINTER, drain_seconds: float = SERVING_DRAIN_SECONDS):
+        self.path = path
+        self.drain_seconds = drain_seconds
+        pointer = read_pointer(path) if path else None
+        self.generation = pointer["generation"] if pointer else 0
+        self.switches = 0
+        self.failures = 0
+        self.draining = 0
+        self._mtime = None
+        self._lock = threading.Lock()
+
+    def check(self) -> bool:
+        """
+        Switch to the pointer's database if a newer generation was published
+
+        Returns:
+            Whether the app switched databases
+        """
+        if not self.path:
+            return False
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+        with self._lock:
+            pointer = read_pointer(self.path)
+            self._mtime = mtime
+            if pointer is None or pointer["generation"] <= self.generation:
+                return False
+            return self._switch(pointer)
+
+    def _switch(self, pointer: Dict[str, Any]) -> bool:
+        # Imported here: connection reads the pointer at import time
+        from app.database import connection
+        from app.services.dataset_version import invalidate_dataset_versions
+
+        try:
+            previous = connection.switch_database(pointer["database_url"])
+        except Exception as e:
+            # Keep serving the current database; a later generation may fix it
+            self.failures += 1
+            self.generation = pointer["generation"]
+            print(f"Warning: not switching to serving generation {pointer['generation']}: {e}")
+            return False
+        invalidate_dataset_versions()
+        self.generation = pointer["generation"]
+        self.switches += 1
+        print(f"Serving generation {self.generation}: {pointer['database_url'].split('@')[-1]}")
+        threading.Thread(target=self._drain, args=previous, name="serving-drain", daemon=True).start()
+        return True
+
+    def _drain(self, *engines):
+        """Dispose the retired engines once no request holds one of their connections"""
+        with self._lock:
+            self.draining += 1
+        deadline = time.monotonic() + self.drain_seconds
+        while any(e.pool.checkedout() for e in engines) and time.monotonic() < deadline:
+            time.sleep(0.2)
+        in_use = sum(e.pool.checkedout() for e in engines)
+        if in_use:
+            print(f"Warning: closing retired database with {in_use} connection(s) still in use")
+        for retired in engines:
+            retired.dispose()
+        with self._lock:
+            self.draining -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current generation and switch counters"""
+        return {
+            "generation": self.generation,
+            "switches": self.switches,
+            "failures": self.failures,
+            "draining": self.draining,
+        }
+
+
+serving_switcher = ServingSwitcher()
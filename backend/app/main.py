@@ -4,11 +4,25 @@ FastAPI application entry point for NYC TLC Analytics Dashboard
 import os
 import asyncio
 from contextlib import asynccontextmanager
+import anyio.to_thread
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
-from app.database.connection import engine, Base
-from app.api import overview, zones, efficiency, surge, wait_time, congestion, incentives, variability, simulation
+from app.database.connection import THREADPOOL_SIZE, Base, engine, get_read_engine, optimize_database
+from app.database.serving import SERVING_POINTER, SERVING_POINTER_INTERVAL, serving_switcher
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.query_budget import QueryBudgetMiddleware
+from app.middleware.response_cache import ResponseCacheMiddleware, response_caches
+from app.pipelines.partitions import ensure_trips_layout
+from app.pipelines.rollups import RollupsMissing, rollups_missing
+from app.services.jobs import JOBS_RETENTION_DAYS, job_manager
+from app.services.metrics import Gauges, registry
+from app.services.query_budget import QueryCancelled, QueryTimeout
+from app.services.single_flight import query_flight
+from app.utils.responses import FastJSONResponse
+from app.api import admin, bundle, jobs, overview, zones, efficiency, surge, wait_time, congestion, incentives, variability, simulation
 
 
 @asynccontextmanager
@@ -20,20 +34,68 @@ async def lifespan(app: FastAPI):
     # Create database tables in background to not block startup
     def create_tables():
         try:
+            # Partitioned trips layout first, so create_all leaves trips alone
+            ensure_trips_layout(engine)
             Base.metadata.create_all(bind=engine)
             print("Database tables created/verified successfully")
         except Exception as e:
             print(f"Warning: Error creating database tables: {e}")
             # Don't fail startup if tables already exist
+        try:
+            # Databases restored from S3 may predate the rollup tables; building
+            # them scans every trip, so leave that to the pipeline
+            if rollups_missing(engine):
+                print("Warning: rollup tables are empty; run python -m app.pipelines.rollups")
+        except Exception as e:
+            print(f"Warning: Error checking rollups: {e}")
+        try:
+            removed = job_manager.store.prune(JOBS_RETENTION_DAYS)
+            if removed:
+                print(f"Removed {removed} expired background jobs")
+        except Exception as e:
+            print(f"Warning: Error pruning background jobs: {e}")
+    
+    # Sync endpoints run on AnyIO's threadpool; match it to the read pool size
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREADPOOL_SIZE
     
     # Run table creation in thread pool to not block startup
     loop = asyncio.get_event_loop()
     loop.run_in_executor(None, create_tables)
     
+    async def optimize_periodically():
+        while True:
+            await asyncio.sleep(optimize_interval)
+            try:
+                await loop.run_in_executor(None, optimize_database)
+            except Exception as e:
+                print(f"Warning: PRAGMA optimize failed: {e}")
+    
+    # Refresh planner statistics on a schedule instead of on every connection
+    optimize_interval = int(os.getenv("DB_OPTIMIZE_INTERVAL", "3600"))
+    optimizer = asyncio.create_task(optimize_periodically()) if optimize_interval > 0 else None
+    
+    async def follow_serving_pointer():
+        while True:
+            await asyncio.sleep(SERVING_POINTER_INTERVAL)
+            try:
+                await loop.run_in_executor(None, serving_switcher.check)
+            except Exception as e:
+                print(f"Warning: serving pointer check failed: {e}")
+    
+    # Blue/green: switch to newly published databases without a restart
+    follower = asyncio.create_task(follow_serving_pointer()) if SERVING_POINTER else None
+    
     yield  # Application is running
     
-    # Cleanup on shutdown (if needed)
-    pass
+    # Cleanup on shutdown
+    if optimizer:
+        optimizer.cancel()
+    if follower:
+        follower.cancel()
+    try:
+        optimize_database()
+    except Exception as e:
+        print(f"Warning: PRAGMA optimize failed: {e}")
 
 app = FastAPI(
     title="NYC TLC Analytics API",
@@ -41,9 +103,25 @@ app = FastAPI(
     version="1.0.0",
     docs_url=None,  # Disable Swagger UI
     redoc_url=None,  # Disable ReDoc
-    lifespan=lifespan  # Use lifespan context manager for startup/shutdown
+    lifespan=lifespan,  # Use lifespan context manager for startup/shutdown
+    default_response_class=FastJSONResponse  # orjson: NaN -> null, NumPy/Decimal/datetime aware
 )
 
+# Per-request query time budget, cancelled when the client disconnects
+app.add_middleware(QueryBudgetMiddleware)
+
+# Precompressed response cache, keyed by dataset version (added before CORS so
+# CORS headers are still computed per request)
+if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+    app.add_middleware(
+        ResponseCacheMiddleware,
+        engine=get_read_engine,  # follows blue/green switches
+        max_bytes=int(os.getenv("RESPONSE_CACHE_MB", "256")) * 1024 * 1024
+    )
+
+# ?profile=1 / X-Profile with an admin token; outside the cache so profiled requests run the endpoint
+app.add_middleware(ProfilingMiddleware)
+
 # CORS configuration - allow frontend URLs from environment or default to localhost
 frontend_urls = os.getenv("FRONTEND_URLS", "http://localhost:5173,http://localhost:3000").split(",")
 frontend_urls = [url.strip() for url in frontend_urls if url.strip()]
@@ -56,6 +134,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request metrics for GET /metrics; outermost so latency includes the other middleware
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(QueryTimeout)
+async def query_timeout_handler(request, exc: QueryTimeout):
+    """Structured 503 with the cost spent before the query was stopped"""
+    return FastJSONResponse(
+        status_code=503,
+        content={"error": "query_timeout", "detail": str(exc), "cost": exc.cost},
+        headers={"Retry-After": "30", "Cache-Control": "no-store"}
+    )
+
+
+@app.exception_handler(QueryCancelled)
+async def query_cancelled_handler(request, exc: QueryCancelled):
+    """The client is gone; 499 (nginx's "client closed request") only shows up in logs"""
+    return FastJSONResponse(
+        status_code=499,
+        content={"error": "query_cancelled", "detail": str(exc), "cost": exc.cost},
+        headers={"Cache-Control": "no-store"}
+    )
+
+
+@app.exception_handler(RollupsMissing)
+async def rollups_missing_handler(request, exc: RollupsMissing):
+    """503 instead of empty variability charts until the rollups are built"""
+    return FastJSONResponse(
+        status_code=503,
+        content={"error": "rollups_missing", "detail": str(exc)},
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 # Include API routers
 app.include_router(overview.router, prefix="/api/v1", tags=["Overview"])
 app.include_router(zones.router, prefix="/api/v1", tags=["Zones"])
@@ -66,6 +177,9 @@ app.include_router(congestion.router, prefix="/api/v1", tags=["Congestion"])
 app.include_router(incentives.router, prefix="/api/v1", tags=["Incentives"])
 app.include_router(variability.router, prefix="/api/v1", tags=["Variability"])
 app.include_router(simulation.router, prefix="/api/v1", tags=["Simulation"])
+app.include_router(bundle.router, prefix="/api/v1", tags=["Bundle"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["Jobs"])
+app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
 
 
 @app.get("/")
@@ -73,13 +187,72 @@ async def root():
     return {"message": "NYC TLC Analytics API", "version": "1.0.0"}
 
 
+def _cache_gauges():
+    for index, cache in enumerate(response_caches):
+        snapshot = cache.snapshot()
+        for stat in ("hits", "not_modified", "misses", "entries", "bytes", "hit_ratio"):
+            yield (str(index), stat), snapshot[stat]
+
+
+def _single_flight_gauges():
+    for stat, value in query_flight.snapshot().items():
+        yield (stat,), value
+
+
+def _threadpool_gauges():
+    # anyio's limiter must be read on the event loop, i.e. while rendering /metrics
+    statistics = anyio.to_thread.current_default_thread_limiter().statistics()
+    panels = bundle.panel_counts()
+    yield ("request", "size"), statistics.total_tokens
+    yield ("request", "busy"), statistics.borrowed_tokens
+    yield ("request", "queued"), statistics.tasks_waiting
+    yield ("bundle", "size"), bundle.BUNDLE_WORKERS
+    yield ("bundle", "busy"), panels["running"]
+    yield ("bundle", "queued"), panels["queued"]
+
+
+def _serving_gauges():
+    for stat, value in serving_switcher.snapshot().items():
+        yield (stat,), value
+
+
+def _job_gauges():
+    for status, count in job_manager.active_counts().items():
+        yield (status,), count
+
+
+registry.register(Gauges(
+    "response_cache_stat", "Response cache counters and size (hit_ratio counts 304s as hits)",
+    ("cache", "stat"), _cache_gauges
+))
+registry.register(Gauges("single_flight_stat", "Query coalescing counters", ("stat",), _single_flight_gauges))
+registry.register(Gauges(
+    "threadpool_stat", "Worker threads (size, busy) and calls waiting for one (queued)",
+    ("pool", "stat"), _threadpool_gauges
+))
+registry.register(Gauges(
+    "serving_database_stat", "Blue/green serving generation, switches and retired databases still draining",
+    ("stat",), _serving_gauges
+))
+registry.register(Gauges("jobs_active", "Background jobs per status", ("status",), _job_gauges))
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request, database, cache and threadpool metrics"""
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint for load balancer"""
     try:
         # Quick database connectivity check (non-blocking)
-        from app.database.connection import engine
-        with engine.connect() as conn:
+        with get_read_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         return {"status": "healthy", "database": "connected"}
     except Exception as e:
@@ -92,8 +265,7 @@ async def api_health_check():
     """Health check endpoint for API monitoring"""
     try:
         # Quick database connectivity check
-        from app.database.connection import engine
-        with engine.connect() as conn:
+        with get_read_engine().connect() as conn:
             conn.execute(text("SELECT 1"))
         return {
             "status": "healthy",
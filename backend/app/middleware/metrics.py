@@ -0,0 +1,97 @@
+"""
+Request instrumentation middleware
+
+Records per-route latency, status codes, DB time, serialization time and
+rows fetched into app.services.metrics, for ``GET /metrics``.
+
+Routes are labelled by their path template (``/api/v1/bundle/{page}``), not
+the raw path, so label cardinality stays bounded. The template is rebuilt
+from the path params the router put in the scope; responses served by the
+response cache never reach the router and reuse the template learned when
+that path was last routed.
+"""
+import time
+from app.services.metrics import (
+    RequestMetrics, current_request_metrics, db_duration, http_duration, http_requests, rows_returned,
+    serialize_duration
+)
+
+UNMATCHED = "unmatched"
+
+# Raw path -> route template; bounded by the routes and their path param values
+MAX_LEARNED_PATHS = 10000
+
+
+def route_template(scope) -> str:
+    """Path template of the route that handled ``scope``, or "" if none did"""
+    if "endpoint" not in scope:
+        return ""
+    path = scope["path"]
+    path_params = scope.get("path_params")
+    if not path_params:
+        return path
+    segments = path.split("/")
+    for name, value in path_params.items():
+        value = str(value)
+        for index in range(len(segments) - 1, -1, -1):
+            if segments[index] == value:
+                segments[index] = "{" + name + "}"
+                break
+    return "/".join(segments)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware timing each HTTP request
+
+    Add it last (outermost) so the latency covers the other middleware too.
+
+    Args:
+        app: ASGI app to wrap
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.templates = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        request_metrics = RequestMetrics()
+        token = current_request_metrics.set(request_metrics)
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_request_metrics.reset(token)
+            self._observe(scope, status, time.perf_counter() - started, request_metrics)
+
+    def _observe(self, scope, status: int, seconds: float, request_metrics: RequestMetrics):
+        path = scope["path"]
+        route = route_template(scope)
+        if route:
+            if path not in self.templates:
+                if len(self.templates) >= MAX_LEARNED_PATHS:
+                    self.templates.clear()
+                self.templates[path] = route
+        else:
+            route = self.templates.get(path, UNMATCHED)
+
+        method = scope["method"]
+        http_requests.inc((route, method, str(status)))
+        http_duration.observe(seconds, (route, method))
+        if request_metrics.queries:
+            db_duration.observe(request_metrics.db_seconds, (route,))
+            rows_returned.observe(request_metrics.rows, (route,))
+        if request_metrics.serialize_seconds:
+            serialize_duration.observe(request_metrics.serialize_seconds, (route,))
@@ -0,0 +1,104 @@
+"""
+On-demand request profiling
+
+An admin adds ``?profile=1`` (or the ``X-Profile: 1`` header) plus a
+valid ``X-Admin-Token`` to any request. The request then runs under the
+sampling profiler (app.services.profiler), bypassing the response cache,
+and the response body is replaced by the profile:
+
+    ?profile=1 / speedscope   speedscope JSON, open in https://www.speedscope.app
+    ?profile=collapsed        collapsed stacks for flamegraph.pl / inferno
+
+The endpoint's own status is returned in ``X-Profile-Status``. Requests
+without the parameter or header, or with a value other than those above
+(e.g. ``profile=0``), pass straight through.
+"""
+from urllib.parse import parse_qsl, urlencode
+from app.api.admin import is_admin_token
+from app.services.profiler import SamplingProfiler
+from app.utils.responses import dumps
+
+PROFILE_FORMATS = {"1": "speedscope", "true": "speedscope", "speedscope": "speedscope", "collapsed": "collapsed"}
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling requests that ask for it
+
+    Add it outside the response cache so profiled requests reach the endpoint.
+
+    Args:
+        app: ASGI app to wrap
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        requested = header_value = token = None
+        for name, value in scope["headers"]:
+            if name == b"x-profile":
+                header_value = value.decode("latin-1")
+            elif name == b"x-admin-token":
+                token = value.decode("latin-1")
+        params = None
+        if b"profile=" in scope["query_string"]:
+            params = parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)
+            requested = next((value for key, value in params if key == "profile"), None)
+        # profile=0/false (or any other value) is not a profile request
+        profile_format = PROFILE_FORMATS.get((requested or header_value or "").lower())
+        if profile_format is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not is_admin_token(token):
+            await _send_error(send, 403, "Profiling requires a valid X-Admin-Token")
+            return
+
+        if params is not None:
+            # The endpoint (and bundle param forwarding) must not see the profile param
+            scope["query_string"] = urlencode([(key, value) for key, value in params if key != "profile"]).encode()
+        scope["extensions"] = {**(scope.get("extensions") or {}), "bypass_response_cache": True}
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        with SamplingProfiler() as profiler:
+            await self.app(scope, receive, discard)
+
+        query = scope["query_string"].decode("latin-1")
+        name = f"{scope['method']} {scope['path']}" + (f"?{query}" if query else "")
+        if profile_format == "speedscope":
+            body = dumps(profiler.speedscope(name))
+            content_type, extension = b"application/json", "speedscope.json"
+        else:
+            body = profiler.collapsed().encode()
+            content_type, extension = b"text/plain; charset=utf-8", "collapsed.txt"
+        filename = scope["path"].strip("/").replace("/", "_") or "root"
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", content_type),
+            (b"content-length", str(len(body)).encode()),
+            (b"content-disposition", f'attachment; filename="{filename}.{extension}"'.encode()),
+            (b"cache-control", b"no-store"),
+            (b"x-profile-status", str(status).encode()),
+            (b"x-profile-samples", str(profiler.sample_count).encode()),
+            (b"x-profile-duration-ms", f"{profiler.duration * 1000:.1f}".encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
+
+
+async def _send_error(send, status: int, detail: str):
+    body = dumps({"detail": detail})
+    await send({"type": "http.response.start", "status": status, "headers": [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"cache-control", b"no-store"),
+    ]})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,53 @@
+"""
+Query budget middleware
+
+Gives every API request a QueryBudget (see app.services.query_budget) for
+its path, and cancels it when the client disconnects so a query nobody is
+waiting for anymore (e.g. nginx already gave up) stops instead of running
+to completion.
+
+In-process callers that manage their own budget (background jobs) pass it
+as ``scope["extensions"]["query_budget"]``.
+"""
+import asyncio
+from app.services.query_budget import QueryBudget, budget_for_path, current_budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Pure ASGI middleware setting the request's query budget
+
+    Args:
+        app: ASGI app to wrap
+        prefixes: Path prefixes that get a budget
+    """
+
+    def __init__(self, app, prefixes=("/api/",)):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        budget = (scope.get("extensions") or {}).get("query_budget") or QueryBudget(budget_for_path(scope["path"]))
+        token = current_budget.set(budget)
+        messages = asyncio.Queue()
+
+        async def watch_disconnect():
+            # Reads the client side on the app's behalf: body messages are passed
+            # through, and a disconnect cancels the budget immediately
+            while True:
+                message = await receive()
+                await messages.put(message)
+                if message["type"] == "http.disconnect":
+                    budget.cancel()
+                    return
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await self.app(scope, messages.get, send)
+        finally:
+            watcher.cancel()
+            current_budget.reset(token)
@@ -0,0 +1,270 @@
+"""
+Precompressed response cache
+
+Analytics payloads only change when the ETL loads new data, so successful
+GET responses are cached per (dataset version, path, query, negotiated
+format). Each entry stores the body as identity, gzip and (if the brotli
+package is installed) brotli, compressed once. Every request is then
+answered from memory with the best encoding the client accepts, and
+``If-None-Match`` revalidations get a 304 without touching the database.
+
+Responses opt out by sending ``Cache-Control: no-store``. In-process
+callers that must reach the endpoint (profiled requests) set
+``scope["extensions"]["bypass_response_cache"]``.
+"""
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+import anyio
+from app.api.dependencies import ACCEPT_FORMATS
+from app.services.dataset_version import DatasetVersionWatcher
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 9
+# Bodies below this size are not worth compressing
+MIN_COMPRESS_BYTES = 512
+
+# Response headers replaced by the cache
+_OWN_HEADERS = {b"content-length", b"content-encoding", b"etag", b"vary", b"cache-control"}
+
+
+@dataclass
+class CacheEntry:
+    """One cached response in every stored encoding"""
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    bodies: Dict[str, bytes]
+    etag: str
+    size: int = field(init=False)
+
+    def __post_init__(self):
+        self.size = sum(len(body) for body in self.bodies.values())
+
+    def etag_for(self, encoding: str) -> str:
+        # Strong ETags must differ per content-encoding
+        return f'"{self.etag}"' if encoding == "identity" else f'"{self.etag}-{encoding}"'
+
+
+def _compress(body: bytes) -> Dict[str, bytes]:
+    """Encode a body in every supported content-encoding"""
+    bodies = {"identity": body}
+    if len(body) >= MIN_COMPRESS_BYTES:
+        bodies["gzip"] = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+        if brotli is not None:
+            bodies["br"] = brotli.compress(body, quality=BROTLI_QUALITY)
+    return bodies
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Parse Accept-Encoding into {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str, available) -> str:
+    """Pick the stored encoding to send for an Accept-Encoding header"""
+    accepted = _accepted_encodings(header or "")
+    for coding in ("br", "gzip"):
+        if coding in available and accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+class ResponseCache:
+    """Byte-bounded LRU of CacheEntry objects with hit/miss counters"""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[tuple, CacheEntry]" = OrderedDict()
+        self.total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "stores": 0, "evictions": 0, "uncacheable": 0}
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, entry: CacheEntry):
+        if entry.size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self.entries.pop(key, None)
+            if previous is not None:
+                self.total_bytes -= previous.size
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            self.stats["stores"] += 1
+            while self.total_bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= evicted.size
+                self.stats["evictions"] += 1
+
+    def count(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
+
+    def snapshot(self) -> dict:
+        """Counters plus size, for the admin/metrics endpoints"""
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["not_modified"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": len(self.entries),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_ratio": (self.stats["hits"] + self.stats["not_modified"]) / lookups if lookups else 0.0,
+            }
+
+
+class ResponseCacheMiddleware:
+    """
+    Pure ASGI middleware serving cached, precompressed GET responses
+
+    Args:
+        app: ASGI app to wrap
+        engine: Engine used to read the dataset version (or a function returning it)
+        prefixes: Path prefixes whose GET responses may be cached
+        max_bytes: Memory budget for all stored encodings
+        version_ttl: Seconds between dataset version checks
+    """
+
+    def __init__(self, app, engine, prefixes=("/api/v1/",), max_bytes: int = 256 * 1024 * 1024,
+                 version_ttl: float = 5.0):
+        self.app = app
+        self.prefixes = tuple(prefixes)
+        self.cache = ResponseCache(max_bytes)
+        self.versions = DatasetVersionWatcher(engine, ttl=version_ttl)
+        response_caches.append(self.cache)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or not scope["path"].startswith(self.prefixes):
+            await self.app(scope, receive, send)
+            return
+        if (scope.get("extensions") or {}).get("bypass_response_cache"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+        key = self._key(scope, headers, await self._version())
+        entry = self.cache.get(key)
+        if entry is None:
+            self.cache.count("misses")
+            await self._fetch_and_store(scope, receive, send, headers, key)
+            return
+
+        if self._not_modified(entry, headers):
+            self.cache.count("not_modified")
+        else:
+            self.cache.count("hits")
+        await self._send_entry(entry, headers, send, cache_status="HIT")
+
+    async def _version(self) -> int:
+        if self.versions.is_fresh():
+            return self.versions.current()
+        return await anyio.to_thread.run_sync(self.versions.current)
+
+    @staticmethod
+    def _key(scope, headers: Dict[str, str], version: int) -> tuple:
+        query = urlencode(sorted(parse_qsl(scope["query_string"].decode("latin-1"), keep_blank_values=True)))
+        # Only the Accept values that change the response format matter
+        negotiated = ""
+        if "format=" not in query:
+            for media_type in headers.get("accept", "").split(","):
+                negotiated = ACCEPT_FORMATS.get(media_type.split(";")[0].strip().lower(), "")
+                if negotiated:
+                    break
+        return version, scope["path"], query, negotiated
+
+    @staticmethod
+    def _not_modified(entry: CacheEntry, headers: Dict[str, str]) -> bool:
+        if_none_match = headers.get("if-none-match")
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or any(entry.etag_for(encoding) in tags for encoding in entry.bodies)
+
+    async def _send_entry(self, entry: CacheEntry, headers: Dict[str, str], send, cache_status: str):
+        encoding = choose_encoding(headers.get("accept-encoding", ""), entry.bodies)
+        response_headers = list(entry.headers) + [
+            (b"etag", entry.etag_for(encoding).encode()),
+            (b"vary", b"Accept-Encoding, Accept"),
+            (b"cache-control", b"no-cache"),
+            (b"x-cache", cache_status.encode()),
+        ]
+        if self._not_modified(entry, headers):
+            await send({"type": "http.response.start", "status": 304, "headers": [
+                (name, value) for name, value in response_headers if name != b"content-type"
+            ]})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        body = entry.bodies[encoding]
+        if encoding != "identity":
+            response_headers.append((b"content-encoding", encoding.encode()))
+        response_headers.append((b"content-length", str(len(body)).encode()))
+        await send({"type": "http.response.start", "status": entry.status, "headers": response_headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _fetch_and_store(self, scope, receive, send, headers: Dict[str, str], key: tuple):
+        """Run the app, buffer its response and cache it if it is cacheable"""
+        start = {}
+        chunks = []
+
+        async def buffer(message):
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        body = b"".join(chunks)
+        app_headers = list(start.get("headers", []))
+        cacheable = (
+            start.get("status") == 200
+            and not any(name.lower() == b"content-encoding" for name, _ in app_headers)
+            and not any(name.lower() == b"cache-control" and b"no-store" in value.lower() for name, value in app_headers)
+        )
+        if not cacheable:
+            self.cache.count("uncacheable")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        # Compress off the event loop; only the first request per version pays
+        bodies = await anyio.to_thread.run_sync(_compress, body)
+        entry = CacheEntry(
+            status=200,
+            headers=[(name, value) for name, value in app_headers if name.lower() not in _OWN_HEADERS],
+            bodies=bodies,
+            etag=hashlib.sha256(body).hexdigest()[:32],
+        )
+        self.cache.put(key, entry)
+        await self._send_entry(entry, headers, send, cache_status="MISS")
+
+
+# Every ResponseCache created by a middleware instance, for reporting
+response_caches: List[ResponseCache] = []
@@ -0,0 +1,332 @@
+"""
+Blue/green database builds - refresh data without touching the served database
+
+Builds the next serving database as a new file next to the current one
+(``nyc_taxi.db`` -> ``nyc_taxi.g3.db``), with trips, indexes, rollups and
+ANALYZE all done before anything reads it, then publishes it through the
+serving pointer (see app.database.serving). Running API processes switch to
+it within SERVING_POINTER_INTERVAL seconds and drain the old one, so a data
+refresh never blocks readers and never stops web.service.
+
+Usage (from backend/, with SERVING_POINTER set for the API and this tool):
+    python -m app.pipelines.bluegreen build --months 2025-04    # copy the served DB, reload April
+    python -m app.pipelines.bluegreen build --full              # every month into an empty file
+    python -m app.pipelines.bluegreen publish /srv/data/restored.db
+    python -m app.pipelines.bluegreen rollback
+    python -m app.pipelines.bluegreen status
+
+On PostgreSQL pass ``--target-url`` with an empty database to ``build --full``;
+the served database cannot be copied while it has connections.
+
+Only the current generation and the ``--keep - 1`` before it (for rollback)
+are kept; older ``.gN.db`` files are deleted after a publish.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from app.database.connection import DATABASE_URL
+from app.database.serving import SERVING_POINTER, read_pointer, write_pointer
+from app.services.dataset_version import bump_dataset_version, read_dataset_version
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+KEEP_GENERATIONS = int(os.getenv("SERVING_KEEP_GENERATIONS", "2"))
+GENERATION_SUFFIX = re.compile(r"\.g\d+$")
+
+
+def is_sqlite_url(database_url: str) -> bool:
+    return make_url(database_url).get_backend_name() == "sqlite"
+
+
+def sqlite_path(database_url: str) -> Path:
+    return Path(make_url(database_url).database or "").resolve()
+
+
+def as_database_url(value: str) -> str:
+    """Accept a database URL or a path to a SQLite file"""
+    return value if "://" in value else f"sqlite:///{Path(value).resolve()}"
+
+
+def generation_url(current_url: str, generation: int) -> str:
+    """SQLite file for a generation, next to the served one: nyc_taxi.db -> nyc_taxi.g4.db"""
+    path = sqlite_path(current_url)
+    stem = GENERATION_SUFFIX.sub("", path.stem)
+    return f"sqlite:///{path.with_name(f'{stem}.g{generation}{path.suffix}')}"
+
+
+def current_serving(pointer: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """The served database as a pointer entry (DATABASE_URL before the first publish)"""
+    if pointer:
+        return {key: pointer.get(key) for key in ("generation", "database_url", "dataset_version")}
+    return {"generation": 0, "database_url": DATABASE_URL, "dataset_version": None}
+
+
+def _engine(database_url: str):
+    if is_sqlite_url(database_url):
+        return create_engine(database_url, connect_args={"check_same_thread": False, "timeout": 300})
+    return create_engine(database_url)
+
+
+def _size_mb(database_url: str) -> Optional[float]:
+    if not is_sqlite_url(database_url) or not sqlite_path(database_url).exists():
+        return None
+    return round(sqlite_path(database_url).stat().st_size / 1024 / 1024, 1)
+
+
+def copy_database(source_url: str, target_url: str):
+    """
+    Copy the served SQLite database with the online backup API
+
+    Readers keep running; the copy is a consistent snapshot even if a
+    writer commits meanwhile (SQLite restarts the step).
+    """
+    target = sqlite_path(target_url)
+    if target.exists():
+        target.unlink()
+    source = sqlite3.connect(f"file:{sqlite_path(source_url)}?mode=ro", uri=True)
+    destination = sqlite3.connect(target)
+    try:
+        source.backup(destination)
+    finally:
+        destination.close()
+        source.close()
+
+
+def load_worker(data_dir: str, months: List[str], full: bool):
+    """
+    Load into DATABASE_URL (worker process, so the ETL engine binds to the new database)
+
+    Zones, the given months (each replaces its partition, with indexes and
+    per-partition ANALYZE), rollups for those months, then a final ANALYZE.
+    """
+    from app.database.connection import Base
+    from app.pipelines.etl import engine, load_parquet_to_sql, load_taxi_zones
+    from app.pipelines.partitions import ensure_trips_layout, month_bounds
+    from app.pipelines.rollups import build_rollups, ensure_rollups
+
+    ensure_trips_layout(engine)
+    Base.metadata.create_all(bind=engine)
+    load_taxi_zones(data_dir)
+    loaded = load_parquet_to_sql(data_dir, months=months) if months else []
+    if full:
+        build_rollups(engine)
+    else:
+        for month in loaded:
+            build_rollups(engine, *month_bounds(month))
+    ensure_rollups(engine)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def check_database(database_url: str):
+    """Refuse to publish a database that is corrupt or has no trips"""
+    engine = _engine(database_url)
+    try:
+        with engine.connect() as conn:
+            if is_sqlite_url(database_url):
+                result = conn.execute(text("PRAGMA quick_check")).scalar()
+                if result != "ok":
+                    raise RuntimeError(f"quick_check failed: {result}")
+            if conn.execute(text("SELECT 1 FROM trips LIMIT 1")).first() is None:
+                raise RuntimeError("trips is empty")
+    finally:
+        engine.dispose()
+
+
+def served_version_ceiling(pointer: Optional[Dict[str, Any]]) -> int:
+    """Highest dataset version served so far (pointer history and the served database)"""
+    engine = _engine(current_serving(pointer)["database_url"])
+    try:
+        served = read_dataset_version(engine)
+    finally:
+        engine.dispose()
+    return max(served, (pointer or {}).get("max_dataset_version", 0))
+
+
+def publish(database_url: str, keep: int = KEEP_GENERATIONS) -> Dict[str, Any]:
+    """
+    Make ``database_url`` the served database
+
+    Its dataset version is first raised above every version served before,
+    so response caches and ETags from the previous database never match.
+
+    Returns:
+        The new pointer
+    """
+    if not SERVING_POINTER:
+        raise SystemExit("SERVING_POINTER is not set: the API would not notice the new database")
+    if make_url(database_url).get_backend_name() != make_url(DATABASE_URL).get_backend_name():
+        raise SystemExit(f"{database_url.split('@')[-1]} is not a {make_url(DATABASE_URL).get_backend_name()} database")
+    pointer = read_pointer()
+    previous = current_serving(pointer)
+    engine = _engine(database_url)
+    try:
+        version = bump_dataset_version(engine, at_least=served_version_ceiling(pointer) + 1)
+    finally:
+        engine.dispose()
+
+    history = [previous] + (pointer or {}).get("history", [])
+    history = [entry for entry in history if entry["database_url"] != database_url][:max(keep - 1, 0)]
+    new_pointer = {
+        "generation": previous["generation"] + 1,
+        "database_url": database_url,
+        "dataset_version": version,
+        "max_dataset_version": version,
+        "history": history,
+    }
+    write_pointer(new_pointer)
+    print(f"Published generation {new_pointer['generation']} (dataset version {version}): "
+          f"{database_url.split('@')[-1]}")
+    prune(new_pointer)
+    return new_pointer
+
+
+def prune(pointer: Dict[str, Any]) -> List[Path]:
+    """Delete SQLite generation files the pointer no longer references"""
+    if not is_sqlite_url(pointer["database_url"]):
+        return []
+    referenced = {sqlite_path(entry["database_url"])
+                  for entry in [pointer] + pointer.get("history", []) if is_sqlite_url(entry["database_url"])}
+    current = sqlite_path(pointer["database_url"])
+    stem = GENERATION_SUFFIX.sub("", current.stem)
+    removed = []
+    for path in current.parent.glob(f"{stem}.g*{current.suffix}"):
+        if GENERATION_SUFFIX.search(path.stem) and path.resolve() not in referenced:
+            for leftover in (path, Path(f"{path}-wal"), Path(f"{path}-shm")):
+                if leftover.exists():
+                    leftover.unlink()
+            removed.append(path)
+            print(f"Removed retired generation {path.name}")
+    return removed
+
+
+def build(data_dir: str, months: List[str], full: bool = False, target_url: Optional[str] = None,
+          keep: int = KEEP_GENERATIONS) -> Dict[str, Any]:
+    """
+    Build the next serving database and publish it
+
+    Args:
+        data_dir: Directory with the parquet files and taxi_zone_lookup.csv
+        months: Months to (re)load as YYYY-MM
+        full: Start from an empty database instead of a copy of the served one
+        target_url: Database to build into (default: next ``.gN.db`` file; required on PostgreSQL)
+        keep: Generations to keep on disk, the served one included
+
+    Returns:
+        The new pointer
+    """
+    pointer = read_pointer()
+    source_url = current_serving(pointer)["database_url"]
+    if target_url is None:
+        if not is_sqlite_url(source_url):
+            raise SystemExit("PostgreSQL builds need --target-url (an empty database)")
+        target_url = generation_url(source_url, current_serving(pointer)["generation"] + 1)
+    if target_url == source_url:
+        raise SystemExit("The target is the database being served")
+    if not full and not is_sqlite_url(target_url):
+        raise SystemExit("Only SQLite databases can be copied; pass --full")
+
+    steps = []
+
+    def step(name: str, function, *args):
+        print(f"\n== {name}")
+        started = time.perf_counter()
+        function(*args)
+        steps.append((name, time.perf_counter() - started, _size_mb(target_url)))
+
+    if full and is_sqlite_url(target_url) and sqlite_path(target_url).exists():
+        sqlite_path(target_url).unlink()
+    if not full:
+        step(f"Copy {sqlite_path(source_url).name}", copy_database, source_url, target_url)
+
+    command = [sys.executable, "-m", "app.pipelines.bluegreen", "worker", "--data-dir", str(Path(data_dir).resolve()),
+               "--months", *months] + (["--full"] if full else [])
+    # The worker loads into the new database only; it must not follow the pointer
+    env = dict(os.environ, DATABASE_URL=target_url, SERVING_POINTER="")
+    step(f"Load {', '.join(months) or 'no months'}",
+         lambda: subprocess.run(command, cwd=BACKEND_DIR, env=env, check=True))
+    step("Check", check_database, target_url)
+    new_pointer = {}
+    step("Publish", lambda: new_pointer.update(publish(target_url, keep=keep)))
+
+    print(f"\n{'step':<28} {'seconds':>8} {'size MB':>8}")
+    for name, seconds, size in steps:
+        print(f"{name:<28} {seconds:8.1f} {size if size is not None else '-':>8}")
+    return new_pointer
+
+
+def rollback(keep: int = KEEP_GENERATIONS) -> Dict[str, Any]:
+    """Publish the previously served database again (as a new generation)"""
+    pointer = read_pointer()
+    if not pointer or not pointer.get("history"):
+        raise SystemExit("Nothing to roll back to")
+    previous = pointer["history"][0]["database_url"]
+    if is_sqlite_url(previous) and not sqlite_path(previous).exists():
+        raise SystemExit(f"{sqlite_path(previous)} no longer exists")
+    return publish(previous, keep=keep)
+
+
+def status():
+    """Print the pointer and the databases it references"""
+    pointer = read_pointer()
+    if not pointer:
+        print(f"No database published (SERVING_POINTER={SERVING_POINTER or 'unset'}); serving {DATABASE_URL}")
+        return
+    print(json.dumps({key: value for key, value in pointer.items() if key != "history"}, indent=2))
+    for entry in [pointer] + pointer.get("history", []):
+        size = _size_mb(entry["database_url"])
+        print(f"  generation {entry['generation']:>3}  version {entry['dataset_version']}  "
+              f"{entry['database_url'].split('@')[-1]}" + (f"  {size} MB" if size is not None else ""))
+
+
+def main():
+    from app.pipelines.etl import MONTHS
+
+    parser = argparse.ArgumentParser(description="Build and publish serving databases without downtime")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build_parser = sub.add_parser("build", help="Build the next serving database and publish it")
+    build_parser.add_argument("--data-dir", default="../data", help="Directory containing data files")
+    build_parser.add_argument("--months", nargs="*", metavar="YYYY-MM",
+                              help="Months to (re)load (default: all with --full, none otherwise)")
+    build_parser.add_argument("--full", action="store_true", help="Build from scratch instead of copying")
+    build_parser.add_argument("--target-url", help="Database to build into (required on PostgreSQL)")
+    build_parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS, help="Generations kept on disk")
+    publish_parser = sub.add_parser("publish", help="Serve an already built database")
+    publish_parser.add_argument("database", help="SQLite file or database URL")
+    publish_parser.add_argument("--no-check", action="store_true", help="Skip the integrity check")
+    publish_parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS, help="Generations kept on disk")
+    rollback_parser = sub.add_parser("rollback", help="Serve the previous database again")
+    rollback_parser.add_argument("--keep", type=int, default=KEEP_GENERATIONS, help="Generations kept on disk")
+    sub.add_parser("status", help="Show the served generation")
+    worker = sub.add_parser("worker", help="Internal: load into DATABASE_URL (run by build)")
+    worker.add_argument("--data-dir", required=True)
+    worker.add_argument("--months", nargs="*", default=[])
+    worker.add_argument("--full", action="store_true")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        months = args.months if args.months is not None else (MONTHS if args.full else [])
+        build(args.data_dir, months, full=args.full, target_url=args.target_url, keep=args.keep)
+    elif args.command == "publish":
+        database_url = as_database_url(args.database)
+        if not args.no_check:
+            check_database(database_url)
+        publish(database_url, keep=args.keep)
+    elif args.command == "rollback":
+        rollback(keep=args.keep)
+    elif args.command == "status":
+        status()
+    elif args.command == "worker":
+        load_worker(args.data_dir, args.months, args.full)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,42 +3,136 @@ ETL Pipeline to load parquet files into SQL database
 """
 import pandas as pd
 from pathlib import Path
+from typing import List, Optional
 from sqlalchemy import create_engine
-from app.database.connection import DATABASE_URL
+from app.database.connection import DATABASE_URL, SERVING_URL
+from app.database.serving import SERVING_POINTER
+from app.pipelines.partitions import load_month
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Use SQLite if DATABASE_URL is not set or is SQLite
+# Use SQLite if DATABASE_URL is not set or is SQLite. Loads go to the database
+# currently served (the blue/green pointer's, if published); app.pipelines.bluegreen
+# builds into a fresh file instead
 if not os.getenv("DATABASE_URL") or DATABASE_URL.startswith("sqlite"):
     # SQLite-specific engine for ETL
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+    engine = create_engine(SERVING_URL, connect_args={"check_same_thread": False})
 else:
-    engine = create_engine(DATABASE_URL)
+    engine = create_engine(SERVING_URL)
 
 
-def load_parquet_to_sql(data_dir: str = "../data", batch_size: int = 10000):
+def refuse_live_load():
+    """
+    Exit when SERVING_POINTER is set: the served database must not be loaded in place
+
+    Blue/green deployments reload months with ``app.pipelines.bluegreen build``,
+    whose worker runs with SERVING_POINTER cleared.
+    """
+    if SERVING_POINTER:
+        raise SystemExit(f"SERVING_POINTER is set ({SERVING_POINTER}): loading would modify the database "
+                         f"being served. Use: python -m app.pipelines.bluegreen build --months ...")
+
+
+# Months covered by the dashboard (one parquet file and one trips partition each)
+MONTHS = ["2025-01", "2025-02", "2025-03", "2025-04"]
+
+
+def prepare_trips(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Clean a TLC yellow trip file and map it to the trips columns
+
+    Args:
+        df: Trips as read from a parquet file
+
+    Returns:
+        Valid trips with database column names
+    """
+    # Clean and transform data
+    # Remove rows with missing critical fields
+    df = df.dropna(subset=[
+        'tpep_pickup_datetime', 
+        'tpep_dropoff_datetime', 
+        'PULocationID', 
+        'DOLocationID'
+    ])
+    
+    # Parse dates; load_month keeps only pickups inside the file's month
+    df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
+    df['tpep_dropoff_datetime'] = pd.to_datetime(df['tpep_dropoff_datetime'])
+    
+    # Remove invalid durations
+    df = df[df['tpep_dropoff_datetime'] > df['tpep_pickup_datetime']]
+    
+    # Rename columns to match database schema
+    column_mapping = {
+        'PULocationID': 'pulocationid',
+        'DOLocationID': 'dolocationid',
+    }
+    df = df.rename(columns=column_mapping)
+    
+    # Select only columns that exist in database
+    # Map original column names to database column names
+    column_selection = {}
+    db_column_mapping = {
+        'tpep_pickup_datetime': 'tpep_pickup_datetime',
+        'tpep_dropoff_datetime': 'tpep_dropoff_datetime',
+        'pulocationid': 'pulocationid',  # Already renamed above
+        'dolocationid': 'dolocationid',  # Already renamed above
+        'trip_distance': 'trip_distance',
+        'fare_amount': 'fare_amount',
+        'tip_amount': 'tip_amount',
+        'total_amount': 'total_amount',
+        'extra': 'extra',
+        'mta_tax': 'mta_tax',
+        'tolls_amount': 'tolls_amount',
+        'payment_type': 'payment_type',
+        'RatecodeID': 'ratecodeid',  # Original name
+        'passenger_count': 'passenger_count',
+        'VendorID': 'vendorid'  # Original name
+    }
+    
+    # Build column selection dict
+    for orig_col, db_col in db_column_mapping.items():
+        if orig_col in df.columns:
+            column_selection[orig_col] = db_col
+    
+    # Rename columns for database
+    df = df.rename(columns={k: v for k, v in column_selection.items() if k != v})
+    
+    # Select only the columns we need
+    df = df[list(column_selection.values())]
+    
+    return df
+
+
+def load_parquet_to_sql(
+    data_dir: str = "../data",
+    batch_size: int = 10000,
+    months: Optional[List[str]] = None
+) -> List[str]:
     """
     ETL pipeline to load parquet files into SQL database
     
+    Each file is loaded into its own month partition, replacing any data
+    already loaded for that month.
+    
     Args:
         data_dir: Directory containing parquet files
         batch_size: Number of rows to insert per batch
+        months: Months to (re)load as YYYY-MM (default: all of MONTHS)
+    
+    Returns:
+        Months that were loaded
     """
     # Engine is created at module level
     
-    # List of parquet files to load
-    files = [
-        "yellow_tripdata_2025-01.parquet",
-        "yellow_tripdata_2025-02.parquet",
-        "yellow_tripdata_2025-03.parquet",
-        "yellow_tripdata_2025-04.parquet",
-    ]
-    
     data_path = Path(data_dir)
+    loaded = []
     
-    for file in files:
+    for month in months or MONTHS:
+        file = f"yellow_tripdata_{month}.parquet"
         file_path = data_path / file
         if not file_path.exists():
             print(f"Warning: {file} not found, skipping...")
@@ -49,89 +143,20 @@ def load_parquet_to_sql(data_dir: str = "../data", batch_size: int = 10000):
         # Read parquet file
         df = pd.read_parquet(file_path)
         
-        # Clean and transform data
-        # Remove rows with missing critical fields
-        df = df.dropna(subset=[
-            'tpep_pickup_datetime', 
-            'tpep_dropoff_datetime', 
-            'PULocationID', 
-            'DOLocationID'
-        ])
-        
-        # Filter to valid dates (2025 only)
-        df['tpep_pickup_datetime'] = pd.to_datetime(df['tpep_pickup_datetime'])
-        df['tpep_dropoff_datetime'] = pd.to_datetime(df['tpep_dropoff_datetime'])
-        df = df[df['tpep_pickup_datetime'].dt.year == 2025]
-        
-        # Remove invalid durations
-        df = df[df['tpep_dropoff_datetime'] > df['tpep_pickup_datetime']]
-        
-        # Rename columns to match database schema
-        column_mapping = {
-            'PULocationID': 'pulocationid',
-            'DOLocationID': 'dolocationid',
-        }
-        df = df.rename(columns=column_mapping)
-        
-        # Select only columns that exist in database
-        # Map original column names to database column names
-        column_selection = {}
-        db_column_mapping = {
-            'tpep_pickup_datetime': 'tpep_pickup_datetime',
-            'tpep_dropoff_datetime': 'tpep_dropoff_datetime',
-            'pulocationid': 'pulocationid',  # Already renamed above
-            'dolocationid': 'dolocationid',  # Already renamed above
-            'trip_distance': 'trip_distance',
-            'fare_amount': 'fare_amount',
-            'tip_amount': 'tip_amount',
-            'total_amount': 'total_amount',
-            'extra': 'extra',
-            'mta_tax': 'mta_tax',
-            'tolls_amount': 'tolls_amount',
-            'payment_type': 'payment_type',
-            'RatecodeID': 'ratecodeid',  # Original name
-            'passenger_count': 'passenger_count',
-            'VendorID': 'vendorid'  # Original name
-        }
-        
-        # Build column selection dict
-        for orig_col, db_col in db_column_mapping.items():
-            if orig_col in df.columns:
-                column_selection[orig_col] = db_col
-        
-        # Rename columns for database
-        df = df.rename(columns={k: v for k, v in column_selection.items() if k != v})
-        
-        # Select only the columns we need
-        df = df[list(column_selection.values())]
+        df = prepare_trips(df)
         
-        # Load to database in batches
-        # SQLite doesn't support 'multi' method, use default
-        if DATABASE_URL.startswith("sqlite"):
-            df.to_sql(
-                'trips',
-                engine,
-                if_exists='append',
-                index=False,
-                chunksize=batch_size
-            )
-        else:
-            df.to_sql(
-                'trips',
-                engine,
-                if_exists='append',
-                index=False,
-                method='multi',
-                chunksize=batch_size
-            )
+        # Load into a staging table and swap it in as the month's partition
+        row_count = load_month(engine, month, df, batch_size=batch_size)
+        loaded.append(month)
         
-        print(f"Loaded {len(df)} rows from {file}")
+        print(f"Loaded {row_count} rows from {file}")
     
     print("ETL pipeline completed!")
+    return loaded
 
 
-def load_taxi_zones(data_dir: str = "../data"):
-    """Load taxi zone lookup table"""
+def load_taxi_zones(data_dir: str = "../data", target=None):
+    """Load taxi zone lookup table (into ``target``, default the module's engine)"""
     # Engine is created at module level
     
     zones_file = Path(data_dir) / "taxi_zone_lookup.csv"
@@ -165,7 +190,7 @@ def load_taxi_zones(data_dir: str = "../data"):
     
     df.to_sql(
         'taxi_zones',
-        engine,
+        target or engine,
         if_exists='replace',
         index=False
     )
@@ -175,6 +200,10 @@ def load_taxi_zones(data_dir: str = "../data"):
 
 if __name__ == "__main__":
     # Run ETL pipeline
+    from app.pipelines.partitions import month_bounds
+    from app.pipelines.rollups import build_rollups
+    refuse_live_load()
     load_taxi_zones()
-    load_parquet_to_sql()
+    for month in load_parquet_to_sql():
+        build_rollups(engine, *month_bounds(month))
 
@@ -0,0 +1,592 @@
+"""
+Month-partitioned trips storage
+
+PostgreSQL: ``trips`` is declaratively RANGE partitioned on
+tpep_pickup_datetime with one ``trips_YYYY_MM`` partition per month, so the
+planner prunes partitions outside the queried window.
+
+SQLite: each month lives in its own ``trips_YYYY_MM`` table (with its own,
+smaller indexes) and ``trips`` is a UNION ALL view over them. SQLite pushes
+the pickup-time predicates into every arm of the view, so months outside
+the window cost a single empty index probe.
+
+Reloading a month loads into a staging table and swaps it in (SQLite:
+drop + rename, PostgreSQL: DETACH/DROP + ATTACH) instead of a huge DELETE.
+
+Rows are written in CLUSTER_ORDER (pickup day, then pickup zone), so a date
+range scan reads contiguous pages. With SQLITE_WITHOUT_ROWID=true, SQLite
+month tables are WITHOUT ROWID tables keyed on (tpep_pickup_datetime, id):
+the table itself is the pickup-time index. ``cluster`` re-sorts a month
+loaded before (PostgreSQL: CLUSTER on the pickup index).
+
+PostgreSQL indexes come from an index profile (POSTGRES_INDEX_PROFILES):
+``btree`` is the SQLite set; ``brin`` replaces the time B-trees with BRIN
+indexes (tiny, since rows are written in pickup order) plus partial B-trees
+over valid-duration trips that cover the per-zone aggregates. The profile
+lives on the ``trips`` parent; new partitions copy the parent's indexes.
+Switch an existing database with ``indexes --profile brin``.
+"""
+import os
+import re
+import time
+from datetime import date
+from typing import List, Tuple
+import pandas as pd
+from sqlalchemy import text
+from app.services.dataset_version import bump_dataset_version
+
+# Trip columns in table order: (name, SQLite type, PostgreSQL type)
+TRIP_COLUMNS = [
+    ("tpep_pickup_datetime", "DATETIME NOT NULL", "TIMESTAMP NOT NULL"),
+    ("tpep_dropoff_datetime", "DATETIME NOT NULL", "TIMESTAMP NOT NULL"),
+    ("pulocationid", "INTEGER NOT NULL", "INTEGER NOT NULL"),
+    ("dolocationid", "INTEGER NOT NULL", "INTEGER NOT NULL"),
+    ("trip_distance", "FLOAT", "FLOAT"),
+    ("fare_amount", "FLOAT", "FLOAT"),
+    ("tip_amount", "FLOAT", "FLOAT"),
+    ("total_amount", "FLOAT", "FLOAT"),
+    ("extra", "FLOAT", "FLOAT"),
+    ("mta_tax", "FLOAT", "FLOAT"),
+    ("tolls_amount", "FLOAT", "FLOAT"),
+    ("payment_type", "INTEGER", "INTEGER"),
+    ("ratecodeid", "INTEGER", "INTEGER"),
+    ("passenger_count", "INTEGER", "INTEGER"),
+    ("vendorid", "INTEGER", "INTEGER"),
+    ("created_at", "DATETIME DEFAULT CURRENT_TIMESTAMP", "TIMESTAMP DEFAULT CURRENT_TIMESTAMP"),
+]
+TRIP_COLUMN_NAMES = ["id"] + [name for name, _, _ in TRIP_COLUMNS]
+
+# Per-partition index set: (suffix, columns)
+PARTITION_INDEXES = [
+    ("pickup", "tpep_pickup_datetime"),
+    ("dropoff", "tpep_dropoff_datetime"),
+    ("pickup_location_time", "pulocationid, tpep_pickup_datetime"),
+    ("dropoff_location_time", "dolocationid, tpep_dropoff_datetime"),
+]
+
+PARTITION_PATTERN = re.compile(r"^trips_(\d{4})_(\d{2})$")
+
+# Filter shared by nearly every aggregate; partial indexes leave the other rows out
+VALID_DURATION_SQL = "tpep_dropoff_datetime > tpep_pickup_datetime"
+
+# PostgreSQL index profiles: (suffix, method, key columns, INCLUDE columns, WHERE)
+POSTGRES_INDEX_PROFILES = {
+    "btree": [(suffix, "btree", columns, None, None) for suffix, columns in PARTITION_INDEXES],
+    "brin": [
+        ("pickup_brin", "brin", "tpep_pickup_datetime", None, None),
+        ("dropoff_brin", "brin", "tpep_dropoff_datetime", None, None),
+        # Date-window aggregates per zone as index-only scans
+        ("pickup_valid", "btree", "tpep_pickup_datetime",
+         "pulocationid, tpep_dropoff_datetime, trip_distance, fare_amount, tip_amount, total_amount",
+         VALID_DURATION_SQL),
+        ("pickup_location_valid", "btree", "pulocationid, tpep_pickup_datetime", "fare_amount, total_amount",
+         VALID_DURATION_SQL),
+        ("dropoff_location_time", "btree", "dolocationid, tpep_dropoff_datetime", None, None),
+    ],
+}
+POSTGRES_INDEX_PROFILE = os.getenv("POSTGRES_INDEX_PROFILE", "btree")
+# Heap pages summarized per BRIN entry (a few hundred trips each)
+BRIN_PAGES_PER_RANGE = int(os.getenv("BRIN_PAGES_PER_RANGE", "32"))
+
+# Physical row order within a month: day, then pickup zone, then time
+CLUSTER_ORDER_SQL = "DATE(tpep_pickup_datetime), pulocationid, tpep_pickup_datetime"
+
+# SQLite month tables as WITHOUT ROWID tables clustered on pickup time
+SQLITE_WITHOUT_ROWID = os.getenv("SQLITE_WITHOUT_ROWID", "false").lower() == "true"
+
+
+def is_sqlite_engine(engine) -> bool:
+    return engine.dialect.name == "sqlite"
+
+
+def parse_month(value) -> date:
+    """Parse 'YYYY-MM' (or a date) into the first day of that month"""
+    if isinstance(value, date):
+        return value.replace(day=1)
+    year, month = str(value)[:7].split("-")
+    return date(int(year), int(month), 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def month_bounds(month) -> Tuple[str, str]:
+    """Get the [start, end) pickup bounds of a month as ISO dates"""
+    start = parse_month(month)
+    return start.isoformat(), next_month(start).isoformat()
+
+
+def partition_name(month) -> str:
+    month = parse_month(month)
+    return f"trips_{month.year:04d}_{month.month:02d}"
+
+
+def list_partitions(conn) -> List[str]:
+    """List month partitions in chronological order"""
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'"))
+    else:
+        rows = conn.execute(text("""
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            JOIN pg_class p ON p.oid = i.inhparent
+            WHERE p.relname = 'trips'
+        """))
+    return sorted(name for (name,) in rows if PARTITION_PATTERN.match(name))
+
+
+def trips_layout(conn) -> str:
+    """
+    Get the current trips storage layout
+
+    Returns:
+        'missing', 'partitioned' or 'legacy' (a single unpartitioned table)
+    """
+    if conn.dialect.name == "sqlite":
+        row = conn.execute(text("SELECT type FROM sqlite_master WHERE name = 'trips'")).first()
+        if row is None:
+            return "missing"
+        return "partitioned" if row[0] == "view" else "legacy"
+
+    row = conn.execute(text("SELECT relkind FROM pg_class WHERE relname = 'trips' AND relkind IN ('r', 'p')")).first()
+    if row is None:
+        return "missing"
+    return "partitioned" if row[0] == "p" else "legacy"
+
+
+def month_id_base(month) -> int:
+    """First SQLite trip id of a month; ids are unique across month tables"""
+    month = parse_month(month)
+    return (month.year * 100 + month.month) * 1_000_000_000
+
+
+def _sqlite_table_ddl(table: str, month: date, without_rowid: bool = False) -> str:
+    start, end = month_bounds(month)
+    columns = ",\n    ".join(f"{name} {sqlite_type}" for name, sqlite_type, _ in TRIP_COLUMNS)
+    if without_rowid:
+        # Rows stored in pickup-time order; secondary indexes carry (pickup, id)
+        key = "id INTEGER NOT NULL"
+        primary_key = ",\n            PRIMARY KEY (tpep_pickup_datetime, id)"
+        options = " WITHOUT ROWID"
+    else:
+        key, primary_key, options = "id INTEGER PRIMARY KEY", "", ""
+    return f"""
+        CREATE TABLE {table} (
+            {key},
+            {columns},
+            CHECK (tpep_pickup_datetime >= '{start}' AND tpep_pickup_datetime < '{end}'){primary_key}
+        ){options}
+    """
+
+
+def is_without_rowid(conn, table: str) -> bool:
+    """Whether a SQLite month table is a WITHOUT ROWID table"""
+    sql = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                       {"name": table}).scalar()
+    return "WITHOUT ROWID" in (sql or "").upper()
+
+
+def _create_sqlite_indexes(conn, table: str):
+    without_rowid = is_without_rowid(conn, table)
+    for suffix, columns in PARTITION_INDEXES:
+        if without_rowid and columns == "tpep_pickup_datetime":
+            continue  # the primary key already orders the table by pickup time
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS idx_{table}_{suffix} ON {table} ({columns})"))
+
+
+def rebuild_trips_view(conn):
+    """(Re)create the SQLite ``trips`` UNION ALL view over all month tables"""
+    partitions = list_partitions(conn)
+    columns = ", ".join(TRIP_COLUMN_NAMES)
+    if partitions:
+        body = "\n            UNION ALL\n            ".join(f"SELECT {columns} FROM {name}" for name in partitions)
+    else:
+        # No months loaded yet: an empty, correctly-shaped view
+        body = "SELECT " + ", ".join(f"NULL AS {name}" for name in TRIP_COLUMN_NAMES) + " WHERE 0"
+    conn.execute(text("DROP VIEW IF EXISTS trips"))
+    conn.execute(text(f"CREATE VIEW trips AS\n            {body}"))
+
+
+def postgres_index_ddl(table: str, index: tuple, name: str = None) -> str:
+    """CREATE INDEX statement for one POSTGRES_INDEX_PROFILES entry"""
+    suffix, method, columns, include, where = index
+    sql = f"CREATE INDEX {f'IF NOT EXISTS {name} ' if name else ''}ON {table} USING {method} ({columns})"
+    if include:
+        sql += f" INCLUDE ({include})"
+    if method == "brin":
+        sql += f" WITH (pages_per_range = {BRIN_PAGES_PER_RANGE})"
+    if where:
+        sql += f" WHERE {where}"
+    return sql
+
+
+def index_definition_for(definition: str, table: str) -> str:
+    """
+    Retarget a ``pg_get_indexdef`` definition at another table
+
+    The index name is dropped (Postgres picks one), as is ``ONLY``, which
+    pg_get_indexdef adds for indexes on a partitioned parent. Method, key
+    columns, INCLUDE, WITH and WHERE are kept.
+    """
+    return re.sub(r"^CREATE (UNIQUE )?INDEX \S+ ON (ONLY )?\S+ ",
+                  lambda m: f"CREATE {m.group(1) or ''}INDEX ON {table} ", definition)
+
+
+def _postgres_parent_indexes(conn) -> dict:
+    """Definitions of the indexes on the trips parent (primary key excluded), by name"""
+    rows = conn.execute(text("""
+        SELECT c.relname, pg_get_indexdef(i.indexrelid)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        WHERE t.relname = 'trips' AND t.relkind = 'p' AND NOT i.indisprimary
+    """))
+    return dict(rows.all())
+
+
+def apply_postgres_index_profile(engine, profile: str, drop_others: bool = True):
+    """
+    Give the PostgreSQL trips partitions the indexes of a profile
+
+    Indexes created on the parent are built on every partition (writes to
+    trips wait meanwhile; reads do not). Then VACUUM ANALYZE, since index-only
+    scans need the visibility map.
+
+    Args:
+        engine: SQLAlchemy engine (writer)
+        profile: Key of POSTGRES_INDEX_PROFILES
+        drop_others: Drop parent indexes the profile does not have
+    """
+    wanted = {f"idx_trips_{index[0]}": index for index in POSTGRES_INDEX_PROFILES[profile]}
+    with engine.begin() as conn:
+        existing = _postgres_parent_indexes(conn)
+        for name, index in wanted.items():
+            if name not in existing:
+                started = time.time()
+                conn.execute(text(postgres_index_ddl("trips", index, name)))
+                print(f"Created {name} in {time.time() - started:.1f}s")
+        if drop_others:
+            for name in existing.keys() - wanted.keys():
+                conn.execute(text(f"DROP INDEX {name}"))
+                print(f"Dropped {name}")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("VACUUM (ANALYZE) trips"))
+
+
+def _create_postgres_parent(conn):
+    columns = ",\n            ".join(f"{name} {pg_type}" for name, _, pg_type in TRIP_COLUMNS)
+    conn.execute(text("CREATE SEQUENCE IF NOT EXISTS trips_id_seq"))
+    conn.execute(text(f"""
+        CREATE TABLE trips (
+            id BIGINT NOT NULL DEFAULT nextval('trips_id_seq'),
+            {columns},
+            PRIMARY KEY (id, tpep_pickup_datetime)
+        ) PARTITION BY RANGE (tpep_pickup_datetime)
+    """))
+    conn.execute(text("ALTER SEQUENCE trips_id_seq OWNED BY trips.id"))
+    # Indexes on the parent cascade to every partition
+    for index in POSTGRES_INDEX_PROFILES[POSTGRES_INDEX_PROFILE]:
+        conn.execute(text(postgres_index_ddl("trips", index, f"idx_trips_{index[0]}")))
+
+
+def ensure_trips_layout(engine) -> str:
+    """
+    Create the partitioned trips layout if trips does not exist yet
+
+    A legacy single-table ``trips`` is left untouched (queries work on either
+    layout); convert it with ``python -m app.pipelines.partitions migrate``.
+
+    Returns:
+        The layout after the call ('partitioned' or 'legacy')
+    """
+    with engine.begin() as conn:
+        layout = trips_layout(conn)
+        if layout == "missing":
+            if is_sqlite_engine(engine):
+                rebuild_trips_view(conn)
+            else:
+                _create_postgres_parent(conn)
+            layout = "partitioned"
+    return layout
+
+
+def _create_staging_table(conn, month: date, without_rowid: bool = False) -> str:
+    """Create an empty table shaped like a month partition, ready to load"""
+    staging = f"{partition_name(month)}_staging"
+    conn.execute(text(f"DROP TABLE IF EXISTS {staging}"))
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(_sqlite_table_ddl(staging, month, without_rowid)))
+    else:
+        start, end = month_bounds(month)
+        conn.execute(text(f"CREATE TABLE {staging} (LIKE trips INCLUDING DEFAULTS)"))
+        # Matching CHECK constraint lets ATTACH PARTITION skip its validation scan
+        conn.execute(text(f"""
+            ALTER TABLE {staging} ADD CONSTRAINT {staging}_range
+            CHECK (tpep_pickup_datetime >= '{start}' AND tpep_pickup_datetime < '{end}')
+        """))
+    return staging
+
+
+def _begin_sqlite_ddl(conn):
+    """
+    Open an explicit SQLite transaction so the DDL below commits atomically
+
+    pysqlite only starts transactions implicitly before DML, so without this
+    each DROP/ALTER would autocommit and readers could see a half-swapped view.
+    """
+    if not conn.connection.dbapi_connection.in_transaction:
+        conn.exec_driver_sql("BEGIN")
+
+
+def _swap_in_partition(conn, month: date, staging: str):
+    """Replace a month's partition with its loaded staging table"""
+    table = partition_name(month)
+    start, end = month_bounds(month)
+    if conn.dialect.name == "sqlite":
+        _begin_sqlite_ddl(conn)
+        # The view must go first: SQLite refuses to rename while a view is broken
+        conn.execute(text("DROP VIEW IF EXISTS trips"))
+        conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+        _create_sqlite_indexes(conn, table)
+        conn.execute(text(f"ANALYZE {table}"))
+        rebuild_trips_view(conn)
+    else:
+        # Build the parent's indexes before the swap so ATTACH only has to adopt them
+        conn.execute(text(f"ALTER TABLE {staging} ADD PRIMARY KEY (id, tpep_pickup_datetime)"))
+        for definition in _postgres_parent_indexes(conn).values():
+            conn.execute(text(index_definition_for(definition, staging)))
+        if table in list_partitions(conn):
+            conn.execute(text(f"ALTER TABLE trips DETACH PARTITION {table}"))
+            conn.execute(text(f"DROP TABLE {table}"))
+        conn.execute(text(f"ALTER TABLE {staging} RENAME TO {table}"))
+        # Postgres named the indexes after the staging table; a later reload would get *_idx1
+        for (index,) in conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = :table"
+        ), {"table": table}).fetchall():
+            if index.startswith(staging):
+                conn.execute(text(f"ALTER INDEX {index} RENAME TO {table}{index[len(staging):]}"))
+        conn.execute(text(f"ALTER TABLE trips ATTACH PARTITION {table} FOR VALUES FROM ('{start}') TO ('{end}')"))
+        conn.execute(text(f"ANALYZE {table}"))
+
+
+def load_month(engine, month, df: pd.DataFrame, batch_size: int = 10000, without_rowid: bool = None) -> int:
+    """
+    Load (or reload) one month of trips as a partition
+
+    Rows outside the month are dropped; existing data for the month is
+    replaced atomically once the new partition is fully loaded and indexed.
+
+    Args:
+        engine: SQLAlchemy engine (writer)
+        month: 'YYYY-MM' or a date inside the month
+        df: Trips with database column names
+        batch_size: Number of rows to insert per batch
+        without_rowid: SQLite: store the month as a WITHOUT ROWID table
+            (default: SQLITE_WITHOUT_ROWID)
+
+    Returns:
+        Number of rows loaded
+    """
+    month = parse_month(month)
+    start, end = month_bounds(month)
+    without_rowid = SQLITE_WITHOUT_ROWID if without_rowid is None else without_rowid
+    pickup = pd.to_datetime(df["tpep_pickup_datetime"])
+    in_month = (pickup >= pd.Timestamp(start)) & (pickup < pd.Timestamp(end))
+    # Write in CLUSTER_ORDER so range scans read contiguous pages
+    df = (
+        df[in_month]
+        .assign(_day=pickup[in_month].dt.normalize(), _pickup=pickup[in_month])
+        .sort_values(["_day", "pulocationid", "_pickup"], kind="stable")
+        .drop(columns=["_day", "_pickup"])
+    )
+
+    if ensure_trips_layout(engine) == "legacy":
+        raise RuntimeError(
+            "trips is a legacy unpartitioned table; run "
+            "`python -m app.pipelines.partitions migrate` first"
+        )
+
+    with engine.begin() as conn:
+        staging = _create_staging_table(conn, month, without_rowid and is_sqlite_engine(engine))
+
+    if is_sqlite_engine(engine):
+        # Deterministic ids that stay unique across month tables
+        df = df.copy()
+        df.insert(0, "id", month_id_base(month) + pd.RangeIndex(1, len(df) + 1))
+        df.to_sql(staging, engine, if_exists="append", index=False, chunksize=batch_size)
+    else:
+        df.to_sql(staging, engine, if_exists="append", index=False, method="multi", chunksize=batch_size)
+
+    with engine.begin() as conn:
+        _swap_in_partition(conn, month, staging)
+    bump_dataset_version(engine)
+
+    return len(df)
+
+
+def drop_month(engine, month):
+    """Remove one month of trips by dropping its partition"""
+    table = partition_name(month)
+    with engine.begin() as conn:
+        if table not in list_partitions(conn):
+            return
+        if conn.dialect.name == "sqlite":
+            _begin_sqlite_ddl(conn)
+            conn.execute(text("DROP VIEW IF EXISTS trips"))
+            conn.execute(text(f"DROP TABLE {table}"))
+            rebuild_trips_view(conn)
+        else:
+            conn.execute(text(f"ALTER TABLE trips DETACH PARTITION {table}"))
+            conn.execute(text(f"DROP TABLE {table}"))
+    bump_dataset_version(engine)
+
+
+def cluster_month(engine, month, without_rowid: bool = None):
+    """
+    Rewrite a month partition in CLUSTER_ORDER
+
+    For months loaded before rows were sorted (or to switch a SQLite month to
+    or from WITHOUT ROWID). SQLite copies the month into a staging table in
+    order and swaps it in, renumbering the ids; PostgreSQL runs CLUSTER on
+    the partition's pickup-time B-tree, or rewrites it like SQLite (keeping
+    the ids) when the index profile has none. The trips do not change.
+
+    Args:
+        engine: SQLAlchemy engine (writer)
+        month: 'YYYY-MM' or a date inside the month
+        without_rowid: SQLite: layout of the rewritten table (default: keep the current one)
+    """
+    month = parse_month(month)
+    table = partition_name(month)
+    with engine.begin() as conn:
+        if table not in list_partitions(conn):
+            raise ValueError(f"{table} does not exist")
+        sqlite = conn.dialect.name == "sqlite"
+        index = None
+        if not sqlite:
+            # CLUSTER needs a full (non-partial) B-tree; the brin profile has none on pickup time
+            index = conn.execute(text("""
+                SELECT indexname FROM pg_indexes
+                WHERE tablename = :table AND indexdef LIKE '%USING btree (tpep_pickup_datetime)%'
+                    AND indexdef NOT LIKE '% WHERE %'
+            """), {"table": table}).scalar()
+        if index:
+            conn.execute(text(f"CLUSTER {table} USING {index}"))
+            conn.execute(text(f"ANALYZE {table}"))
+            return
+        if sqlite and without_rowid is None:
+            without_rowid = is_without_rowid(conn, table)
+        staging = _create_staging_table(conn, month, bool(without_rowid) and sqlite)
+        columns = ", ".join(name for name, _, _ in TRIP_COLUMNS)
+        id_sql = f"{month_id_base(month)} + ROW_NUMBER() OVER (ORDER BY {CLUSTER_ORDER_SQL})" if sqlite else "id"
+        conn.execute(text(f"""
+            INSERT INTO {staging} (id, {columns})
+            SELECT {id_sql}, {columns}
+            FROM {table}
+            ORDER BY {CLUSTER_ORDER_SQL}
+        """))
+        _swap_in_partition(conn, month, staging)
+
+
+def migrate_legacy(engine, keep_legacy: bool = False):
+    """
+    Convert a legacy single-table ``trips`` into month partitions
+
+    Each month is copied in CLUSTER_ORDER, so it is laid out contiguously.
+
+    Args:
+        engine: SQLAlchemy engine (writer)
+        keep_legacy: Keep the old table as ``trips_legacy`` instead of dropping it
+    """
+    sqlite = is_sqlite_engine(engine)
+    with engine.begin() as conn:
+        if trips_layout(conn) != "legacy":
+            print("trips is not a legacy table; nothing to migrate")
+            return
+        if sqlite:
+            _begin_sqlite_ddl(conn)
+            months = "strftime('%Y-%m', tpep_pickup_datetime)"
+        else:
+            months = "to_char(tpep_pickup_datetime, 'YYYY-MM')"
+        conn.execute(text("ALTER TABLE trips RENAME TO trips_legacy"))
+        if not sqlite:
+            # Free the constraint name for the partitioned parent's primary key
+            conn.execute(text("ALTER TABLE trips_legacy RENAME CONSTRAINT trips_pkey TO trips_legacy_pkey"))
+            _create_postgres_parent(conn)
+        months = sorted(parse_month(m) for (m,) in conn.execute(text(f"SELECT DISTINCT {months} FROM trips_legacy")) if m)
+
+    columns = ", ".join(name for name, _, _ in TRIP_COLUMNS)
+    for month in months:
+        started = time.time()
+        start, end = month_bounds(month)
+        if sqlite:
+            # Same deterministic id scheme as load_month
+            id_sql = f"{month_id_base(month)} + ROW_NUMBER() OVER (ORDER BY {CLUSTER_ORDER_SQL})"
+        else:
+            id_sql = "id"
+        with engine.begin() as conn:
+            staging = _create_staging_table(conn, month, SQLITE_WITHOUT_ROWID and sqlite)
+            conn.execute(text(f"""
+                INSERT INTO {staging} (id, {columns})
+                SELECT {id_sql}, {columns}
+                FROM trips_legacy
+                WHERE tpep_pickup_datetime >= :start AND tpep_pickup_datetime < :end
+                ORDER BY {CLUSTER_ORDER_SQL}
+            """), {"start": start, "end": end})
+            _swap_in_partition(conn, month, staging)
+        print(f"Migrated {partition_name(month)} in {time.time() - started:.1f}s")
+
+    with engine.begin() as conn:
+        if not sqlite:
+            # Legacy ids were copied, so continue the sequence after them
+            conn.execute(text("SELECT setval('trips_id_seq', COALESCE((SELECT MAX(id) FROM trips), 0) + 1, false)"))
+        if not keep_legacy:
+            conn.execute(text("DROP TABLE trips_legacy"))
+
+
+if __name__ == "__main__":
+    import argparse
+    from app.pipelines.etl import engine
+
+    parser = argparse.ArgumentParser(description="Manage month-partitioned trips storage")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list", help="List month partitions")
+    migrate = sub.add_parser("migrate", help="Convert a legacy trips table into month partitions")
+    migrate.add_argument("--keep-legacy", action="store_true", help="Keep the old table as trips_legacy")
+    drop = sub.add_parser("drop", help="Drop one month partition")
+    drop.add_argument("month", help="Month to drop (YYYY-MM)")
+    indexes = sub.add_parser("indexes", help="PostgreSQL: switch the trips index profile")
+    indexes.add_argument("--profile", choices=sorted(POSTGRES_INDEX_PROFILES), default=POSTGRES_INDEX_PROFILE)
+    indexes.add_argument("--keep-others", action="store_true", help="Keep indexes the profile does not have")
+    cluster = sub.add_parser("cluster", help="Rewrite month partitions in day/zone order")
+    cluster.add_argument("months", nargs="*", metavar="YYYY-MM", help="Months to rewrite (default: all)")
+    cluster.add_argument("--without-rowid", action=argparse.BooleanOptionalAction,
+                         help="SQLite: store as WITHOUT ROWID tables (default: keep the current layout)")
+    args = parser.parse_args()
+
+    if args.command == "list":
+        with engine.connect() as conn:
+            print(f"Layout: {trips_layout(conn)}")
+            for name in list_partitions(conn):
+                print(f"  {name}")
+    elif args.command == "migrate":
+        migrate_legacy(engine, keep_legacy=args.keep_legacy)
+    elif args.command == "drop":
+        from app.pipelines.rollups import build_rollups
+        drop_month(engine, args.month)
+        # Clears the month's rollup rows
+        build_rollups(engine, *month_bounds(args.month))
+    elif args.command == "cluster":
+        with engine.connect() as conn:
+            months = args.months or [f"{name[6:10]}-{name[11:13]}" for name in list_partitions(conn)]
+        for month in months:
+            started = time.time()
+            cluster_month(engine, month, without_rowid=args.without_rowid)
+            print(f"Clustered {partition_name(month)} in {time.time() - started:.1f}s")
+    elif args.command == "indexes":
+        if is_sqlite_engine(engine):
+            parser.error("index profiles are PostgreSQL only; SQLite months use PARTITION_INDEXES")
+        apply_postgres_index_profile(engine, args.profile, drop_others=not args.keep_others)
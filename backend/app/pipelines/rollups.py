@@ -0,0 +1,112 @@
+"""
+Rollup tables built from trips after the ETL load
+"""
+import time
+from sqlalchemy import text
+from app.database.models import DurationHistogram
+from app.services.dataset_version import bump_dataset_version
+from app.services.histogram import distance_bin_sql, duration_bin_sql
+from app.services.sql_compat import duration_minutes, extract_hour
+
+# A row when trips are loaded but the duration histogram is empty (the
+# NOT EXISTS is uncorrelated, so this reads one row of each table)
+ROLLUPS_MISSING_SQL = "SELECT 1 FROM trips WHERE NOT EXISTS (SELECT 1 FROM duration_histogram) LIMIT 1"
+
+
+class RollupsMissing(Exception):
+    """Trips are loaded but the rollup tables have not been built"""
+
+    def __init__(self):
+        super().__init__("Rollup tables are empty; run python -m app.pipelines.rollups")
+
+
+def build_duration_histogram(engine, start_date: str = None, end_date: str = None):
+    """
+    (Re)build the duration histogram rollup used by the variability endpoints
+
+    Existing rows for the window are deleted first, so a single month can be
+    rebuilt after it is reloaded.
+
+    Args:
+        engine: SQLAlchemy engine to build into
+        start_date: Inclusive pickup date lower bound (default: all trips)
+        end_date: Exclusive pickup date upper bound (default: all trips)
+    """
+    DurationHistogram.__table__.create(bind=engine, checkfirst=True)
+
+    params = {}
+    trip_filters = ["tpep_dropoff_datetime > tpep_pickup_datetime"]
+    rollup_filters = ["1 = 1"]
+    if start_date:
+        params["start_date"] = start_date
+        trip_filters.append("tpep_pickup_datetime >= :start_date")
+        rollup_filters.append("pickup_date >= :start_date")
+    if end_date:
+        params["end_date"] = end_date
+        trip_filters.append("tpep_pickup_datetime < :end_date")
+        rollup_filters.append("pickup_date < :end_date")
+
+    query = f"""
+        INSERT INTO duration_histogram (
+            pickup_date, hour_of_day, distance_bin, duration_bin,
+            trip_count, duration_sum, duration_sq_sum, duration_min, duration_max
+        )
+        SELECT
+            pickup_date,
+            hour_of_day,
+            distance_bin,
+            {duration_bin_sql('duration_minutes')} AS duration_bin,
+            COUNT(*) AS trip_count,
+            SUM(duration_minutes) AS duration_sum,
+            SUM(duration_minutes * duration_minutes) AS duration_sq_sum,
+            MIN(duration_minutes) AS duration_min,
+            MAX(duration_minutes) AS duration_max
+        FROM (
+            SELECT
+                DATE(tpep_pickup_datetime) AS pickup_date,
+                {extract_hour('tpep_pickup_datetime')} AS hour_of_day,
+                {distance_bin_sql()} AS distance_bin,
+                {duration_minutes()} AS duration_minutes
+            FROM trips
+            WHERE {' AND '.join(trip_filters)}
+        ) trip_metrics
+        GROUP BY 1, 2, 3, 4
+    """
+
+    started = time.time()
+    with engine.begin() as conn:
+        conn.execute(text(f"DELETE FROM duration_histogram WHERE {' AND '.join(rollup_filters)}"), params)
+        result = conn.execute(text(query), params)
+
+    print(f"Built duration_histogram: {result.rowcount} cells in {time.time() - started:.1f}s")
+
+
+def build_rollups(engine, start_date: str = None, end_date: str = None):
+    """Build every rollup table for the given pickup window"""
+    build_duration_histogram(engine, start_date, end_date)
+    bump_dataset_version(engine)
+
+
+def rollups_missing(engine) -> bool:
+    """Whether trips are loaded but the rollup tables are empty"""
+    DurationHistogram.__table__.create(bind=engine, checkfirst=True)
+    with engine.connect() as conn:
+        has_rollup = conn.execute(text("SELECT 1 FROM duration_histogram LIMIT 1")).first()
+        has_trips = conn.execute(text("SELECT 1 FROM trips LIMIT 1")).first()
+    return bool(has_trips and not has_rollup)
+
+
+def ensure_rollups(engine):
+    """
+    Build the rollups if they are missing but trips are loaded
+
+    A full build scans every trip (minutes on the full dataset), so this is a
+    pipeline step; the app only warns about missing rollups on startup.
+    """
+    if rollups_missing(engine):
+        build_rollups(engine)
+
+if __name__ == "__main__":
+    # Rebuild rollups on an already-loaded database
+    from app.pipelines.etl import engine
+    build_rollups(engine)
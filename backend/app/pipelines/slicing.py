@@ -0,0 +1,334 @@
+"""
+Build a serving database: a month/zone slice of the trips, ready to serve
+
+Replaces the ad-hoc reduce/optimize scripts (reduce_to_january_fast.ps1,
+restore_and_optimize.sh, optimize_database.sh) with one command that builds
+a new SQLite file from a source database or the parquet files:
+
+1. schema: the partitioned trips layout and the other tables
+2. trips: ``ATTACH`` the source and ``INSERT ... SELECT`` each month into
+   its partition in day/zone order (CLUSTER_ORDER_SQL), so range scans read
+   contiguous pages; ``--without-rowid`` clusters the tables on pickup time
+3. zones: the taxi zone lookup
+4. indexes: the partition index set, plus optional extra statements
+   (e.g. benchmarks/results/index_advisor.sql)
+5. rollups and ANALYZE
+6. ``VACUUM INTO`` the output: a compact, defragmented copy
+
+Each step reports its time and the database size. The build happens in a
+work file next to the output, which is only replaced once the build
+succeeded.
+
+Usage (from backend/):
+    python -m app.pipelines.slicing --source nyc_taxi.db --months 2025-01 --out nyc_taxi_january.db
+    python -m app.pipelines.slicing --parquet-dir ../data --zones 132 138 161 --out nyc_taxi_airports.db
+    python -m app.pipelines.slicing --source nyc_taxi.db --extra-indexes benchmarks/results/index_advisor.sql \\
+        --out nyc_taxi.serving.db --publish
+
+``--publish`` serves the result through the blue/green pointer
+(app.pipelines.bluegreen). SQLite only: ATTACH and VACUUM INTO have no
+PostgreSQL equivalent.
+"""
+import argparse
+import os
+import re
+import sqlite3
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+from app.pipelines.partitions import (
+    CLUSTER_ORDER_SQL, PARTITION_PATTERN, TRIP_COLUMN_NAMES, _create_sqlite_indexes, _sqlite_table_ddl, month_bounds,
+    month_id_base, parse_month, partition_name, rebuild_trips_view
+)
+
+# Rows per parquet batch written to the scratch source
+PARQUET_BATCH_ROWS = 100_000
+CREATE_INDEX_PATTERN = re.compile(r"CREATE\s+INDEX\s+(?:IF\s+NOT\s+EXISTS\s+)?\w+\s+ON\s+(\w+)", re.IGNORECASE)
+
+
+def _size_mb(path: Path) -> float:
+    return round(path.stat().st_size / 1024 / 1024, 1) if path.exists() else 0.0
+
+
+def _remove(path: Path):
+    for leftover in (path, Path(f"{path}-wal"), Path(f"{path}-shm"), Path(f"{path}-journal")):
+        if leftover.exists():
+            leftover.unlink()
+
+
+def source_months(conn) -> List[str]:
+    """Months held by the attached source (its partitions, or the pickup range of a legacy table)"""
+    names = [name for (name,) in conn.execute(text("SELECT name FROM src.sqlite_master WHERE type = 'table'"))]
+    months = sorted(f"{m.group(1)}-{m.group(2)}" for m in map(PARTITION_PATTERN.match, names) if m)
+    if months:
+        return months
+    first, last = conn.execute(text("SELECT MIN(tpep_pickup_datetime), MAX(tpep_pickup_datetime) FROM src.trips")).one()
+    if first is None:
+        return []
+    months, month = [], parse_month(first)
+    while month <= parse_month(last):
+        months.append(month.isoformat()[:7])
+        month = parse_month(month_bounds(month)[1])
+    return months
+
+
+def parquet_source(parquet_dir: str, months: Sequence[str], zones: Optional[Sequence[int]], path: Path) -> Path:
+    """
+    Clean the parquet files into a scratch SQLite database to slice from
+
+    Uses the ETL's cleaning (app.pipelines.etl.prepare_trips), so the slice
+    holds exactly the rows the ETL would load.
+    """
+    from app.pipelines.etl import prepare_trips
+
+    _remove(path)
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        for month in months:
+            file = Path(parquet_dir) / f"yellow_tripdata_{month}.parquet"
+            if not file.exists():
+                print(f"Warning: {file.name} not found, skipping...")
+                continue
+            df = prepare_trips(pd.read_parquet(file))
+            if zones:
+                df = df[df["pulocationid"].isin(zones) | df["dolocationid"].isin(zones)]
+            df.to_sql("trips", engine, if_exists="append", index=False, chunksize=PARQUET_BATCH_ROWS)
+        with engine.begin() as conn:
+            # Every month is empty when no file was found; keep the table for the queries below
+            conn.execute(text("CREATE TABLE IF NOT EXISTS trips (tpep_pickup_datetime DATETIME, pulocationid INTEGER, "
+                              "dolocationid INTEGER)"))
+    finally:
+        engine.dispose()
+    return path
+
+
+def copy_trips(conn, months: Sequence[str], zones: Optional[Sequence[int]], without_rowid: bool = False,
+               order_by: str = CLUSTER_ORDER_SQL) -> int:
+    """
+    Copy each month into its partition in ``order_by`` order
+
+    Rows are inserted sorted, with ids increasing in the same order, so each
+    partition's table b-tree stores a day's trips on neighbouring pages
+    (WITHOUT ROWID tables are ordered by their pickup-time key instead).
+    """
+    available = set(conn.execute(text("SELECT * FROM src.trips LIMIT 0")).keys())
+    columns = [name for name in TRIP_COLUMN_NAMES if name != "id" and name in available]
+    column_list = ", ".join(columns)
+    zone_filter = ""
+    if zones:
+        zone_list = ", ".join(str(int(zone)) for zone in zones)
+        zone_filter = f"AND (pulocationid IN ({zone_list}) OR dolocationid IN ({zone_list}))"
+
+    total = 0
+    for month in months:
+        table = partition_name(month)
+        start, end = month_bounds(month)
+        conn.execute(text(_sqlite_table_ddl(table, parse_month(month), without_rowid)))
+        inserted = conn.execute(text(f"""
+            INSERT INTO main.{table} (id, {column_list})
+            SELECT {month_id_base(month)} + ROW_NUMBER() OVER (ORDER BY {order_by}), {column_list}
+            FROM src.trips
+            WHERE tpep_pickup_datetime >= :start AND tpep_pickup_datetime < :end {zone_filter}
+            ORDER BY {order_by}
+        """), {"start": start, "end": end}).rowcount
+        conn.commit()
+        print(f"  {table}: {inserted:,} rows")
+        total += inserted
+    return total
+
+
+def copy_zones(conn):
+    """Copy the zone lookup from the attached source database"""
+    conn.execute(text("INSERT INTO main.taxi_zones (locationid, borough, zone, service_zone) "
+                      "SELECT locationid, borough, zone, service_zone FROM src.taxi_zones"))
+    conn.commit()
+
+
+def create_indexes(conn, extra_indexes: Optional[str] = None) -> int:
+    """
+    Create the partition index set, plus the CREATE INDEX statements of a SQL file
+
+    Extra statements on tables the slice does not have (months left out)
+    are skipped.
+
+    Returns:
+        Number of extra indexes created
+    """
+    tables = {name for (name,) in conn.execute(text("SELECT name FROM main.sqlite_master WHERE type = 'table'"))}
+    for table in sorted(name for name in tables if PARTITION_PATTERN.match(name)):
+        _create_sqlite_indexes(conn, table)
+    created = 0
+    if extra_indexes:
+        for statement in Path(extra_indexes).read_text().split(";"):
+            statement = "\n".join(line for line in statement.splitlines() if not line.strip().startswith("--")).strip()
+            match = CREATE_INDEX_PATTERN.match(statement)
+            if match and match.group(1) in tables:
+                conn.exec_driver_sql(statement)
+                created += 1
+    conn.commit()
+    return created
+
+
+def build_serving_database(
+    output: str,
+    source: Optional[str] = None,
+    parquet_dir: Optional[str] = None,
+    months: Optional[Sequence[str]] = None,
+    zones: Optional[Sequence[int]] = None,
+    extra_indexes: Optional[str] = None,
+    page_size: Optional[int] = None,
+    without_rowid: bool = False,
+    order_by: str = CLUSTER_ORDER_SQL,
+) -> List[Tuple[str, float, float]]:
+    """
+    Build a sliced, indexed and compacted serving database
+
+    Args:
+        output: SQLite file to write (replaced once the build succeeded)
+        source: SQLite database to slice (the ETL's, or a previous build)
+        parquet_dir: Or: directory with the TLC parquet files and taxi_zone_lookup.csv
+        months: Months to keep as YYYY-MM (default: all the source has)
+        zones: Keep trips picked up or dropped off in these zones (default: all)
+        extra_indexes: SQL file with additional CREATE INDEX statements
+        page_size: SQLite page size of the new database (default: SQLite's)
+        without_rowid: Store the month tables as WITHOUT ROWID tables keyed on pickup time
+        order_by: Row order within a month (benchmarks compare layouts with it)
+
+    Returns:
+        (step, seconds, size MB) per step
+    """
+    from app.database.connection import Base
+    from app.pipelines.rollups import build_rollups
+    from app.services.dataset_version import bump_dataset_version
+
+    if bool(source) == bool(parquet_dir):
+        raise ValueError("Pass exactly one of source and parquet_dir")
+    output_path = Path(output).resolve()
+    work = output_path.with_name(f"{output_path.name}.building")
+    scratch = output_path.with_name(f"{output_path.name}.source")
+    _remove(work)
+    steps = []
+
+    def step(name: str, started: float):
+        steps.append((name, time.perf_counter() - started, _size_mb(work)))
+        print(f"{name}: {steps[-1][1]:.1f}s, {steps[-1][2]} MB")
+
+    if parquet_dir:
+        from app.pipelines.etl import MONTHS
+
+        started = time.perf_counter()
+        months = list(months or MONTHS)
+        source = str(parquet_source(parquet_dir, months, zones, scratch))
+        steps.append(("Read parquet", time.perf_counter() - started, _size_mb(scratch)))
+        print(f"Read parquet: {steps[-1][1]:.1f}s, {steps[-1][2]} MB (scratch)")
+
+    # One connection for the whole build, so the ATTACH is visible to every step;
+    # opened with URI filenames so the source can be attached read-only
+    engine = create_engine("sqlite://", poolclass=StaticPool, creator=lambda: sqlite3.connect(
+        f"file:{work}", uri=True, check_same_thread=False
+    ))
+    try:
+        with engine.connect() as conn:
+            started = time.perf_counter()
+            if page_size:
+                conn.exec_driver_sql(f"PRAGMA page_size = {int(page_size)}")
+            # A work file: nothing to recover if the build dies half way
+            conn.exec_driver_sql("PRAGMA journal_mode = OFF")
+            conn.exec_driver_sql("PRAGMA synchronous = OFF")
+            # Schema first: until main has its own trips view, an unqualified
+            # "trips" would resolve to the source's
+            rebuild_trips_view(conn)
+            conn.commit()
+            Base.metadata.create_all(bind=conn)
+            conn.commit()
+            conn.exec_driver_sql("ATTACH DATABASE ? AS src", (f"file:{Path(source).resolve()}?mode=ro",))
+            step("Schema", started)
+
+            started = time.perf_counter()
+            months = list(months or source_months(conn))
+            copied = copy_trips(conn, months, zones, without_rowid, order_by)
+            rebuild_trips_view(conn)
+            conn.commit()
+            step(f"Trips ({copied:,} rows, {len(months)} month(s))", started)
+
+            started = time.perf_counter()
+            if parquet_dir:
+                from app.pipelines.etl import load_taxi_zones
+                load_taxi_zones(parquet_dir, target=conn)
+                conn.commit()
+            else:
+                copy_zones(conn)
+            conn.exec_driver_sql("DETACH DATABASE src")
+            step("Zones", started)
+
+            started = time.perf_counter()
+            extra = create_indexes(conn, extra_indexes)
+            step(f"Indexes (+{extra} extra)" if extra_indexes else "Indexes", started)
+
+            started = time.perf_counter()
+            build_rollups(engine)
+            step("Rollups", started)
+
+            started = time.perf_counter()
+            conn.exec_driver_sql("ANALYZE")
+            conn.commit()
+            bump_dataset_version(engine)
+            step("ANALYZE", started)
+
+            started = time.perf_counter()
+            compacted = output_path.with_name(f"{output_path.name}.tmp")
+            _remove(compacted)
+            conn.exec_driver_sql("VACUUM INTO ?", (str(compacted),))
+        engine.dispose()
+        _remove(output_path)
+        os.replace(compacted, output_path)
+        steps.append(("VACUUM INTO", time.perf_counter() - started, _size_mb(output_path)))
+        print(f"VACUUM INTO: {steps[-1][1]:.1f}s, {steps[-1][2]} MB")
+    finally:
+        engine.dispose()
+        _remove(work)
+        if parquet_dir:
+            _remove(scratch)
+    return steps
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a sliced, indexed and compacted serving database")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--source", help="SQLite database to slice")
+    source.add_argument("--parquet-dir", help="Directory with the TLC parquet files and taxi_zone_lookup.csv")
+    parser.add_argument("--out", required=True, help="SQLite file to write")
+    parser.add_argument("--months", nargs="+", metavar="YYYY-MM", help="Months to keep (default: all)")
+    parser.add_argument("--zones", nargs="+", type=int, metavar="ID",
+                        help="Keep trips picked up or dropped off in these zones (default: all)")
+    parser.add_argument("--extra-indexes", metavar="SQL", help="Additional CREATE INDEX statements")
+    parser.add_argument("--page-size", type=int, help="SQLite page size of the new database")
+    parser.add_argument("--without-rowid", action="store_true",
+                        help="Month tables as WITHOUT ROWID tables clustered on pickup time")
+    parser.add_argument("--publish", action="store_true", help="Serve it through the blue/green pointer")
+    args = parser.parse_args()
+
+    if args.source and Path(args.source).resolve() == Path(args.out).resolve():
+        parser.error("--out must differ from --source")
+    started = time.perf_counter()
+    steps = build_serving_database(args.out, source=args.source, parquet_dir=args.parquet_dir, months=args.months,
+                                   zones=args.zones, extra_indexes=args.extra_indexes, page_size=args.page_size,
+                                   without_rowid=args.without_rowid)
+    print(f"\n{'step':<40} {'seconds':>8} {'size MB':>8}")
+    for name, seconds, size in steps:
+        print(f"{name:<40} {seconds:8.1f} {size:8.1f}")
+    print(f"{'total':<40} {time.perf_counter() - started:8.1f}")
+    if args.source:
+        print(f"Source {args.source}: {_size_mb(Path(args.source))} MB")
+
+    if args.publish:
+        from app.pipelines.bluegreen import as_database_url, check_database, publish
+        check_database(as_database_url(args.out))
+        publish(as_database_url(args.out))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+Synthetic yellow-taxi trip files for load and scale testing
+
+Writes ``yellow_tripdata_YYYY-MM.parquet`` files with the TLC schema
+(VendorID, PULocationID, RatecodeID, ...), so ``load_parquet_to_sql`` and
+every endpoint can be exercised without the real files and at any scale.
+
+Generation is vectorized with NumPy and streamed through a pyarrow
+ParquetWriter one row group (``chunk_rows``) at a time, so memory stays
+flat for 100M+ rows. Every chunk has its own random stream derived from
+(seed, month, chunk), which makes the output deterministic and lets months
+be written by parallel worker processes.
+
+Shape of the data (see SyntheticConfig):
+* pickups: weekday x hour-of-day demand, ``hourly_seasonality`` scales the
+  hourly profile (0 = flat, 1 = TLC-like, 2 = exaggerated peaks)
+* zones: Zipf popularity with exponent ``zone_skew`` (0 = uniform)
+* distance: lognormal; duration from an hour-dependent speed
+* fare: metered from distance and duration plus ``fare_noise`` dollars of
+  noise (smaller = stronger fare/distance correlation); JFK flat fares
+* like the real files: card tips, a few missing passenger/ratecode values,
+  invalid (non-positive) durations and stray pickups from adjacent months
+
+Usage (from backend/):
+    python -m app.pipelines.synthetic --rows 10M --out ../data
+    python -m app.pipelines.synthetic --rows 100M --months 2025-01 2025-02 --zone-skew 1.3 --workers 4
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from app.pipelines.partitions import month_bounds, parse_month
+
+ZONE_IDS = np.arange(1, 264, dtype=np.int32)
+# Relative demand Monday..Sunday and per hour of day (shape of the 2025 TLC files)
+WEEKDAY_WEIGHTS = np.array([0.90, 1.00, 1.05, 1.10, 1.15, 1.05, 0.85])
+HOUR_WEIGHTS = np.array([
+    3.5, 2.2, 1.4, 0.9, 0.7, 0.9, 1.9, 3.3, 4.2, 4.3, 4.5, 4.8,
+    5.1, 5.2, 5.6, 5.8, 6.0, 6.4, 6.6, 6.1, 5.5, 5.3, 5.0, 4.5,
+])
+# Average speed (mph) per hour of day: congestion slows rush hours
+HOUR_SPEEDS = np.array([
+    16, 17, 18, 18, 18, 17, 14, 11, 10, 10, 10, 10,
+    10, 10, 10, 9, 9, 9, 10, 11, 12, 13, 14, 15,
+], dtype=float)
+
+# Column order and types of the 2025 yellow taxi files
+TLC_SCHEMA = pa.schema([
+    ("VendorID", pa.int32()),
+    ("tpep_pickup_datetime", pa.timestamp("us")),
+    ("tpep_dropoff_datetime", pa.timestamp("us")),
+    ("passenger_count", pa.int64()),
+    ("trip_distance", pa.float64()),
+    ("RatecodeID", pa.int64()),
+    ("store_and_fwd_flag", pa.string()),
+    ("PULocationID", pa.int32()),
+    ("DOLocationID", pa.int32()),
+    ("payment_type", pa.int64()),
+    ("fare_amount", pa.float64()),
+    ("extra", pa.float64()),
+    ("mta_tax", pa.float64()),
+    ("tip_amount", pa.float64()),
+    ("tolls_amount", pa.float64()),
+    ("improvement_surcharge", pa.float64()),
+    ("total_amount", pa.float64()),
+    ("congestion_surcharge", pa.float64()),
+    ("Airport_fee", pa.float64()),
+    ("cbd_congestion_fee", pa.float64()),
+])
+
+_STORE_AND_FWD = pa.array(["N", "Y"])
+_USEC_PER_HOUR = 3_600_000_000
+
+
+@dataclass
+class SyntheticConfig:
+    """Knobs of the generated distributions"""
+    zone_skew: float = 1.1
+    hourly_seasonality: float = 1.0
+    weekday_seasonality: float = 1.0
+    fare_noise: float = 1.0
+    invalid_duration_share: float = 0.005
+    missing_share: float = 0.02
+    stray_share: float = 0.001
+
+
+def zone_weights(skew: float) -> np.ndarray:
+    """Pickup probability per zone in ZONE_IDS order (the zone ranking is fixed, whatever the seed)"""
+    ranks = np.random.default_rng(2025).permutation(len(ZONE_IDS)) + 1
+    weights = 1.0 / ranks ** skew
+    return weights / weights.sum()
+
+
+def pickup_hour_weights(month, config: SyntheticConfig) -> np.ndarray:
+    """Probability of each hour of the month (weekday x hour-of-day seasonality)"""
+    start, end = month_bounds(month)
+    weekdays = pd.date_range(start, end, inclusive="left").dayofweek
+    weights = np.outer(WEEKDAY_WEIGHTS[weekdays] ** config.weekday_seasonality,
+                       HOUR_WEIGHTS ** config.hourly_seasonality).ravel()
+    return weights / weights.sum()
+
+
+def generate_chunk(month, rows: int, rng: np.random.Generator, config: SyntheticConfig = None,
+                   zones: Optional[np.ndarray] = None, hours: Optional[np.ndarray] = None) -> pa.Table:
+    """
+    Generate ``rows`` trips of one month as a TLC-schema Arrow table
+
+    Args:
+        month: 'YYYY-MM' or a date inside the month
+        rows: Number of trips
+        rng: Random generator (one per chunk keeps the output deterministic)
+        config: Distribution knobs
+        zones / hours: Precomputed zone_weights / pickup_hour_weights
+
+    Returns:
+        pyarrow Table with TLC_SCHEMA
+    """
+    config = config or SyntheticConfig()
+    zones = zone_weights(config.zone_skew) if zones is None else zones
+    hours = pickup_hour_weights(month, config) if hours is None else hours
+    month_start = np.datetime64(month_bounds(month)[0], "us").astype(np.int64)
+
+    hour_of_month = rng.choice(len(hours), size=rows, p=hours)
+    hour = hour_of_month % 24
+    pickup = month_start + hour_of_month * _USEC_PER_HOUR + rng.integers(0, _USEC_PER_HOUR, size=rows)
+    # TLC files carry a few pickups from the neighbouring months
+    stray = rng.random(rows) < config.stray_share
+    pickup[stray] += rng.choice([-1, 1], size=stray.sum()) * rng.integers(1, 40, size=stray.sum()) * 86400 * 10**6
+
+    distance = np.clip(rng.lognormal(0.6, 0.75, size=rows), 0.1, 60.0)
+    distance[rng.random(rows) < 0.01] = 0.0
+    minutes = distance / (HOUR_SPEEDS[hour] * rng.lognormal(0.0, 0.25, size=rows)) * 60 + rng.gamma(2.0, 1.5, rows)
+    invalid = rng.random(rows) < config.invalid_duration_share
+    minutes[invalid] = -rng.uniform(0, 5, size=invalid.sum())
+    dropoff = pickup + (minutes * 60_000_000).astype(np.int64)
+
+    ratecode = rng.choice(np.array([1, 2, 5]), size=rows, p=[0.97, 0.02, 0.01])
+    fare = 3.0 + 1.75 * distance + 0.35 * np.maximum(minutes, 0) + rng.normal(0, config.fare_noise, rows)
+    fare = np.round(np.where(ratecode == 2, 70.0, np.maximum(fare, 3.0)), 2)
+    extra = np.select([(hour >= 16) & (hour < 20), (hour >= 20) | (hour < 6)], [2.5, 1.0], 0.0)
+    mta_tax = np.full(rows, 0.5)
+    improvement = np.full(rows, 1.0)
+    tolls = np.where(rng.random(rows) < 0.05, 6.94, 0.0)
+    airport_fee = np.where(ratecode == 2, 1.75, 0.0)
+    congestion = np.full(rows, 2.5)
+    cbd_fee = np.where(rng.random(rows) < 0.6, 0.75, 0.0)
+    payment_type = rng.choice(np.array([1, 2, 3, 4]), size=rows, p=[0.75, 0.22, 0.02, 0.01])
+    tip = np.where(payment_type == 1, np.round(fare * rng.uniform(0.1, 0.3, rows), 2), 0.0)
+    total = np.round(fare + extra + mta_tax + tip + tolls + improvement + congestion + airport_fee + cbd_fee, 2)
+
+    # Street-hail records without a meter reading: no passenger count, ratecode or surcharges
+    missing = rng.random(rows) < config.missing_share
+    payment_type[missing] = 0
+
+    return pa.Table.from_arrays([
+        pa.array(rng.choice(np.array([1, 2], dtype=np.int32), size=rows, p=[0.3, 0.7])),
+        pa.array(pickup.astype("datetime64[us]")),
+        pa.array(dropoff.astype("datetime64[us]")),
+        pa.array(rng.choice(np.arange(1, 7), size=rows, p=[0.72, 0.15, 0.05, 0.03, 0.03, 0.02]), mask=missing),
+        pa.array(np.round(distance, 2)),
+        pa.array(ratecode.astype(np.int64), mask=missing),
+        pc.take(_STORE_AND_FWD, pa.array((rng.random(rows) < 0.005).astype(np.int8))),
+        pa.array(rng.choice(ZONE_IDS, size=rows, p=zones)),
+        pa.array(rng.choice(ZONE_IDS, size=rows, p=zones)),
+        pa.array(payment_type.astype(np.int64)),
+        pa.array(fare),
+        pa.array(extra),
+        pa.array(mta_tax),
+        pa.array(tip),
+        pa.array(tolls),
+        pa.array(improvement),
+        pa.array(total),
+        pa.array(congestion, mask=missing),
+        pa.array(airport_fee, mask=missing),
+        pa.array(cbd_fee),
+    ], schema=TLC_SCHEMA)
+
+
+def write_month(path: Path, month: str, rows: int, seed: int = 42, config: SyntheticConfig = None,
+                chunk_rows: int = 1_000_000, compression: str = "zstd") -> Dict[str, float]:
+    """
+    Write one month of synthetic trips to a parquet file, one row group per chunk
+
+    Returns:
+        Rows, bytes and seconds taken
+    """
+    config = config or SyntheticConfig()
+    month_start = parse_month(month)
+    zones = zone_weights(config.zone_skew)
+    hours = pickup_hour_weights(month_start, config)
+    started = time.perf_counter()
+    partial = path.with_name(path.name + ".partial")
+    with pq.ParquetWriter(partial, TLC_SCHEMA, compression=compression) as writer:
+        for chunk, offset in enumerate(range(0, rows, chunk_rows)):
+            rng = np.random.default_rng([seed, month_start.year, month_start.month, chunk])
+            writer.write_table(generate_chunk(month_start, min(chunk_rows, rows - offset), rng, config, zones, hours))
+    os.replace(partial, path)
+    return {"month": month, "rows": rows, "bytes": path.stat().st_size,
+            "seconds": round(time.perf_counter() - started, 1)}
+
+
+def generate(out_dir, rows: int, months: List[str], seed: int = 42, config: SyntheticConfig = None,
+             chunk_rows: int = 1_000_000, compression: str = "zstd", workers: int = 1) -> List[Dict[str, float]]:
+    """
+    Write ``rows`` synthetic trips spread over ``months`` as yellow_tripdata_YYYY-MM.parquet
+
+    Rows are split in proportion to the days in each month. With
+    ``workers`` > 1 months are written by parallel processes.
+
+    Returns:
+        One {month, rows, bytes, seconds} dict per file
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    days = np.array([(pd.Timestamp(end) - pd.Timestamp(start)).days for start, end in map(month_bounds, months)])
+    counts = np.floor(rows * days / days.sum()).astype(int)
+    counts[-1] += rows - counts.sum()
+
+    jobs = [(out_dir / f"yellow_tripdata_{month}.parquet", month, int(count), seed, config, chunk_rows, compression)
+            for month, count in zip(months, counts)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(write_month, *zip(*jobs)))
+    return [write_month(*job) for job in jobs]
+
+
+def parse_rows(value: str) -> int:
+    """Row count with an optional K/M suffix: 1M, 250k, 10000000"""
+    value = value.strip().upper()
+    multiplier = {"K": 1_000, "M": 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip("KM")) * multiplier)
+
+
+def main():
+    from app.pipelines.etl import MONTHS
+
+    defaults = SyntheticConfig()
+    parser = argparse.ArgumentParser(description="Write synthetic yellow taxi parquet files")
+    parser.add_argument("--rows", type=parse_rows, default=parse_rows("10M"), help="Total trips, e.g. 10M or 100M")
+    parser.add_argument("--months", nargs="+", default=MONTHS, metavar="YYYY-MM")
+    parser.add_argument("--out", default="../data", help="Output directory (the ETL's --data-dir)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--zone-skew", type=float, default=defaults.zone_skew, help="Zipf exponent, 0 = uniform")
+    parser.add_argument("--hourly-seasonality", type=float, default=defaults.hourly_seasonality,
+                        help="0 = flat, 1 = TLC-like hourly demand, >1 = sharper peaks")
+    parser.add_argument("--weekday-seasonality", type=float, default=defaults.weekday_seasonality)
+    parser.add_argument("--fare-noise", type=float, default=defaults.fare_noise,
+                        help="Std dev ($) added to metered fares; lower = stronger fare/distance correlation")
+    parser.add_argument("--invalid-duration-share", type=float, default=defaults.invalid_duration_share)
+    parser.add_argument("--chunk-rows", type=parse_rows, default=parse_rows("1M"), help="Rows per row group")
+    parser.add_argument("--compression", default="zstd", choices=["zstd", "snappy", "gzip", "none"])
+    parser.add_argument("--workers", type=int, default=min(os.cpu_count() or 1, 4), help="Parallel month writers")
+    args = parser.parse_args()
+
+    config = SyntheticConfig(
+        zone_skew=args.zone_skew,
+        hourly_seasonality=args.hourly_seasonality,
+        weekday_seasonality=args.weekday_seasonality,
+        fare_noise=args.fare_noise,
+        invalid_duration_share=args.invalid_duration_share,
+    )
+    print(f"Generating {args.rows:,} trips over {', '.join(args.months)} into {args.out} ({asdict(config)})")
+    started = time.perf_counter()
+    files = generate(args.out, args.rows, args.months, args.seed, config, args.chunk_rows, args.compression,
+                     workers=args.workers)
+    for file in files:
+        print(f"  {file['month']}: {file['rows']:>12,} rows {file['bytes'] / 1e6:>9.1f} MB {file['seconds']:>7.1f}s")
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {args.rows:,} rows in {elapsed:.1f}s ({args.rows / elapsed / 1e6:.2f}M rows/s)")
+
+
+if __name__ == "__main__":
+    main()
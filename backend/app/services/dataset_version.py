@@ -0,0 +1,91 @@
+"""
+Dataset version - a counter the ETL bumps whenever trips or rollups change
+
+Response caches key on it, so cached payloads are invalidated by the next
+load instead of by a timer.
+"""
+import threading
+import time
+from sqlalchemy import text
+from app.database.models import DatasetVersion
+
+# Bumped when the app starts serving another database (app.database.serving),
+# so every watcher re-reads the version instead of waiting for its TTL
+_generation = 0
+
+
+def invalidate_dataset_versions():
+    """Make every DatasetVersionWatcher re-read the version on its next call"""
+    global _generation
+    _generation += 1
+
+
+def bump_dataset_version(engine, at_least: int = 0) -> int:
+    """
+    Increment the dataset version after a data change
+
+    Args:
+        engine: SQLAlchemy engine (writer)
+        at_least: Minimum new version; a blue/green build passes one above every
+            version served so far, since it starts from another database's counter
+
+    Returns:
+        The new version
+    """
+    DatasetVersion.__table__.create(bind=engine, checkfirst=True)
+    with engine.begin() as conn:
+        updated = conn.execute(text(
+            "UPDATE dataset_version SET version = CASE WHEN version + 1 > :at_least "
+            "THEN version + 1 ELSE :at_least END, updated_at = CURRENT_TIMESTAMP WHERE id = 1"
+        ), {"at_least": at_least})
+        if updated.rowcount == 0:
+            conn.execute(text(
+                "INSERT INTO dataset_version (id, version, updated_at) VALUES (1, :version, CURRENT_TIMESTAMP)"
+            ), {"version": max(at_least, 1)})
+        return conn.execute(text("SELECT version FROM dataset_version WHERE id = 1")).scalar()
+
+
+def read_dataset_version(engine) -> int:
+    """Read the current dataset version (0 if the ETL never recorded one)"""
+    try:
+        with engine.connect() as conn:
+            return conn.execute(text("SELECT version FROM dataset_version WHERE id = 1")).scalar() or 0
+    except Exception:
+        # Table missing on databases that predate it
+        return 0
+
+
+class DatasetVersionWatcher:
+    """
+    Cached view of the dataset version, re-read at most every ``ttl`` seconds
+
+    Lets per-request code check the version without a query per request.
+    ``engine`` may be a function returning the engine, so the watcher follows
+    blue/green switches (app.database.connection.get_read_engine).
+    """
+
+    def __init__(self, engine, ttl: float = 5.0):
+        self.engine = engine
+        self.ttl = ttl
+        self._version = None
+        self._checked_at = 0.0
+        self._generation = _generation
+        self._lock = threading.Lock()
+
+    def current(self) -> int:
+        """Get the dataset version, refreshing it once the TTL has expired"""
+        if self.is_fresh():
+            return self._version
+        with self._lock:
+            if not self.is_fresh():
+                generation = _generation
+                engine = self.engine() if callable(self.engine) else self.engine
+                self._version = read_dataset_version(engine)
+                self._checked_at = time.monotonic()
+                self._generation = generation
+            return self._version
+
+    def is_fresh(self) -> bool:
+        """Whether ``current()`` would return without querying"""
+        return (self._version is not None and self._generation == _generation
+                and time.monotonic() - self._checked_at < self.ttl)
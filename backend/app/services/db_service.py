@@ -1,9 +1,54 @@
 """
 Database service layer for executing SQL queries
+
+The fetch_* methods return plain Python rows/columns straight from the
+cursor and are the default for endpoints. ``execute_query`` still builds a
+DataFrame for callers that post-process results in pandas.
 """
+import time
+from contextlib import nullcontext
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import repeat
+from math import isfinite
+from operator import itemgetter
+from typing import Any, Dict, List, Optional, Tuple, Union
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 import pandas as pd
+from app.services.metrics import record_query
+from app.services.query_budget import QueryCancelled, QueryTimeout, current_budget, enforce_budget
+from app.services.single_flight import query_flight
+from app.services.slow_queries import slow_query_log
+
+# Column value types that are already JSON-safe as returned by the driver
+_PLAIN_TYPES = {int, str, bool, type(None)}
+
+
+def _normalize_value(value: Any) -> Any:
+    """Make one database value JSON-safe (NaN/inf -> None, Decimal -> float, datetime -> ISO)"""
+    if isinstance(value, float):
+        return value if isfinite(value) else None
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def normalize_column(values: List[Any]) -> List[Any]:
+    """
+    Normalize one column of database values
+    
+    Checks the value types once per column so the common case (ints,
+    strings and finite floats) is returned without touching every value.
+    """
+    kinds = set(map(type, values))
+    if kinds <= _PLAIN_TYPES:
+        return values
+    if kinds <= _PLAIN_TYPES | {float} and all(value is None or isfinite(value) for value in values):
+        return values
+    return [_normalize_value(value) for value in values]
 
 
 class DatabaseService:
@@ -12,6 +57,59 @@ class DatabaseService:
     def __init__(self, db: Session):
         self.db = db
     
+    def _execute_rows(self, query: str, params: dict = None) -> Tuple[List[str], List[tuple]]:
+        """
+        Execute SQL query and return column names and plain DBAPI row tuples
+        
+        Identical concurrent queries (same database, SQL and params) are
+        coalesced into one execution; the shared row list must be treated
+        as read-only. Inside a request the query runs under the request's
+        time budget (see app.services.query_budget); a request waiting on
+        another's execution stops at its own deadline or disconnect, and
+        runs the query itself if the other request's budget stopped it.
+        Executions are timed per fingerprint for the slow-query log
+        (app.services.slow_queries).
+        """
+        params = params or {}
+        budget = current_budget.get()
+        
+        def execute():
+            if budget:
+                budget.check()  # stopped before it ran: nothing to time
+            started = time.perf_counter()
+            try:
+                with enforce_budget(self.db, budget) if budget else nullcontext():
+                    result = self.db.execute(text(query), params)
+                    columns = list(result.keys())
+                    # text() queries have no result processors, so the raw cursor rows are
+                    # identical to SQLAlchemy's and skip building a Row object per row
+                    rows = result.cursor.fetchall()
+                    result.close()
+            except (QueryTimeout, QueryCancelled) as e:
+                # Runaway queries are what the slow-query log is for
+                slow_query_log.observe(self.db.get_bind(), query, params, time.perf_counter() - started, 0,
+                                       outcome="timeout" if isinstance(e, QueryTimeout) else "cancelled")
+                raise
+            elapsed = time.perf_counter() - started
+            if budget:
+                budget.record(elapsed, len(rows))
+            slow_query_log.observe(self.db.get_bind(), query, params, elapsed, len(rows))
+            return columns, rows
+        
+        key = (self.db.get_bind(), query, repr(sorted(params.items())))
+        while True:
+            try:
+                started = time.perf_counter()
+                columns, rows = query_flight.do(key, execute, budget.check if budget else None)
+                record_query(time.perf_counter() - started, len(rows))
+                return list(columns), rows
+            except (QueryTimeout, QueryCancelled):
+                # Raised with this request's own cost if its budget is the one that
+                # stopped; otherwise another request's shorter budget or disconnect
+                # stopped the shared execution, so run it again
+                if budget is not None:
+                    budget.check()
+    
     def execute_query(self, query: str, params: dict = None) -> pd.DataFrame:
         """
         Execute SQL query and return results as pandas DataFrame
@@ -23,16 +121,75 @@ class DatabaseService:
         Returns:
             pandas DataFrame with query results
         """
-        result = self.db.execute(text(query), params or {})
-        columns = result.keys()
-        rows = result.fetchall()
+        columns, rows = self._execute_rows(query, params)
         
         return pd.DataFrame(rows, columns=columns)
     
+    def fetch_columns(self, query: str, params: dict = None, normalize: bool = True) -> Dict[str, List[Any]]:
+        """
+        Execute SQL query and return one list of values per column
+        
+        Built straight from the cursor rows (no DataFrame), for the
+        ``format=columns`` response mode.
+        
+        Args:
+            query: SQL query string
+            params: Query parameters
+            normalize: Make values JSON-safe; Arrow encoding keeps the
+                driver's native types (timestamps, decimals) instead
+            
+        Returns:
+            Dict of column name -> values, in SELECT order
+        """
+        columns, rows = self._execute_rows(query, params)
+        values = [list(map(itemgetter(i), rows)) for i in range(len(columns))]
+        if normalize:
+            values = [normalize_column(column) for column in values]
+        return dict(zip(columns, values))
+    
+    def fetch_rows(self, query: str, params: dict = None) -> Tuple[List[str], List[tuple]]:
+        """
+        Execute SQL query and return column names and row tuples
+        
+        Args:
+            query: SQL query string
+            params: Query parameters
+            
+        Returns:
+            (columns, rows) with JSON-safe values
+        """
+        columns, rows = self._execute_rows(query, params)
+        values = [list(map(itemgetter(i), rows)) for i in range(len(columns))]
+        normalized = [normalize_column(column) for column in values]
+        if all(after is before for after, before in zip(normalized, values)):
+            # Nothing needed fixing: keep the driver's tuples
+            return columns, rows
+        return columns, list(zip(*normalized))
+    
+    def fetch_records(self, query: str, params: dict = None) -> List[Dict[str, Any]]:
+        """Execute SQL query and return one dict per row (JSON-safe values)"""
+        columns, rows = self.fetch_rows(query, params)
+        return list(map(dict, map(zip, repeat(columns), rows)))
+    
+    def fetch_one(self, query: str, params: dict = None) -> Optional[Dict[str, Any]]:
+        """Execute SQL query and return its first row as a dict, or None"""
+        columns, rows = self._execute_rows(query, params)
+        if not rows:
+            return None
+        return {column: _normalize_value(value) for column, value in zip(columns, rows[0])}
+    
+    def fetch_data(self, query: str, params: dict = None, result_format: str = "records") -> Union[List[dict], Dict[str, list]]:
+        """Execute SQL query and return records or columns, per the response format"""
+        if result_format in ("arrow", "parquet"):
+            return self.fetch_columns(query, params, normalize=False)
+        if result_format == "columns":
+            return self.fetch_columns(query, params)
+        return self.fetch_records(query, params)
+    
     def execute_scalar(self, query: str, params: dict = None):
         """Execute query and return scalar value"""
-        result = self.db.execute(text(query), params or {})
-        return result.scalar()
+        _, rows = self._execute_rows(query, params)
+        return rows[0][0] if rows else None
     
     def refresh_materialized_view(self, view_name: str):
         """Refresh a materialized view"""
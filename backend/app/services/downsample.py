@@ -0,0 +1,96 @@
+"""
+Server-side time series downsampling (LTTB and min/max decimation)
+"""
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: pick ``n_out`` points that keep the shape
+
+    The first and last points are always kept. Every other bucket keeps the
+    point forming the largest triangle with the previously kept point and the
+    average of the next bucket.
+
+    Args:
+        x: Sorted x values (e.g. epoch seconds)
+        y: Values to preserve
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted indices of the kept points
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.nan_to_num(np.asarray(y, dtype=float))
+    # Bucket boundaries over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+
+    kept = np.empty(n_out, dtype=int)
+    kept[0] = 0
+    kept[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last bucket looks at the final point)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+        else:
+            next_start, next_end = n - 1, n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        area = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(area.argmax())
+        kept[i + 1] = a
+
+    return kept
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max decimation: keep the extremes of ``n_out // 2`` equal buckets
+
+    Args:
+        y: Values to preserve
+        n_out: Upper bound on the number of points to keep
+
+    Returns:
+        Sorted, de-duplicated indices of the kept points
+    """
+    n = len(y)
+    if n_out >= n or n_out < 2:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=float)
+    filled_low = np.where(np.isnan(y), np.inf, y)
+    filled_high = np.where(np.isnan(y), -np.inf, y)
+    edges = np.linspace(0, n, n_out // 2 + 1).astype(int)
+    starts = edges[:-1]
+
+    lows = np.minimum.reduceat(filled_low, starts)
+    highs = np.maximum.reduceat(filled_high, starts)
+    kept = []
+    for start, end, low, high in zip(starts, edges[1:], lows, highs):
+        bucket = slice(start, end)
+        kept.append(start + int(np.argmax(filled_low[bucket] == low)))
+        kept.append(start + int(np.argmax(filled_high[bucket] == high)))
+
+    return np.unique(kept)
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, n_out: int, method: str = "lttb") -> np.ndarray:
+    """Get the indices to keep when downsampling a series to ``n_out`` points"""
+    if method == "lttb":
+        return lttb_indices(x, y, n_out)
+    if method == "minmax":
+        return minmax_indices(y, n_out)
+    raise ValueError(f"Unknown downsampling method: {method}")
@@ -0,0 +1,220 @@
+"""
+Duration histogram helpers - log-spaced duration bins and NumPy summaries
+
+The ETL rolls trips up into ``duration_histogram`` (pickup date x hour x
+distance bin x duration bin). Each cell keeps the trip count plus the exact
+sum, sum of squares, min and max of the durations that fell into it, so:
+
+* mean, std and CV are exact (derived from the summed moments)
+* min and max are exact
+* quantiles are interpolated inside one log-spaced bin, so the error is
+  bounded by the bin width (see ``approximation_notes``); quantiles that
+  fall into the underflow or overflow bin are only bounded by the group's
+  exact min and max
+"""
+from typing import Dict, Any, Sequence
+import numpy as np
+import pandas as pd
+from app.services.sql_compat import is_sqlite
+
+# Log-spaced duration bin edges in minutes (30 seconds .. 12 hours).
+# Bin 0 is the underflow bin [0, 0.5), bins 1..64 sit between consecutive
+# edges and bin 65 is the overflow bin [720, inf).
+DURATION_EDGES = np.geomspace(0.5, 720.0, 65)
+DURATION_BIN_COUNT = len(DURATION_EDGES) + 1
+BIN_RATIO = float(DURATION_EDGES[1] / DURATION_EDGES[0])
+
+_LOWER_EDGES = np.concatenate([[0.0], DURATION_EDGES])
+_UPPER_EDGES = np.concatenate([DURATION_EDGES, [np.inf]])
+
+# Distance bins used by the variability heatmap; trips without a positive
+# distance land in 'none' so the distribution/trend views still see them
+DISTANCE_BINS = ["0-2", "2-5", "5-10", "10+"]
+NO_DISTANCE_BIN = "none"
+
+
+def distance_bin_sql(column: str = "trip_distance") -> str:
+    """Get SQL mapping a trip distance onto its distance bin label"""
+    return f"""CASE
+                WHEN {column} IS NULL OR {column} <= 0 THEN '{NO_DISTANCE_BIN}'
+                WHEN {column} < 2 THEN '0-2'
+                WHEN {column} < 5 THEN '2-5'
+                WHEN {column} < 10 THEN '5-10'
+                ELSE '10+'
+            END"""
+
+
+def duration_bin_sql(column: str) -> str:
+    """Get SQL mapping a duration in minutes onto its histogram bin number"""
+    if is_sqlite():
+        # SQLite has no WIDTH_BUCKET (and LN is optional), so unroll the edges
+        whens = "\n".join(
+            f"                WHEN {column} < {float(edge)!r} THEN {i}"
+            for i, edge in enumerate(DURATION_EDGES)
+        )
+        return f"CASE\n{whens}\n                ELSE {len(DURATION_EDGES)}\n            END"
+    edges = ", ".join(repr(float(edge)) for edge in DURATION_EDGES)
+    return f"WIDTH_BUCKET({column}, ARRAY[{edges}]::FLOAT8[])"
+
+
+def moment_summary(
+    trip_count: np.ndarray,
+    duration_sum: np.ndarray,
+    duration_sq_sum: np.ndarray
+) -> Dict[str, np.ndarray]:
+    """
+    Derive mean, sample std and coefficient of variation from summed moments
+
+    Args:
+        trip_count: Number of trips per group
+        duration_sum: Sum of durations per group
+        duration_sq_sum: Sum of squared durations per group
+
+    Returns:
+        Dict of mean_duration, std_duration and coefficient_of_variation arrays
+    """
+    n = np.asarray(trip_count, dtype=float)
+    total = np.asarray(duration_sum, dtype=float)
+    total_sq = np.asarray(duration_sq_sum, dtype=float)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / n
+        # Sample variance (n - 1) to match Postgres STDDEV
+        variance = np.clip(total_sq - n * mean * mean, 0.0, None) / (n - 1)
+        std = np.where(n > 1, np.sqrt(variance), np.nan)
+        cv = np.where(mean > 0, std / mean, np.nan)
+
+    return {
+        "mean_duration": mean,
+        "std_duration": std,
+        "coefficient_of_variation": cv,
+    }
+
+
+def histogram_quantiles(
+    counts: np.ndarray,
+    minimum: np.ndarray,
+    maximum: np.ndarray,
+    quantiles: Sequence[float] = (0.25, 0.5, 0.75)
+) -> np.ndarray:
+    """
+    Interpolate quantiles from per-group duration bin counts
+
+    Inside a bin the durations are assumed to be log-uniform, and the bin
+    edges are tightened to the group's exact min/max so the underflow and
+    overflow bins stay bounded.
+
+    Args:
+        counts: (groups x DURATION_BIN_COUNT) array of trip counts
+        minimum: Exact minimum duration per group
+        maximum: Exact maximum duration per group
+        quantiles: Quantiles to compute, in [0, 1]
+
+    Returns:
+        (groups x len(quantiles)) array of durations in minutes
+    """
+    counts = np.asarray(counts, dtype=float)
+    rows = np.arange(counts.shape[0])
+    cumulative = counts.cumsum(axis=1)
+    n = cumulative[:, -1]
+
+    result = np.full((counts.shape[0], len(quantiles)), np.nan)
+    for j, q in enumerate(quantiles):
+        target = q * n
+        # First bin whose cumulative count reaches the target rank
+        bin_index = np.minimum((cumulative < target[:, None]).sum(axis=1), counts.shape[1] - 1)
+        in_bin = counts[rows, bin_index]
+        before = cumulative[rows, bin_index] - in_bin
+
+        lower = np.maximum(_LOWER_EDGES[bin_index], minimum)
+        upper = np.minimum(_UPPER_EDGES[bin_index], maximum)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            fraction = np.clip(np.where(in_bin > 0, (target - before) / in_bin, 0.0), 0.0, 1.0)
+            log_interp = lower * np.power(upper / lower, fraction)
+            linear_interp = lower + (upper - lower) * fraction
+        result[:, j] = np.where(lower > 0, log_interp, linear_interp)
+
+    result[n == 0] = np.nan
+    return result
+
+
+def summarize_bins(frame: pd.DataFrame, keys: Sequence[str]) -> pd.DataFrame:
+    """
+    Collapse (keys..., duration_bin) histogram rows into one row per key
+
+    Args:
+        frame: Rows with ``keys``, duration_bin, trip_count, duration_sum,
+            duration_sq_sum, duration_min and duration_max columns
+        keys: Grouping columns
+
+    Returns:
+        DataFrame with keys, trip_count, min/p25/median/p75/max, mean, std and CV
+    """
+    columns = list(keys) + [
+        "trip_count", "min_duration", "p25_duration", "median_duration",
+        "p75_duration", "max_duration", "mean_duration", "std_duration",
+        "coefficient_of_variation",
+    ]
+    if frame.empty:
+        return pd.DataFrame(columns=columns)
+
+    grouped = frame.groupby(list(keys), sort=True)
+    group_index = grouped.ngroup().to_numpy()
+    n_groups = grouped.ngroups
+    out = grouped.size().reset_index()[list(keys)]
+
+    counts = np.zeros((n_groups, DURATION_BIN_COUNT))
+    np.add.at(counts, (group_index, frame["duration_bin"].to_numpy(dtype=int)),
+              frame["trip_count"].to_numpy(dtype=float))
+
+    def _sum(column):
+        return np.bincount(group_index, weights=frame[column].to_numpy(dtype=float),
+                           minlength=n_groups)
+
+    minimum = np.full(n_groups, np.inf)
+    np.minimum.at(minimum, group_index, frame["duration_min"].to_numpy(dtype=float))
+    maximum = np.full(n_groups, -np.inf)
+    np.maximum.at(maximum, group_index, frame["duration_max"].to_numpy(dtype=float))
+
+    trip_count = counts.sum(axis=1)
+    quantile_values = histogram_quantiles(counts, minimum, maximum)
+
+    out["trip_count"] = trip_count.astype(int)
+    out["min_duration"] = minimum
+    out["p25_duration"] = quantile_values[:, 0]
+    out["median_duration"] = quantile_values[:, 1]
+    out["p75_duration"] = quantile_values[:, 2]
+    out["max_duration"] = maximum
+    for name, values in moment_summary(trip_count, _sum("duration_sum"), _sum("duration_sq_sum")).items():
+        out[name] = values
+
+    return out[columns]
+
+
+def summarize_moments(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add mean, std and CV columns to rows of summed histogram moments"""
+    out = frame.drop(columns=["duration_sum", "duration_sq_sum"])
+    stats = moment_summary(frame["trip_count"], frame["duration_sum"], frame["duration_sq_sum"])
+    for name, values in stats.items():
+        out[name] = values
+    return out
+
+
+def approximation_notes() -> Dict[str, Any]:
+    """Describe the error bounds of histogram-derived statistics"""
+    return {
+        "source": "duration_histogram rollup built by the ETL (no trip rescans)",
+        "duration_bins": f"{len(DURATION_EDGES) - 1} log-spaced bins from "
+                         f"{DURATION_EDGES[0]:g} to {DURATION_EDGES[-1]:g} minutes "
+                         "plus underflow/overflow bins",
+        "exact": "trip_count, mean, std, coefficient_of_variation, min, max",
+        "approximate": "p25, median, p75 (log-linear interpolation within a bin)",
+        # Holds for quantiles between the first and last edge only
+        "max_quantile_relative_error": round(BIN_RATIO - 1, 4),
+        "quantile_error_range_minutes": [float(DURATION_EDGES[0]), float(DURATION_EDGES[-1])],
+        "outside_error_range": f"quantiles under {DURATION_EDGES[0]:g} minutes (underflow bin) lie "
+                               f"between the exact min and {DURATION_EDGES[0]:g}, so the absolute "
+                               f"error is under {DURATION_EDGES[0]:g} minutes; quantiles over "
+                               f"{DURATION_EDGES[-1]:g} minutes (overflow bin) lie between "
+                               f"{DURATION_EDGES[-1]:g} and the exact max",
+    }
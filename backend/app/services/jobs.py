@@ -0,0 +1,267 @@
+"""
+Background jobs - run analytics endpoints outside the HTTP request
+
+A job is a GET of any analytics endpoint with its query params, run
+in-process through the full ASGI app (validation, dependencies, response
+cache) by a local worker pool with a concurrency cap. The caller polls the
+job instead of holding a connection open past the proxy timeout.
+
+Jobs are persisted under JOBS_DIR as ``{id}.json`` (metadata) and
+``{id}.body`` (the endpoint's response). The id is derived from the
+endpoint, its params and the dataset version, so submitting the same
+analysis again reuses the stored result until the next ETL load.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+import anyio.to_thread
+from app.services.query_budget import QueryBudget
+
+JOBS_DIR = Path(os.getenv("JOBS_DIR", "./jobs"))
+JOBS_CONCURRENCY = int(os.getenv("JOBS_CONCURRENCY", "2"))
+JOBS_MAX_QUEUED = int(os.getenv("JOBS_MAX_QUEUED", "100"))
+JOBS_RETENTION_DAYS = float(os.getenv("JOBS_RETENTION_DAYS", "7"))
+# Query time budget of a job (the request budgets are far shorter)
+JOB_TIMEOUT_SECONDS = float(os.getenv("JOB_TIMEOUT_SECONDS", "1800"))
+
+ACTIVE_STATUSES = ("queued", "running")
+
+# Identifies this process in job metadata, to detect jobs orphaned by a restart
+INSTANCE = f"{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are already queued or running"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def job_id(path: str, query: str, dataset_version: int) -> str:
+    """Stable job id: identical analyses on the same data share an id (and result)"""
+    return hashlib.sha256(f"{dataset_version}\n{path}\n{query}".encode()).hexdigest()[:24]
+
+
+def _owner_alive(instance: Optional[str]) -> bool:
+    """Whether the process that owns an active job may still be running it"""
+    if not instance:
+        return False
+    pid = int(instance.split(":")[0])
+    if pid == os.getpid():
+        # Same pid but another instance id: this process was restarted
+        return instance == INSTANCE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class JobStore:
+    """Job metadata and results on disk"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+
+    def metadata_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.json"
+
+    def result_path(self, job_id: str) -> Path:
+        return self.directory / f"{job_id}.body"
+
+    def _write(self, path: Path, data: bytes):
+        # Write-then-rename so pollers never read a partial file
+        self.directory.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        partial.write_bytes(data)
+        os.replace(partial, path)
+
+    def load(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self.metadata_path(job_id).read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def save(self, job: Dict[str, Any]):
+        self._write(self.metadata_path(job["id"]), json.dumps(job, indent=2).encode())
+
+    def save_result(self, job_id: str, body: bytes):
+        self._write(self.result_path(job_id), body)
+
+    def prune(self, max_age_days: float) -> int:
+        """Delete finished jobs older than ``max_age_days``; returns the number removed"""
+        if not self.directory.exists():
+            return 0
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for path in self.directory.glob("*.json"):
+            job = self.load(path.stem)
+            if path.stat().st_mtime >= cutoff or (job and job["status"] in ACTIVE_STATUSES):
+                continue
+            path.unlink(missing_ok=True)
+            self.result_path(path.stem).unlink(missing_ok=True)
+            removed += 1
+        return removed
+
+
+class JobManager:
+    """
+    Local worker pool running at most ``concurrency`` jobs at a time
+
+    Jobs run as tasks on the server's event loop; the endpoints themselves
+    still execute on the threadpool, so the cap bounds database load.
+    """
+
+    def __init__(self, store: JobStore, concurrency: int = JOBS_CONCURRENCY, max_queued: int = JOBS_MAX_QUEUED,
+                 timeout: float = JOB_TIMEOUT_SECONDS):
+        self.store = store
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(concurrency)
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._budgets: Dict[str, QueryBudget] = {}
+        self._tasks = set()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Current job state, with live progress for jobs running in this process"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            job = dict(job)
+            budget = self._budgets.get(job_id)
+            if budget is not None:
+                job["progress"] = budget.cost()
+            return job
+
+        job = self.store.load(job_id)
+        if job and job["status"] in ACTIVE_STATUSES and not _owner_alive(job.get("instance")):
+            job.update(status="failed", error="Interrupted by a server restart", finished_at=_now())
+            self.store.save(job)
+        return job
+
+    def active_counts(self) -> Dict[str, int]:
+        """Number of jobs per active status in this process"""
+        counts = dict.fromkeys(ACTIVE_STATUSES, 0)
+        for job in self._jobs.values():
+            counts[job["status"]] += 1
+        return counts
+
+    async def submit(self, app, path: str, params: Dict[str, Any], dataset_version: int) -> Tuple[Dict[str, Any], bool]:
+        """
+        Enqueue a GET of ``path`` with ``params``, unless it is already queued or done
+
+        Returns:
+            (job, created) - ``created`` is False when an existing job or result is reused
+
+        Raises:
+            JobQueueFull: if ``max_queued`` jobs are already queued or running
+        """
+        query = urlencode(sorted(params.items()), doseq=True)
+        identifier = job_id(path, query, dataset_version)
+        existing = self.get(identifier)
+        if existing and (existing["status"] in ACTIVE_STATUSES or
+                         (existing["status"] == "succeeded" and self.store.result_path(identifier).exists())):
+            return existing, False
+
+        if len(self._jobs) >= self.max_queued:
+            raise JobQueueFull(f"{len(self._jobs)} jobs are already queued or running")
+
+        job = {
+            "id": identifier,
+            "endpoint": path,
+            "params": params,
+            "dataset_version": dataset_version,
+            "status": "queued",
+            "created_at": _now(),
+            "started_at": None,
+            "finished_at": None,
+            "status_code": None,
+            "content_type": None,
+            "result_bytes": None,
+            "error": None,
+            "progress": None,
+            "instance": INSTANCE,
+        }
+        self._jobs[identifier] = job
+        self.store.save(job)
+        task = asyncio.create_task(self._run(app, job, query))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return dict(job), True
+
+    async def _run(self, app, job: Dict[str, Any], query: str):
+        async with self._slots:
+            budget = QueryBudget(self.timeout)
+            self._budgets[job["id"]] = budget
+            job.update(status="running", started_at=_now())
+            await anyio.to_thread.run_sync(self.store.save, dict(job))
+            try:
+                status, content_type, body = await _call_endpoint(app, job["endpoint"], query, budget)
+                job.update(status_code=status, content_type=content_type)
+                if 200 <= status < 300:
+                    await anyio.to_thread.run_sync(self.store.save_result, job["id"], body)
+                    job.update(status="succeeded", result_bytes=len(body))
+                else:
+                    job.update(status="failed", error=body[:2000].decode("utf-8", "replace"))
+            except Exception as e:
+                print(f"Job {job['id']} failed: {type(e).__name__}: {e}")
+                job.update(status="failed", error=f"{type(e).__name__}: {e}")
+            finally:
+                job.update(finished_at=_now(), progress=budget.cost())
+                await anyio.to_thread.run_sync(self.store.save, dict(job))
+                del self._jobs[job["id"]]
+                del self._budgets[job["id"]]
+
+
+async def _call_endpoint(app, path: str, query: str, budget: QueryBudget) -> Tuple[int, Optional[str], bytes]:
+    """Run a GET through the ASGI app in-process and capture the response"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"jobs"), (b"accept", b"*/*")],
+        "client": ("127.0.0.1", 0),
+        "server": ("jobs", 80),
+        "extensions": {"query_budget": budget},
+    }
+    request_sent = False
+    status, content_type, chunks = 500, None, []
+
+    async def receive():
+        nonlocal request_sent
+        if request_sent:
+            # Nobody disconnects from a job; wait until the app stops listening
+            await asyncio.Event().wait()
+        request_sent = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status, content_type
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            headers = dict(message.get("headers", []))
+            content_type = headers.get(b"content-type", b"").decode("latin-1") or None
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, content_type, b"".join(chunks)
+
+
+# Shared by the jobs router
+job_manager = JobManager(JobStore(JOBS_DIR))
@@ -0,0 +1,191 @@
+"""
+In-process metrics in the Prometheus text exposition format
+
+A deliberately small registry (counters and fixed-bucket histograms keyed
+by label values) so instrumentation costs a few microseconds per request
+and needs no client library or external service. ``render`` produces the
+body of ``GET /metrics``.
+
+Per-request DB and serialization time is accumulated on a RequestMetrics
+object held in a context variable, so DatabaseService and the response
+classes can record into it from threadpool workers.
+"""
+import math
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Seconds; dense below 100ms where most cached/rollup endpoints land
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [
+        f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34)).replace(chr(10), " ")}"'
+        for name, value in zip(names, values)
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter per label set"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in sorted(items):
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram per label set (cumulative buckets rendered at scrape time)"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(counts), total) for labels, (counts, total) in self._series.items()]
+        for labels, counts, total in sorted(items):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                bucket = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, labels, bucket)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, labels)} {cumulative}")
+        return lines
+
+
+class Gauges:
+    """Gauges computed at scrape time from a callback returning (labels, value) pairs"""
+
+    def __init__(self, name: str, help_text: str, labels: Sequence[str], collect: Callable[[], Iterable[Tuple[tuple, float]]]):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._collect = collect
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for labels, value in self._collect():
+            lines.append(f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    """Ordered collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                # One failing gauge callback must not break the scrape
+                lines.append(f"# {metric.name} unavailable: {type(e).__name__}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """
+    Per-request accumulators filled in by DatabaseService and the response classes
+
+    Locked because bundle panels of one request record from several threads.
+    """
+    __slots__ = ("db_seconds", "rows", "queries", "serialize_seconds", "lock")
+
+    def __init__(self):
+        self.db_seconds = 0.0
+        self.rows = 0
+        self.queries = 0
+        self.serialize_seconds = 0.0
+        self.lock = threading.Lock()
+
+
+current_request_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("current_request_metrics", default=None)
+
+
+def record_query(seconds: float, rows: int):
+    """Add one query's wall time (including any single-flight wait) and row count"""
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        with metrics.lock:
+            metrics.db_seconds += seconds
+            metrics.rows += rows
+            metrics.queries += 1
+
+
+def record_serialization(seconds: float):
+    """Add time spent encoding the response body (JSON, Arrow, Parquet)"""
+    metrics = current_request_metrics.get()
+    if metrics is not None:
+        with metrics.lock:
+            metrics.serialize_seconds += seconds
+
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "HTTP requests by route, method and status code", ("route", "method", "status")
+))
+http_duration = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency from first byte in to last byte out", ("route", "method")
+))
+db_duration = registry.register(Histogram(
+    "http_request_db_seconds", "Time a request spent executing (or waiting on) database queries", ("route",)
+))
+serialize_duration = registry.register(Histogram(
+    "http_request_serialization_seconds", "Time a request spent encoding its response body", ("route",)
+))
+rows_returned = registry.register(Histogram(
+    "http_request_db_rows", "Database rows fetched per request", ("route",), buckets=ROW_BUCKETS
+))
@@ -0,0 +1,130 @@
+"""
+Wall-clock sampling profiler for single requests
+
+cProfile only sees the thread it was enabled on, while a request's work
+is spread over the event loop, the request threadpool and the bundle
+executor. This profiler instead samples the stacks of every busy thread
+in the process (``sys._current_frames``) every PROFILE_INTERVAL_MS until
+stopped. Threads parked in a queue, lock or selector are skipped, so on a
+quiet instance the samples are the profiled request's. Concurrent
+requests show up too, under their own thread names.
+
+Output formats:
+* speedscope JSON (https://www.speedscope.app, one profile per thread)
+* collapsed stacks (``thread;frame;frame microseconds``) for flamegraph.pl / inferno
+"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "1"))
+
+# (file name, function) of the frame a thread is parked in when idle
+_IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+Frame = Tuple[str, str, int]
+
+
+def _frame_key(frame) -> Frame:
+    code = frame.f_code
+    # co_qualname (Class.method) is Python 3.11+
+    return getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (os.path.basename(code.co_filename), code.co_name) in _IDLE_FRAMES
+
+
+class SamplingProfiler:
+    """
+    Samples all busy threads' stacks on a background thread
+
+    Usage:
+        with SamplingProfiler() as profiler:
+            ...
+        profiler.speedscope("GET /api/v1/overview")
+
+    Args:
+        interval: Seconds between samples (the GIL may stretch it under CPU-bound work)
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL_MS / 1000):
+        self.interval = interval
+        # (thread name, stack root -> leaf) -> seconds sampled
+        self.samples: Dict[Tuple[str, Tuple[Frame, ...]], float] = defaultdict(float)
+        self.sample_count = 0
+        self.duration = 0.0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self):
+        own = threading.get_ident()
+        started = previous = time.perf_counter()
+        while not self._stopped.wait(self.interval):
+            now = time.perf_counter()
+            # Each sample stands for the wall time since the previous one
+            weight, previous = now - previous, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or _is_idle(frame):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_key(frame))
+                    frame = frame.f_back
+                self.samples[(names.get(ident, str(ident)), tuple(reversed(stack)))] += weight
+            self.sample_count += 1
+        self.duration = time.perf_counter() - started
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one ``thread;frame;...;frame microseconds`` line per stack"""
+        lines = []
+        for (thread, stack), seconds in sorted(self.samples.items()):
+            frames = ";".join(f"{name} ({os.path.basename(path)}:{line})" for name, path, line in stack)
+            lines.append(f"{thread};{frames} {round(seconds * 1e6)}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self, name: str) -> dict:
+        """Speedscope file format: one sampled profile per thread, weights in milliseconds"""
+        frame_index: Dict[Frame, int] = {}
+        frames: List[dict] = []
+        profiles: Dict[str, dict] = {}
+        for (thread, stack), seconds in sorted(self.samples.items()):
+            indices = []
+            for frame in stack:
+                if frame not in frame_index:
+                    frame_index[frame] = len(frames)
+                    frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+                indices.append(frame_index[frame])
+            profile = profiles.setdefault(thread, {
+                "type": "sampled", "name": thread, "unit": "milliseconds",
+                "startValue": 0, "endValue": 0, "samples": [], "weights": [],
+            })
+            profile["samples"].append(indices)
+            profile["weights"].append(seconds * 1000)
+            profile["endValue"] += seconds * 1000
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "nyc-taxi-api request profiler",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": sorted(profiles.values(), key=lambda profile: -profile["endValue"]),
+        }
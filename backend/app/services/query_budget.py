@@ -0,0 +1,181 @@
+"""
+Per-request query time budgets and cancellation
+
+Each API request gets a QueryBudget (set by app.middleware.query_budget)
+that DatabaseService enforces on every query it runs:
+
+* SQLite: a progress handler interrupts the running statement once the
+  deadline passes or the request is cancelled
+* PostgreSQL: ``statement_timeout`` is set to the remaining budget for the
+  transaction, and a cancelled request cancels the backend query
+
+A query stopped by the deadline raises QueryTimeout (served as a structured
+503 with the cost already spent); one stopped because the client
+disconnected raises QueryCancelled. Code running outside a request (ETL,
+scripts) has no budget and is never interrupted.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+# Budget for endpoints not listed in ENDPOINT_BUDGETS
+DEFAULT_BUDGET_SECONDS = float(os.getenv("QUERY_TIMEOUT_SECONDS", "30"))
+
+# Per-endpoint budgets in seconds, matched by path prefix (longest wins)
+ENDPOINT_BUDGETS: Dict[str, float] = {
+    "/api/v1/overview": 10,
+    "/api/v1/simulation/sensitivity": 60,  # one full-period scan per threshold
+    "/api/v1/bundle/": 60,  # shared by all panels of the page
+}
+
+# SQLite VM instructions between deadline checks (a few microseconds of work)
+PROGRESS_INTERVAL = 10000
+
+# PostgreSQL SQLSTATE for a statement cancelled by timeout or cancel request
+PG_QUERY_CANCELED = "57014"
+
+
+def budget_for_path(path: str) -> float:
+    """Get the query time budget (seconds) for a request path"""
+    matches = [prefix for prefix in ENDPOINT_BUDGETS if path.startswith(prefix)]
+    if not matches:
+        return DEFAULT_BUDGET_SECONDS
+    return ENDPOINT_BUDGETS[max(matches, key=len)]
+
+
+class QueryBudget:
+    """Deadline, cancellation flag and cost accounting for one request's queries"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.started = time.monotonic()
+        self.deadline = self.started + seconds
+        self.queries = 0
+        self.rows = 0
+        self.db_seconds = 0.0
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._cancel_callbacks: List[Callable[[], Any]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def remaining(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def should_stop(self) -> bool:
+        """True once the deadline has passed or the request was cancelled"""
+        return self._cancelled.is_set() or time.monotonic() >= self.deadline
+
+    def check(self):
+        """Raise QueryCancelled / QueryTimeout, with this request's cost, once it should stop"""
+        if self.should_stop():
+            raise _stopped(self)
+
+    def cancel(self):
+        """Cancel the request's queries (client disconnected)"""
+        self._cancelled.set()
+        with self._lock:
+            callbacks = list(self._cancel_callbacks)
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Warning: Error cancelling query: {e}")
+
+    @contextmanager
+    def on_cancel(self, callback: Callable[[], Any]):
+        """Register ``callback`` to run if the request is cancelled while the block runs"""
+        with self._lock:
+            self._cancel_callbacks.append(callback)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._cancel_callbacks.remove(callback)
+
+    def record(self, seconds: float, rows: int):
+        with self._lock:
+            self.queries += 1
+            self.rows += rows
+            self.db_seconds += seconds
+
+    def cost(self) -> Dict[str, Any]:
+        """Cost spent so far, reported in timeout responses"""
+        return {
+            "budget_ms": round(self.seconds * 1000),
+            "elapsed_ms": round((time.monotonic() - self.started) * 1000, 1),
+            "db_ms": round(self.db_seconds * 1000, 1),
+            "queries_completed": self.queries,
+            "rows_fetched": self.rows,
+        }
+
+
+class QueryTimeout(Exception):
+    """A query exceeded the request's time budget"""
+
+    def __init__(self, budget: QueryBudget):
+        self.cost = budget.cost()
+        super().__init__(f"Query exceeded the {budget.seconds:g}s time budget")
+
+
+class QueryCancelled(Exception):
+    """A query was cancelled because the client disconnected"""
+
+    def __init__(self, budget: QueryBudget):
+        self.cost = budget.cost()
+        super().__init__("Query cancelled: client disconnected")
+
+
+# Budget of the request being served (copied into threadpool workers)
+current_budget: ContextVar[Optional[QueryBudget]] = ContextVar("current_budget", default=None)
+
+
+def _stopped(budget: QueryBudget) -> Exception:
+    return QueryCancelled(budget) if budget.cancelled else QueryTimeout(budget)
+
+
+@contextmanager
+def enforce_budget(db: Session, budget: QueryBudget):
+    """
+    Run the enclosed query under the budget's deadline and cancellation
+
+    Raises:
+        QueryTimeout / QueryCancelled if the query was stopped by the budget
+    """
+    if budget.should_stop():
+        raise _stopped(budget)
+
+    connection = db.connection()
+    dbapi_conn = connection.connection.dbapi_connection
+    if connection.dialect.name == "sqlite":
+        # Non-zero return aborts the statement with "interrupted"
+        dbapi_conn.set_progress_handler(budget.should_stop, PROGRESS_INTERVAL)
+        cleanup = lambda: dbapi_conn.set_progress_handler(None, 0)
+        cancel = lambda: None  # the progress handler sees the flag
+    else:
+        timeout_ms = max(int(budget.remaining() * 1000), 1)
+        connection.execute(text("SELECT set_config('statement_timeout', :timeout, true)"), {"timeout": str(timeout_ms)})
+        cleanup = lambda: None
+        cancel = dbapi_conn.cancel
+
+    try:
+        try:
+            with budget.on_cancel(cancel):
+                yield
+        finally:
+            # Before any rollback hands the connection back to the pool
+            cleanup()
+    except DBAPIError as e:
+        interrupted = "interrupted" in str(e.orig) or getattr(e.orig, "pgcode", None) == PG_QUERY_CANCELED
+        if not interrupted or not budget.should_stop():
+            raise
+        db.rollback()
+        raise _stopped(budget) from e
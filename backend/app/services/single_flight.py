@@ -0,0 +1,113 @@
+"""
+Single-flight execution of identical concurrent queries
+
+When several requests run the same SQL with the same parameters at the
+same time (dashboard loads, several tabs), only the first one executes it;
+the others wait for that execution and share its result. Nothing is
+cached: once the call finishes, the next identical request runs again.
+
+Waiters keep their own limits: a ``check`` callable is polled while they
+wait, and whatever it raises (e.g. the waiter's own request timing out or
+its client disconnecting) abandons the wait without touching the shared call.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional
+
+# How often a waiter runs its check while the shared call is in flight
+WAIT_POLL_SECONDS = 0.05
+
+
+class _Call:
+    """One in-flight execution and the requests waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Thread-based request coalescing keyed by an arbitrary hashable key"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = {
+            "executions": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "abandoned": 0,
+            "max_waiters": 0,
+            "wait_seconds": 0.0,
+        }
+
+    def do(self, key: Hashable, fn: Callable[[], Any], check: Optional[Callable[[], None]] = None) -> Any:
+        """
+        Run ``fn`` unless an identical call is already in flight
+
+        Args:
+            key: Identity of the call (e.g. database, SQL and params)
+            fn: Zero-argument callable producing the result
+            check: Called every WAIT_POLL_SECONDS while waiting on another
+                caller's execution; an exception it raises stops the wait
+
+        Returns:
+            The result of ``fn``, possibly shared with concurrent callers;
+            an exception raised by ``fn`` is re-raised in every caller
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+                self.stats["executions"] += 1
+            else:
+                leader = False
+                call.waiters += 1
+                self.stats["coalesced"] += 1
+                self.stats["max_waiters"] = max(self.stats["max_waiters"], call.waiters)
+
+        if not leader:
+            started = time.perf_counter()
+            try:
+                while not call.done.wait(WAIT_POLL_SECONDS if check else None):
+                    check()
+            except BaseException:
+                with self._lock:
+                    self.stats["abandoned"] += 1
+                raise
+            finally:
+                with self._lock:
+                    self.stats["wait_seconds"] += time.perf_counter() - started
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self.stats["errors"] += 1
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Counters plus the number of calls currently in flight"""
+        with self._lock:
+            requests = self.stats["executions"] + self.stats["coalesced"]
+            return {
+                **self.stats,
+                "in_flight": len(self._calls),
+                "coalesced_ratio": self.stats["coalesced"] / requests if requests else 0.0,
+            }
+
+
+# Shared by every DatabaseService instance in the process
+query_flight = SingleFlight()
@@ -0,0 +1,269 @@
+"""
+Slow-query log
+
+DatabaseService reports every executed query here. Per SQL fingerprint
+(the query text with literals replaced by ``?`` and whitespace collapsed)
+the recent durations are kept for p50/p95/p99 (``GET /api/v1/admin/slow-queries``).
+Queries slower than SLOW_QUERY_MS are written as JSON lines to a rotating
+log file with their params, duration, row count and execution plan:
+
+* SQLite: ``EXPLAIN QUERY PLAN``
+* PostgreSQL: ``EXPLAIN (ANALYZE, BUFFERS)`` (plain ``EXPLAIN`` with
+  SLOW_QUERY_EXPLAIN_ANALYZE=false, since ANALYZE runs the query again)
+
+Plans are captured on a background thread, at most once per fingerprint
+every SLOW_QUERY_EXPLAIN_INTERVAL seconds, so a burst of slow requests
+does not multiply the database load.
+
+Queries stopped by a request's time budget are recorded too, with the time
+they ran and ``outcome`` set to ``timeout`` or ``cancelled``; timeouts are
+always logged, whatever their duration. Their plans are plain ``EXPLAIN``,
+since ANALYZE would run the runaway query again.
+"""
+import json
+import logging
+import math
+import os
+import re
+import textwrap
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import lru_cache
+from hashlib import sha1
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from sqlalchemy import text
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "500"))
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "./logs/slow_queries.log")
+SLOW_QUERY_LOG_MB = float(os.getenv("SLOW_QUERY_LOG_MB", "10"))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+SLOW_QUERY_EXPLAIN_INTERVAL = float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL", "300"))
+SLOW_QUERY_EXPLAIN_ANALYZE = os.getenv("SLOW_QUERY_EXPLAIN_ANALYZE", "true").lower() == "true"
+# Statement timeout for EXPLAIN ANALYZE on PostgreSQL
+EXPLAIN_TIMEOUT_SECONDS = float(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT", "30"))
+
+# Durations kept per fingerprint for the percentiles
+SAMPLES_PER_FINGERPRINT = 1000
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w:.])\d+(?:\.\d+)?(?![\w.])")
+_SPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=2048)
+def normalize_sql(query: str) -> str:
+    """Query text with comments removed, literals replaced by ? and whitespace collapsed"""
+    normalized = _COMMENT.sub(" ", query)
+    normalized = _STRING.sub("?", normalized)
+    normalized = _NUMBER.sub("?", normalized)
+    return _SPACE.sub(" ", normalized).strip()
+
+
+@lru_cache(maxsize=2048)
+def fingerprint(query: str) -> str:
+    """Stable short id of a query's shape (bind params and literals ignored)"""
+    return sha1(normalize_sql(query).encode()).hexdigest()[:16]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile of sorted ``values``"""
+    return values[max(0, math.ceil(q * len(values)) - 1)]
+
+
+def explain(engine, query: str, params: Dict[str, Any], analyze: bool = SLOW_QUERY_EXPLAIN_ANALYZE) -> List[str]:
+    """
+    Execution plan of a query, one line per plan node
+
+    Args:
+        engine: Engine to run EXPLAIN on (a fresh connection, not the request's)
+        query: SQL with bind params
+        params: Bind params
+        analyze: PostgreSQL only - run EXPLAIN (ANALYZE, BUFFERS), which executes the query
+
+    Returns:
+        Plan lines; SQLite's plan tree is indented by depth
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.execute(text(f"EXPLAIN QUERY PLAN {query}"), params).fetchall()
+            depth = {0: -1}
+            lines = []
+            for node_id, parent, _, detail in rows:
+                depth[node_id] = depth.get(parent, -1) + 1
+                lines.append("  " * depth[node_id] + detail)
+            return lines
+
+        if analyze:
+            conn.execute(text("SELECT set_config('statement_timeout', :timeout, true)"),
+                         {"timeout": f"{int(EXPLAIN_TIMEOUT_SECONDS * 1000)}ms"})
+            statement = f"EXPLAIN (ANALYZE, BUFFERS) {query}"
+        else:
+            statement = f"EXPLAIN {query}"
+        try:
+            return [row[0] for row in conn.execute(text(statement), params)]
+        finally:
+            conn.rollback()
+
+
+class FingerprintStats:
+    """Recent durations and slow-query details of one query shape"""
+    __slots__ = ("sql", "durations", "calls", "slow_calls", "timeouts", "cancelled", "rows", "last_slow_at", "plan",
+                 "explained_at")
+
+    def __init__(self, sql: str):
+        self.sql = sql
+        self.durations = deque(maxlen=SAMPLES_PER_FINGERPRINT)
+        self.calls = 0
+        self.slow_calls = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.rows = 0
+        self.last_slow_at: Optional[str] = None
+        self.plan: Optional[List[str]] = None
+        self.explained_at = -math.inf
+
+
+class SlowQueryLog:
+    """
+    Per-fingerprint query timings plus a rotating log of slow queries
+
+    Args:
+        threshold_ms: Queries at least this slow are logged with their plan
+        path: Log file (JSON lines); rotated at ``max_bytes`` keeping ``backups`` files
+        explain_interval: Minimum seconds between plans captured for one fingerprint
+    """
+
+    def __init__(self, threshold_ms: float = SLOW_QUERY_MS, path: str = SLOW_QUERY_LOG,
+                 max_bytes: int = int(SLOW_QUERY_LOG_MB * 1024 * 1024), backups: int = SLOW_QUERY_LOG_BACKUPS,
+                 explain_interval: float = SLOW_QUERY_EXPLAIN_INTERVAL):
+        self.threshold = threshold_ms / 1000
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.explain_interval = explain_interval
+        self._stats: Dict[str, FingerprintStats] = {}
+        self._lock = threading.Lock()
+        self._logger: Optional[logging.Logger] = None
+        # One thread: plans and log writes stay off the request path and serialized
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-log")
+
+    def observe(self, engine, query: str, params: Dict[str, Any], seconds: float, rows: int, outcome: str = "ok"):
+        """
+        Record one executed query; slow ones are logged (with a plan) in the background
+
+        Args:
+            outcome: ``ok``, or ``timeout`` / ``cancelled`` for a query stopped
+                by its request's budget after running ``seconds``
+        """
+        key = fingerprint(query)
+        slow = seconds >= self.threshold or outcome == "timeout"
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = FingerprintStats(normalize_sql(query))
+            stats.durations.append(seconds)
+            stats.calls += 1
+            stats.rows += rows
+            if outcome == "timeout":
+                stats.timeouts += 1
+            elif outcome == "cancelled":
+                stats.cancelled += 1
+            if not slow:
+                return
+            stats.slow_calls += 1
+            stats.last_slow_at = at = datetime.now(timezone.utc).isoformat(timespec="seconds")
+            now = time.monotonic()
+            capture_plan = now - stats.explained_at >= self.explain_interval
+            if capture_plan:
+                stats.explained_at = now
+
+        entry = {
+            "at": at,
+            "fingerprint": key,
+            "database": engine.dialect.name,
+            "duration_ms": round(seconds * 1000, 1),
+            "outcome": outcome,
+            "rows": rows,
+            "params": dict(params),
+            # Line breaks kept: the routers' SQL has -- comments
+            "sql": textwrap.dedent(query).strip(),
+        }
+        self._writer.submit(self._write, engine, query, entry["params"], entry, capture_plan)
+
+    def _write(self, engine, query: str, params: Dict[str, Any], entry: Dict[str, Any], capture_plan: bool):
+        if capture_plan:
+            try:
+                analyze = SLOW_QUERY_EXPLAIN_ANALYZE and entry["outcome"] == "ok"
+                entry["plan"] = explain(engine, query, params, analyze=analyze)
+            except Exception as e:
+                entry["plan_error"] = f"{type(e).__name__}: {e}"
+            with self._lock:
+                stats = self._stats.get(entry["fingerprint"])
+                if stats is not None and "plan" in entry:
+                    stats.plan = entry["plan"]
+        try:
+            self._get_logger().info(json.dumps(entry, default=str))
+        except OSError as e:
+            print(f"Slow query log unavailable ({e}); slow query {entry['fingerprint']} took {entry['duration_ms']}ms")
+
+    def _get_logger(self) -> logging.Logger:
+        # Opened on the first slow query, so fast deployments never create the file
+        if self._logger is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            logger = logging.getLogger(f"slow_queries.{id(self)}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            handler = RotatingFileHandler(self.path, maxBytes=self.max_bytes, backupCount=self.backups)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            self._logger = logger
+        return self._logger
+
+    def top(self, limit: int = 20, sort: str = "p95") -> List[Dict[str, Any]]:
+        """
+        Slowest query fingerprints
+
+        Args:
+            limit: Number of fingerprints to return
+            sort: p50, p95, p99, max or total (time spent over the kept samples)
+
+        Returns:
+            One dict per fingerprint with percentiles in ms, slowest first
+        """
+        with self._lock:
+            snapshot = [
+                (key, stats.sql, sorted(stats.durations), stats.calls, stats.slow_calls, stats.timeouts,
+                 stats.cancelled, stats.rows, stats.last_slow_at, stats.plan)
+                for key, stats in self._stats.items()
+            ]
+        results = []
+        for key, sql, durations, calls, slow_calls, timeouts, cancelled, rows, last_slow_at, plan in snapshot:
+            results.append({
+                "fingerprint": key,
+                "sql": sql,
+                "calls": calls,
+                "slow_calls": slow_calls,
+                "timeouts": timeouts,
+                "cancelled": cancelled,
+                "p50_ms": round(_percentile(durations, 0.50) * 1000, 1),
+                "p95_ms": round(_percentile(durations, 0.95) * 1000, 1),
+                "p99_ms": round(_percentile(durations, 0.99) * 1000, 1),
+                "max_ms": round(durations[-1] * 1000, 1),
+                "total_ms": round(sum(durations) * 1000, 1),
+                "avg_rows": round(rows / calls, 1),
+                "last_slow_at": last_slow_at,
+                "plan": plan,
+            })
+        results.sort(key=lambda result: result[f"{sort}_ms"], reverse=True)
+        return results[:limit]
+
+
+# Shared by every DatabaseService instance in the process
+slow_query_log = SlowQueryLog()
@@ -24,6 +24,32 @@ def date_trunc_hour(column: str):
     return f"DATE_TRUNC('hour', {column})"
 
 
+def date_trunc(column: str, unit: str, start: str = None):
+    """
+    Get SQL for truncating to an hour, day or (Monday-based) week
+
+    Args:
+        column: Timestamp column
+        unit: 'hour', 'day' or 'week'
+        start: SQL for the range start (e.g. ':range_start'); the first week
+            bucket is labelled with it instead of the Monday before it
+    """
+    if unit == "hour":
+        return date_trunc_hour(column)
+    if unit not in ("day", "week"):
+        raise ValueError(f"Unsupported date_trunc unit: {unit}")
+    if is_sqlite():
+        if unit == "day":
+            return f"datetime(date({column}))"
+        # Step back 6 days, then forward to the next Monday (Postgres weeks start on Monday)
+        bucket = f"datetime(date({column}, '-6 days', 'weekday 1'))"
+        return f"MAX({bucket}, datetime({start}))" if start else bucket
+    bucket = f"DATE_TRUNC('{unit}', {column})"
+    if unit == "week" and start:
+        return f"GREATEST({bucket}, CAST({start} AS TIMESTAMP))"
+    return bucket
+
+
 def extract_hour(column: str):
     """Get SQL for extracting hour"""
     if is_sqlite():
@@ -1,12 +1,13 @@
 -- Calculate demand (pickups) and supply (dropoffs) by zone and hour
+-- Params: :range_start (inclusive) and :range_end (exclusive) pickup dates
 WITH demand AS (
     SELECT 
         pulocationid AS zone_id,
         DATE_TRUNC('hour', tpep_pickup_datetime) AS hour,
         COUNT(*) AS demand
     FROM trips
-    WHERE tpep_pickup_datetime >= '2025-01-01'
-        AND tpep_pickup_datetime < '2025-05-01'
+    WHERE tpep_pickup_datetime >= :range_start
+        AND tpep_pickup_datetime < :range_end
     GROUP BY pulocationid, DATE_TRUNC('hour', tpep_pickup_datetime)
 ),
 supply AS (
@@ -15,8 +16,8 @@ supply AS (
         DATE_TRUNC('hour', tpep_dropoff_datetime) AS hour,
         COUNT(*) AS supply
     FROM trips
-    WHERE tpep_dropoff_datetime >= '2025-01-01'
-        AND tpep_dropoff_datetime < '2025-05-01'
+    WHERE tpep_dropoff_datetime >= :range_start
+        AND tpep_dropoff_datetime < :range_end
     GROUP BY dolocationid, DATE_TRUNC('hour', tpep_dropoff_datetime)
 )
 SELECT 
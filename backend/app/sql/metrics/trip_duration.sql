@@ -1,4 +1,5 @@
 -- Calculate trip duration in minutes
+-- Params: :range_start (inclusive) and :range_end (exclusive) pickup dates
 SELECT 
     id,
     tpep_pickup_datetime,
@@ -6,6 +7,6 @@ SELECT
     EXTRACT(EPOCH FROM (tpep_dropoff_datetime - tpep_pickup_datetime)) / 60 AS trip_duration_minutes
 FROM trips
 WHERE tpep_dropoff_datetime > tpep_pickup_datetime
-    AND tpep_pickup_datetime >= '2025-01-01'
-    AND tpep_pickup_datetime < '2025-05-01';
+    AND tpep_pickup_datetime >= :range_start
+    AND tpep_pickup_datetime < :range_end;
 
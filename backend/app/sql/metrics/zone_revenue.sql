@@ -1,4 +1,5 @@
 -- Calculate revenue metrics by pickup zone
+-- Params: :range_start (inclusive) and :range_end (exclusive) pickup dates
 SELECT 
     pulocationid AS zone_id,
     COUNT(*) AS trip_count,
@@ -9,8 +10,8 @@ SELECT
     AVG(trip_distance) AS avg_distance,
     AVG(EXTRACT(EPOCH FROM (tpep_dropoff_datetime - tpep_pickup_datetime)) / 60) AS avg_duration_minutes
 FROM trips
-WHERE tpep_pickup_datetime >= '2025-01-01'
-    AND tpep_pickup_datetime < '2025-05-01'
+WHERE tpep_pickup_datetime >= :range_start
+    AND tpep_pickup_datetime < :range_end
     AND tpep_dropoff_datetime > tpep_pickup_datetime
 GROUP BY pulocationid
 ORDER BY total_revenue DESC;
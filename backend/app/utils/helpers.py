@@ -1,16 +1,41 @@
 """
 Helper utility functions
 """
-from typing import Any, Dict
+from typing import Any, Dict, List, Union
 import json
+import numpy as np
+import pandas as pd
+from fastapi.responses import Response
+from app.utils.arrow import arrow_response
+from app.utils.responses import FastJSONResponse
 
+# Formats encoded through Arrow instead of JSON
+BINARY_FORMATS = ("arrow", "parquet")
 
-def format_response(data: Any, assumptions: Dict[str, Any] = None) -> Dict[str, Any]:
-    """Format API response with data and assumptions"""
-    return {
+
+def format_response(data: Any, assumptions: Dict[str, Any] = None, result_format: str = "records") -> Response:
+    """
+    Format API response with data and assumptions
+    
+    In ``columns`` format ``data`` is a dict of column -> values and the
+    column order is repeated under ``columns``. ``arrow``/``parquet``
+    return a binary Response (see app.utils.arrow).
+    
+    JSON is returned as a ready FastJSONResponse so large payloads skip
+    FastAPI's response validation and jsonable_encoder.
+    """
+    if result_format in BINARY_FORMATS:
+        return arrow_response(data, assumptions, result_format)
+    if result_format == "columns":
+        return FastJSONResponse({
+            "columns": list(data),
+            "data": data,
+            "assumptions": assumptions or {}
+        })
+    return FastJSONResponse({
         "data": data,
         "assumptions": assumptions or {}
-    }
+    })
 
 
 def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> float:
@@ -19,3 +44,23 @@ def safe_divide(numerator: float, denominator: float, default: float = 0.0) -> f
         return default
     return numerator / denominator
 
+
+
+def dataframe_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """Convert a DataFrame to records (FastJSONResponse encodes NaN/inf as null)"""
+    return df.to_dict('records')
+
+
+def dataframe_columns(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """Convert a DataFrame to column arrays, serialized natively by FastJSONResponse"""
+    return {column: df[column].to_numpy() for column in df.columns}
+
+
+def dataframe_data(df: pd.DataFrame, result_format: str = "records") -> Union[pd.DataFrame, List[Dict[str, Any]], Dict[str, np.ndarray]]:
+    """Convert a DataFrame to records or columns, per the response format"""
+    if result_format in BINARY_FORMATS:
+        # Arrow wraps the NumPy columns directly
+        return df
+    if result_format == "columns":
+        return dataframe_columns(df)
+    return dataframe_records(df)
@@ -0,0 +1,58 @@
+"""
+Fast JSON responses
+
+``FastJSONResponse`` encodes with orjson instead of FastAPI's
+jsonable_encoder + stdlib json. It is the app-wide default response class
+(see app.main), and tabular endpoints return it directly from
+format_response so large record lists skip jsonable_encoder entirely.
+
+Encoding rules:
+* NaN / inf (Python or NumPy floats) -> null
+* NumPy arrays and scalars are serialized natively
+* Decimal -> float, datetime/date/pandas Timestamp -> ISO 8601, NaT/NA -> null
+"""
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any
+import numpy as np
+import orjson
+import pandas as pd
+from fastapi.responses import JSONResponse
+from app.services.metrics import record_serialization
+
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value: Any) -> Any:
+    """Encode the types orjson does not handle natively"""
+    if isinstance(value, Decimal):
+        return float(value) if value.is_finite() else None
+    if value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, (datetime, date)):
+        # pandas Timestamp and other datetime subclasses
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        # Object / string arrays orjson cannot serialize natively
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Encode content to JSON bytes with the app's encoding rules"""
+    return orjson.dumps(content, default=_default, option=ORJSON_OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response encoded with orjson (NaN -> null, NumPy, Decimal, datetime)"""
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = dumps(content)
+        record_serialization(time.perf_counter() - started)
+        return body
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the analytics API (run from backend/, e.g. ``python -m benchmarks.response_formats``)
+"""
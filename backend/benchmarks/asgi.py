@@ -0,0 +1,80 @@
+"""
+Minimal in-process ASGI client for benchmarks
+
+Calls the FastAPI app directly (no sockets, no extra HTTP client
+dependency), so timings cover routing, queries and serialization only.
+"""
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+class Response:
+    """Response captured from one ASGI request"""
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes, elapsed_ms: float):
+        self.status = status
+        self.headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in headers}
+        self.body = body
+        self.elapsed_ms = elapsed_ms
+
+
+async def request(app, url: str, method: str = "GET", headers: Optional[Dict[str, str]] = None,
+                  body: bytes = b"") -> Response:
+    """
+    Send one request to an ASGI app
+
+    Args:
+        app: ASGI application
+        url: Path with optional query string, e.g. ``/api/v1/overview?format=columns``
+        method: HTTP method
+        headers: Request headers
+        body: Request body
+
+    Returns:
+        Captured Response with wall-clock time in milliseconds
+    """
+    parts = urlsplit(url)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": parts.path,
+        "raw_path": parts.path.encode(),
+        "query_string": parts.query.encode(),
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    received = False
+    status, response_headers, chunks = 0, [], []
+
+    async def receive():
+        nonlocal received
+        if received:
+            # Block like a real server until the app stops listening
+            await asyncio.sleep(3600)
+        received = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = message.get("headers", [])
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return Response(status, response_headers, b"".join(chunks), elapsed_ms)
+
+
+def get(app, url: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Synchronous wrapper around ``request`` for simple benchmark loops"""
+    return asyncio.run(request(app, url, headers=headers))
@@ -0,0 +1,84 @@
+"""
+Microbenchmark: per-request overhead of the DatabaseService fetch paths
+
+Compares the old DataFrame path (execute_query + to_dict('records')) with
+the cursor-based fetch_records / fetch_columns on 1k, 10k and 100k rows.
+Overhead is the time on top of SQLAlchemy's ``fetchall()`` of the same
+query; the fetch_* paths read the DBAPI tuples directly, so they can come
+in below it (negative overhead).
+
+Usage (from backend/; uses a temporary in-memory SQLite database):
+    python -m benchmarks.db_fetch
+    python -m benchmarks.db_fetch --rows 1000 50000 --repeat 20
+"""
+import argparse
+import statistics
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from app.services.db_service import DatabaseService
+
+# Same shape as the zone x hour endpoints: ints, floats and a timestamp string
+QUERY = "SELECT zone_id, hour, trip_count, total_revenue, avg_duration_minutes, efficiency FROM results LIMIT :n"
+
+
+def build_database(rows: int) -> Session:
+    """Create an in-memory SQLite database holding ``rows`` result rows"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "zone_id": rng.integers(1, 265, rows),
+        "hour": pd.date_range("2025-01-01", periods=rows, freq="h").strftime("%Y-%m-%d %H:%M:%S"),
+        "trip_count": rng.integers(10, 5000, rows),
+        "total_revenue": rng.random(rows) * 1e5,
+        "avg_duration_minutes": rng.random(rows) * 40,
+        # A few NULLs, as produced by NULLIF(...) in the real queries
+        "efficiency": np.where(rng.random(rows) < 0.01, None, rng.random(rows) * 80),
+    }).to_sql("results", engine, index=False)
+    return Session(engine)
+
+
+def time_call(fn, repeat: int) -> float:
+    """Median wall time of ``fn`` in milliseconds"""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark DatabaseService fetch paths")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000], help="Result sizes")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per path")
+    args = parser.parse_args()
+
+    paths = {
+        "dataframe+to_dict": lambda service, params: service.execute_query(QUERY, params).to_dict('records'),
+        "fetch_records": lambda service, params: service.fetch_records(QUERY, params),
+        "fetch_columns": lambda service, params: service.fetch_columns(QUERY, params),
+        "dataframe.iloc[0]": lambda service, params: service.execute_query(QUERY, {"n": 1}).iloc[0],
+        "fetch_one": lambda service, params: service.fetch_one(QUERY, {"n": 1}),
+    }
+
+    print(f"{'rows':>8} {'path':20} {'total':>10} {'overhead':>10}")
+    for rows in args.rows:
+        session = build_database(rows)
+        service = DatabaseService(session)
+        params = {"n": rows}
+        baseline = time_call(lambda: session.execute(text(QUERY), params).fetchall(), args.repeat)
+        print(f"{rows:>8,} {'fetchall (baseline)':20} {baseline:>8.2f}ms {'':>10}")
+        for name, path in paths.items():
+            total = time_call(lambda: path(service, params), args.repeat)
+            overhead = total - (baseline if "iloc" not in name and "one" not in name else 0)
+            print(f"{rows:>8,} {name:20} {total:>8.2f}ms {overhead:>8.2f}ms")
+        session.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,530 @@
+"""
+Index advisor: covering and partial indexes for the SQL the routers run
+
+The hand-written index set (models.Trip, PARTITION_INDEXES, the
+create_indexes*.sh scripts) finds the pickup window but covers none of the
+fare/total/distance columns the aggregates read, so SQLite still visits a
+table row per trip. This tool works out what would cover them:
+
+1. copies the SQLite database to a scratch file (the original is never written)
+2. requests every GET endpoint and dashboard bundle in-process against the
+   copy, recording each SQL statement the routers execute and timing the
+   endpoints (as benchmarks.endpoints does, response cache off)
+3. runs ``EXPLAIN QUERY PLAN`` on every statement; for statements that read
+   a table without a covering index it proposes one per SELECT: the columns
+   compared with parameters first (equality, then the range column), then
+   every other column the SELECT reads, and as a partial index ``WHERE``
+   the parameter-free filters such as
+   ``tpep_dropoff_datetime > tpep_pickup_datetime``. Proposals with the same
+   key and filter are merged into one index
+4. builds the proposals on the copy (on every month table behind the
+   ``trips`` view), runs ANALYZE, explains and times everything again
+
+Through the SQLite ``trips`` view every month table returns all of its
+columns, so no index can cover a query on the view itself. Each statement
+is therefore also explained and timed with the view replaced by a UNION
+ALL of only the columns it reads ("narrow"), which shows what the indexes
+are worth once queries read the month tables that way.
+
+The report lists per-endpoint p50 before/after, per-statement timings
+(before, after, narrow), and per proposed index its size, build time and
+the statements whose plan uses it. Indexes that no plan picks up are
+reported as unused and left out of the generated SQL.
+
+Usage (from backend/):
+    python -m benchmarks.index_advisor                           # DATABASE_URL's SQLite file
+    python -m benchmarks.index_advisor --database benchmarks/data/trips_1000000_seed42.db --repeat 10
+    python -m benchmarks.index_advisor --keep-scratch            # keep the indexed copy for inspection
+
+Results go to benchmarks/results/index_advisor.json and the recommended
+``CREATE INDEX`` statements to benchmarks/results/index_advisor.sql. SQLite
+only; the copy needs as much free disk as the database plus its indexes.
+"""
+import argparse
+import json
+import os
+import re
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.engine import make_url
+from app.pipelines.partitions import PARTITION_PATTERN
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_COMMENT = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_SUBQUERY_START = re.compile(r"\s*(?:SELECT|WITH)\b", re.I)
+_UNION = re.compile(r"\bUNION(?:\s+ALL)?\b|\bINTERSECT\b|\bEXCEPT\b", re.I)
+_TABLE_REF = re.compile(r"\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_WHERE = re.compile(r"\bWHERE\b", re.I)
+_CLAUSE_END = re.compile(r"\b(?:GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|WINDOW)\b", re.I)
+_AND = re.compile(r"\s+AND\s+", re.I)
+_PARAM_EQUALITY = re.compile(r"^(\w+)\s*(?:==?|IN)\s*\(?\s*\?", re.I)
+_PARAM_RANGE = re.compile(r"^(\w+)\s*(?:>=|<=|>|<)\s*\?$")
+_FILTER = re.compile(r"^(\w+)\s*(?:>=|<=|<>|!=|==?|>|<)\s*(\w+|-?\d+(?:\.\d+)?)$|^(\w+)\s+IS\s+NOT\s+NULL$", re.I)
+_TRIPS_REF = re.compile(r"\b(FROM|JOIN)\s+trips\b(?:\s+(?:AS\s+)?(\w+))?", re.I)
+_PLAN_ACCESS = re.compile(r"^(SCAN|SEARCH) (\w+)(?: USING (COVERING )?INDEX (\w+))?")
+# Not aliases: keywords that may follow a table name
+_KEYWORDS = {"where", "join", "left", "right", "inner", "outer", "cross", "on", "group", "order", "limit",
+             "union", "having", "natural", "using", "as", "window"}
+
+
+@dataclass
+class Proposal:
+    """A proposed index on one queryable table (the SQLite trips view means every month table)"""
+    table: str
+    keys: Tuple[str, ...]
+    where: str
+    columns: List[str] = field(default_factory=list)
+    statements: List[int] = field(default_factory=list)
+
+    def ddl(self, physical_table: str, name: str) -> str:
+        where = f" WHERE {self.where}" if self.where else ""
+        return f"CREATE INDEX IF NOT EXISTS {name} ON {physical_table} ({', '.join(self.columns)}){where}"
+
+
+def select_blocks(sql: str) -> List[str]:
+    """
+    Split a statement into its SELECTs
+
+    Each CTE body, subquery and UNION arm becomes one block, with nested
+    subqueries blanked out so their columns and filters are not attributed
+    to the enclosing SELECT.
+    """
+    sql = _COMMENT.sub(lambda match: " " * len(match.group()), sql)
+    stack, groups = [], []
+    for position, char in enumerate(sql):
+        if char == "(":
+            stack.append(position)
+        elif char == ")" and stack:
+            groups.append((stack.pop() + 1, position))
+    subqueries = [(start, end) for start, end in groups if _SUBQUERY_START.match(sql, start)]
+
+    blocks = []
+    for start, end in [(0, len(sql))] + subqueries:
+        chars = list(sql[start:end])
+        for inner_start, inner_end in subqueries:
+            if start < inner_start and inner_end < end or start == 0 and (inner_start, inner_end) != (start, end):
+                chars[inner_start - start:inner_end - start] = " " * (inner_end - inner_start)
+        blocks.extend(part for part in _UNION.split("".join(chars)) if re.search(r"\bSELECT\b", part, re.I))
+    return blocks
+
+
+def where_terms(block: str) -> List[str]:
+    """AND-ed terms of a block's WHERE clause"""
+    match = _WHERE.search(block)
+    if match is None:
+        return []
+    clause = block[match.end():]
+    end = _CLAUSE_END.search(clause)
+    clause = clause[:end.start()] if end else clause
+    return [" ".join(term.split()) for term in _AND.split(clause.strip()) if term.strip()]
+
+
+def propose(block: str, table: str, alias: Optional[str], columns: List[str]) -> Optional[Proposal]:
+    """Covering (and possibly partial) index serving one SELECT's reads of ``table``"""
+    qualifiers = {table.lower()} | ({alias.lower()} if alias else set())
+    # Unqualified names count too; other tables' columns rarely share trip column names
+    referenced = {name.lower() for qualifier, name in re.findall(r"\b(?:(\w+)\.)?(\w+)\b", block)
+                  if not qualifier or qualifier.lower() in qualifiers}
+    used = [column for column in columns if column.lower() in referenced]
+
+    equality, ranges, filters = [], [], []
+    for term in where_terms(block):
+        # Terms on other tables of a join are not this index's business
+        if any(qualifier.lower() not in qualifiers for qualifier in re.findall(r"\b(\w+)\.\w+", term)):
+            continue
+        term = re.sub(r"\b\w+\.(\w+)\b", r"\1", term)
+        if (match := _PARAM_EQUALITY.match(term)) and match.group(1) in columns:
+            equality.append(match.group(1))
+        elif (match := _PARAM_RANGE.match(term)) and match.group(1) in columns:
+            ranges.append(match.group(1))
+        elif (match := _FILTER.match(term)):
+            identifiers = [value for value in match.groups() if value and not re.match(r"-?\d", value)]
+            if all(identifier in columns for identifier in identifiers):
+                filters.append(term)
+    keys = tuple(dict.fromkeys(equality + ranges[:1]))
+    if not used or not keys:
+        return None
+    return Proposal(table, keys, " AND ".join(sorted(filters)),
+                    list(keys) + [column for column in used if column not in keys])
+
+
+def plan(conn, sql: str, params) -> List[str]:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def uncovered_tables(plan_lines: List[str], tables: Dict[str, str]) -> List[str]:
+    """Queryable tables read without a covering index (full scans or index + row lookups)"""
+    uncovered = []
+    for line in plan_lines:
+        match = _PLAN_ACCESS.match(line)
+        if match is None or match.group(2) not in tables or match.group(3):
+            continue
+        if "INTEGER PRIMARY KEY" in line:
+            continue
+        uncovered.append(tables[match.group(2)])
+    return list(dict.fromkeys(uncovered))
+
+
+def used_indexes(plan_lines: List[str]) -> List[str]:
+    return [match.group(4) for match in map(_PLAN_ACCESS.match, plan_lines) if match and match.group(4)]
+
+
+def schema(conn) -> Tuple[Dict[str, List[str]], Dict[str, str], Dict[str, List[str]]]:
+    """
+    Queryable tables of the database
+
+    Returns:
+        (queryable table -> physical tables, physical table -> queryable table,
+        queryable table -> indexable columns); on the partitioned layout
+        ``trips`` stands for every ``trips_YYYY_MM`` table
+    """
+    physical = [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite_%'")]
+    families = {name: [name] for name in physical if not PARTITION_PATTERN.match(name)}
+    partitions = [name for name in physical if PARTITION_PATTERN.match(name)]
+    if partitions:
+        families["trips"] = partitions
+    owners = {table: family for family, tables in families.items() for table in tables}
+    columns = {}
+    for family, tables in families.items():
+        info = list(conn.execute(f"PRAGMA table_info({tables[0]})"))
+        rowid_alias = [row[1] for row in info if row[5]] if sum(row[5] > 0 for row in info) == 1 else []
+        # An INTEGER PRIMARY KEY is the rowid, which every index carries anyway
+        columns[family] = [row[1] for row in info
+                           if not (row[1] in rowid_alias and row[2].upper() == "INTEGER")]
+    return families, owners, columns
+
+
+def index_sizes(conn, names: List[str]) -> Dict[str, Optional[int]]:
+    """Bytes per index from the dbstat virtual table (None where SQLite lacks it)"""
+    try:
+        rows = dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name"))
+    except sqlite3.OperationalError:
+        return {name: None for name in names}
+    return {name: rows.get(name) for name in names}
+
+
+def run_worker(args) -> Dict[str, Any]:
+    """Time every endpoint against DATABASE_URL and record the SQL each one runs (worker process)"""
+    import asyncio
+    from sqlalchemy import event
+    from app.database.connection import read_engine
+    from app.main import app
+    from benchmarks.endpoints import benchmark_paths, time_endpoints
+
+    statements: Dict[str, Dict[str, Any]] = OrderedDict()
+    current = {"path": None}
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        entry = statements.setdefault(statement, {"sql": statement, "params": list(parameters or ()),
+                                                  "endpoints": []})
+        if current["path"] not in entry["endpoints"]:
+            entry["endpoints"].append(current["path"])
+
+    event.listen(read_engine, "before_cursor_execute", capture)
+
+    async def time_all():
+        results = {}
+        for path in benchmark_paths(app):
+            current["path"] = path
+            results.update(await time_endpoints(app, [path], args.repeat))
+        return results
+
+    print(f"      {'p50 ms':>9} {'p95 ms':>9}")
+    endpoints = asyncio.run(time_all())
+    # Connection checks (SELECT 1) read no table
+    return {"endpoints": endpoints, "statements": [
+        entry for entry in statements.values()
+        if re.search(r"\bFROM\b", entry["sql"], re.I) and not re.match(r"\s*EXPLAIN\b", entry["sql"], re.I)
+    ]}
+
+
+def run_timings(database: Path, args) -> Dict[str, Any]:
+    """Run the worker against ``database`` in a subprocess"""
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{database}",
+        RESPONSE_CACHE_ENABLED="false",
+        # No slow-query plans: they would run (and be recorded) alongside the timed queries
+        SLOW_QUERY_MS="1e12",
+    )
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory) / "result.json"
+        subprocess.run([sys.executable, "-m", "benchmarks.index_advisor", "--worker", str(output),
+                        "--repeat", str(args.repeat)], cwd=BACKEND_DIR, env=env, check=True)
+        return json.loads(output.read_text())
+
+
+def collect_proposals(conn, statements: List[Dict[str, Any]]) -> List[Proposal]:
+    """Explain every statement and propose indexes for the tables it reads uncovered"""
+    families, owners, columns = schema(conn)
+    merged: Dict[Tuple[str, Tuple[str, ...], str], Proposal] = OrderedDict()
+    for number, statement in enumerate(statements):
+        statement["plan_before"] = plan(conn, statement["sql"], statement["params"])
+        uncovered = uncovered_tables(statement["plan_before"], owners)
+        statement["uncovered"] = uncovered
+        for block in select_blocks(statement["sql"]):
+            for table, alias in _TABLE_REF.findall(block):
+                if table not in uncovered:
+                    continue
+                alias = alias if alias and alias.lower() not in _KEYWORDS else None
+                proposal = propose(block, table, alias, columns[table])
+                if proposal is None:
+                    continue
+                key = (proposal.table, proposal.keys, proposal.where)
+                target = merged.setdefault(key, Proposal(proposal.table, proposal.keys, proposal.where,
+                                                         list(proposal.keys)))
+                target.columns.extend(column for column in proposal.columns if column not in target.columns)
+                if number not in target.statements:
+                    target.statements.append(number)
+    # Trailing columns in table order, so the DDL does not depend on which query came first
+    for proposal in merged.values():
+        rest = [column for column in columns[proposal.table] if column in proposal.columns[len(proposal.keys):]]
+        proposal.columns = list(proposal.keys) + rest
+    return list(merged.values())
+
+
+def build_proposals(conn, proposals: List[Proposal]) -> List[Dict[str, Any]]:
+    """Create every proposal on each physical table it covers; returns name, DDL and build time"""
+    families, _, _ = schema(conn)
+    built = []
+    for number, proposal in enumerate(proposals, start=1):
+        ddl, started = [], time.perf_counter()
+        for table in families[proposal.table]:
+            statement = proposal.ddl(table, f"idx_{table}_adv{number}")
+            conn.execute(statement)
+            ddl.append(statement)
+        conn.commit()
+        built.append({
+            "name": f"adv{number}",
+            "table": proposal.table,
+            "columns": proposal.columns,
+            "where": proposal.where or None,
+            "indexes": [f"idx_{table}_adv{number}" for table in families[proposal.table]],
+            "ddl": ddl,
+            "build_seconds": round(time.perf_counter() - started, 2),
+            "proposed_for": proposal.statements,
+        })
+        print(f"  adv{number}: {proposal.table} ({', '.join(proposal.columns)})"
+              + (f" WHERE {proposal.where}" if proposal.where else "")
+              + f"  {built[-1]['build_seconds']:.1f}s", flush=True)
+    conn.execute("ANALYZE")
+    conn.commit()
+    return built
+
+
+def existing_index_bytes(conn, families: Dict[str, List[str]]) -> Dict[str, Dict[str, int]]:
+    """Current index and table bytes per queryable table, for scale (empty without dbstat)"""
+    sizes = {}
+    for family, tables in families.items():
+        placeholders = ", ".join("?" * len(tables))
+        names = [name for (name,) in conn.execute(
+            f"SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name IN ({placeholders})", tables)]
+        index_bytes = index_sizes(conn, names + tables)
+        if any(value is None for value in index_bytes.values()):
+            return {}
+        sizes[family] = {"table_bytes": sum(index_bytes[table] or 0 for table in tables),
+                         "index_bytes": sum(index_bytes[name] or 0 for name in names)}
+    return sizes
+
+
+def narrow_trips_view(sql: str, partitions: List[str], columns: List[str]) -> Optional[str]:
+    """
+    The statement with the ``trips`` view replaced by a UNION ALL of only the columns it reads
+
+    Through the view every month table returns all of its columns, so SQLite
+    cannot answer any arm from an index alone; with the projection narrowed
+    it can. None when the statement does not read the view.
+    """
+    if not partitions or not _TRIPS_REF.search(sql):
+        return None
+    referenced = [column for column in columns if re.search(rf"\b{column}\b", sql)] or ["1"]
+    arms = " UNION ALL ".join(f"SELECT {', '.join(referenced)} FROM {table}" for table in partitions)
+
+    def replace(match) -> str:
+        keyword, alias = match.group(1), match.group(2)
+        if alias and alias.lower() not in _KEYWORDS:
+            return f"{keyword} ({arms}) AS {alias}"
+        return f"{keyword} ({arms}) AS trips" + (f" {alias}" if alias else "")
+
+    return _TRIPS_REF.sub(replace, sql)
+
+
+def time_statement(conn, sql: str, params, repeat: int) -> float:
+    """Median milliseconds of ``repeat`` runs after one warm-up run"""
+    conn.execute(sql, params).fetchall()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(timings), 2)
+
+
+def analyze(scratch: Path, args) -> Dict[str, Any]:
+    """Explain, propose, build and measure on the scratch copy"""
+    print("\nBefore: timing endpoints and recording their SQL")
+    before = run_timings(scratch, args)
+    statements = before["statements"]
+
+    conn = sqlite3.connect(scratch)
+    families, _, columns = schema(conn)
+    # Only the partitioned layout reads trips through a view
+    partitions = families.get("trips", []) if families.get("trips") != ["trips"] else []
+    current_sizes = existing_index_bytes(conn, families)
+    proposals = collect_proposals(conn, statements)
+    print(f"\n{len(statements)} statements, {sum(bool(s['uncovered']) for s in statements)} "
+          f"read a table without a covering index; {len(proposals)} index(es) proposed")
+    for statement in statements:
+        statement["before_ms"] = time_statement(conn, statement["sql"], statement["params"], args.repeat)
+        statement["narrow_sql"] = narrow_trips_view(statement["sql"], partitions, columns.get("trips", []))
+
+    built = build_proposals(conn, proposals)
+    sizes = index_sizes(conn, [name for index in built for name in index["indexes"]])
+    by_physical = {}
+    for index in built:
+        index_bytes = [sizes[name] for name in index["indexes"]]
+        index["bytes"] = None if None in index_bytes else sum(index_bytes)
+        index["used_by"], index["used_by_narrow"] = [], []
+        by_physical.update((name, index) for name in index["indexes"])
+    for number, statement in enumerate(statements):
+        variants = [("sql", "plan_after", "after_ms", "used_by")]
+        if statement["narrow_sql"]:
+            variants.append(("narrow_sql", "plan_narrow", "narrow_ms", "used_by_narrow"))
+        for sql_key, plan_key, time_key, used_key in variants:
+            statement[plan_key] = plan(conn, statement[sql_key], statement["params"])
+            statement[time_key] = time_statement(conn, statement[sql_key], statement["params"], args.repeat)
+            for name in dict.fromkeys(used_indexes(statement[plan_key])):
+                index = by_physical.get(name)
+                if index is not None and number not in index[used_key]:
+                    index[used_key].append(number)
+    conn.close()
+
+    print("\nAfter: timing endpoints with the proposed indexes")
+    after = run_timings(scratch, args)
+    return {"before": before, "after": after, "statements": statements, "indexes": built,
+            "current_sizes": current_sizes}
+
+
+def report(results: Dict[str, Any]) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """Print the comparison; returns per-endpoint changes and the recommended indexes"""
+    before, after, statements = results["before"], results["after"], results["statements"]
+
+    print(f"\n{'before p50':>10} {'after p50':>10} {'change':>8}  endpoint")
+    endpoints = {}
+    for path, result in before["endpoints"].items():
+        new = after["endpoints"].get(path, {})
+        old_ms, new_ms = result["p50_ms"], new.get("p50_ms")
+        change = (new_ms / old_ms - 1) if new_ms is not None and old_ms else None
+        endpoints[path] = {"before": result, "after": new, "change": None if change is None else round(change, 3)}
+        change_text = f"{change:+.0%}" if change is not None else "-"
+        print(f"{old_ms:>10.1f} {new_ms if new_ms is not None else float('nan'):>10.1f} {change_text:>8}  {path}")
+
+    print("\nPer statement (median ms on the copy; narrow = trips view cut down to the columns read)")
+    print(f"{'before':>9} {'after':>9} {'narrow':>9}  first endpoint")
+    for statement in statements:
+        narrow = statement.get("narrow_ms")
+        print(f"{statement['before_ms']:>9.1f} {statement['after_ms']:>9.1f} "
+              f"{narrow if narrow is not None else float('nan'):>9.1f}  {statement['endpoints'][0]}")
+
+    print("\nProposed indexes")
+    recommended = []
+    for index in results["indexes"]:
+        numbers = sorted(set(index["used_by"]) | set(index["used_by_narrow"]))
+        index["used_by_endpoints"] = sorted({path for number in numbers for path in statements[number]["endpoints"]})
+        size = f"{index['bytes'] / 1e6:,.1f} MB" if index["bytes"] is not None else "? MB"
+        if index["used_by"]:
+            status = f"used by {len(index['used_by'])} statement(s)"
+        elif index["used_by_narrow"]:
+            status = f"used by {len(index['used_by_narrow'])} statement(s) only with a narrowed trips projection"
+        else:
+            status = "UNUSED"
+        print(f"  {index['name']}: {size}, built in {index['build_seconds']:.1f}s, {status}")
+        print(f"    ({', '.join(index['columns'])})" + (f" WHERE {index['where']}" if index["where"] else ""))
+        if numbers:
+            print(f"    {', '.join(index['used_by_endpoints'])}")
+            recommended.append(index)
+    for family, size in results["current_sizes"].items():
+        if size["index_bytes"]:
+            print(f"  (current indexes on {family}: {size['index_bytes'] / 1e6:,.1f} MB, "
+                  f"table {size['table_bytes'] / 1e6:,.1f} MB)")
+    if any(index["used_by_narrow"] and not index["used_by"] for index in results["indexes"]):
+        print("\nSome indexes only cover the queries when the month tables are read directly: through the\n"
+              "trips view every month table returns all of its columns, so no index can cover them.")
+    return endpoints, recommended
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Propose and measure covering/partial indexes for the API's SQL")
+    parser.add_argument("--database", help="SQLite database file (default: DATABASE_URL)")
+    parser.add_argument("--scratch", help="Where to put the scratch copy (default: a temporary file)")
+    parser.add_argument("--keep-scratch", action="store_true", help="Keep the indexed scratch copy")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per endpoint and statement")
+    parser.add_argument("--output", default="benchmarks/results/index_advisor.json", help="Results JSON")
+    parser.add_argument("--sql", default="benchmarks/results/index_advisor.sql", help="Recommended DDL")
+    parser.add_argument("--worker", metavar="OUTPUT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        Path(args.worker).write_text(json.dumps(run_worker(args)))
+        return
+
+    url = make_url(args.database and f"sqlite:///{args.database}"
+                   or os.getenv("DATABASE_URL", "sqlite:///./nyc_taxi.db"))
+    if url.get_backend_name() != "sqlite":
+        parser.error("the index advisor works on SQLite databases; pass --database FILE")
+    source = Path(url.database).resolve()
+    if not source.exists():
+        parser.error(f"{source} does not exist")
+
+    scratch_dir = None
+    if args.scratch:
+        scratch = Path(args.scratch).resolve()
+    else:
+        scratch_dir = tempfile.mkdtemp(prefix="index-advisor-", dir=source.parent)
+        scratch = Path(scratch_dir) / source.name
+    print(f"Copying {source} -> {scratch}")
+    started = time.perf_counter()
+    with sqlite3.connect(f"file:{source}?mode=ro", uri=True) as original, sqlite3.connect(scratch) as copy:
+        original.backup(copy)
+    print(f"  {scratch.stat().st_size / 1e6:,.0f} MB in {time.perf_counter() - started:.1f}s")
+
+    try:
+        results = analyze(scratch, args)
+    finally:
+        if not args.keep_scratch:
+            for path in (scratch, Path(f"{scratch}-wal"), Path(f"{scratch}-shm")):
+                path.unlink(missing_ok=True)
+            if scratch_dir:
+                os.rmdir(scratch_dir)
+    endpoints, recommended = report(results)
+
+    output = BACKEND_DIR / args.output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "database": str(source),
+        "repeat": args.repeat,
+        "current_sizes": results["current_sizes"],
+        "endpoints": endpoints,
+        "indexes": results["indexes"],
+        "statements": results["statements"],
+    }, indent=2))
+    sql = BACKEND_DIR / args.sql
+    sql.write_text("".join(
+        f"-- {index['name']}: {', '.join(index['used_by_endpoints'])}\n" + ";\n".join(index["ddl"]) + ";\n\n"
+        for index in recommended
+    ) + ("ANALYZE;\n" if recommended else ""))
+    print(f"\nWrote {output}\nWrote {sql} ({len(recommended)} recommended index(es))")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Benchmark JSON encoding: FastAPI default (jsonable_encoder + json) vs FastJSONResponse
+
+Payloads are the real responses of the largest endpoints (fetched once
+through the app), so only the encoding step is timed.
+
+Usage (from backend/, against the database in DATABASE_URL):
+    python -m benchmarks.json_encoding
+    python -m benchmarks.json_encoding --repeat 50 /api/v1/variability/trends
+"""
+import argparse
+import json
+import statistics
+import time
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from app.utils.responses import FastJSONResponse
+from benchmarks.asgi import get
+
+DEFAULT_ENDPOINTS = [
+    "/api/v1/variability/trends",
+    "/api/v1/incentives/system",
+    "/api/v1/incentives/driver",
+    "/api/v1/surge/events",
+    "/api/v1/efficiency/timeseries",
+    "/api/v1/wait-time/current",
+]
+
+
+def time_encode(encode, payload, repeat: int) -> float:
+    """Median encoding time in milliseconds"""
+    encode(payload)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        encode(payload)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare JSON response encoders")
+    parser.add_argument("endpoints", nargs="*", default=DEFAULT_ENDPOINTS, help="Endpoint paths to benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed encodings per endpoint and encoder")
+    args = parser.parse_args()
+
+    from app.main import app
+
+    encoders = {
+        "jsonable_encoder+json": lambda payload: JSONResponse(jsonable_encoder(payload)).body,
+        "FastJSONResponse": lambda payload: FastJSONResponse(payload).body,
+    }
+
+    print(f"{'endpoint':36} {'bytes':>10}" + "".join(f"{name:>24}" for name in encoders) + f"{'speedup':>9}")
+    for path in args.endpoints:
+        payload = json.loads(get(app, path).body)
+        timings = {name: time_encode(encode, payload, args.repeat) for name, encode in encoders.items()}
+        size = len(FastJSONResponse(payload).body)
+        baseline, fast = timings.values()
+        print(f"{path:36} {size:>10,}" + "".join(f"{ms:>22.2f}ms" for ms in timings.values())
+              + f"{baseline / max(fast, 1e-9):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+"""
+Load test: a running server under increasing concurrency
+
+Drives a running API (uvicorn locally, or the nginx + gunicorn stack) with
+the dashboard's request mix: virtual users each load a dashboard page
+(Overview, Question1 ... Question8, weighted by --weights), wait for it,
+and immediately load the next one (closed loop, no think time). Each
+concurrency level runs for --duration seconds after a short warm-up, and
+reports page views/s, HTTP requests/s, latency percentiles and errors
+(non-2xx, timeouts, connection errors, failed bundle panels). The levels
+together form the saturation curve: throughput stops growing while
+latency keeps climbing once the server is saturated, and the report
+names that point.
+
+A page view is one ``GET /api/v1/bundle/{page}`` (--mode bundle) or the
+page's panel endpoints fetched concurrently, one request each, the way
+the frontend loads a page today (--mode panels).
+
+Usage (from backend/, with the server running):
+    uvicorn app.main:app --port 8000 &
+    python -m benchmarks.load_test
+    python -m benchmarks.load_test --url http://localhost:8000 --concurrency 1 2 4 8 16 32 64 --duration 30
+    python -m benchmarks.load_test --mode panels --weights overview=3 question1=2
+    python -m benchmarks.load_test --date-ranges 50      # random date windows, mostly response cache misses
+
+--timeout defaults to nginx's proxy_read_timeout (60 s), so requests
+that would have been cut off by the proxy count as timeouts. Run the
+load generator on a different machine or core than the server when
+measuring the server's limits. Requires httpx (``pip install httpx``).
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BUNDLE_PATH = "/api/v1/bundle/{page}"
+# Dates the ETL loads (app.pipelines.etl.MONTHS)
+DATA_START, DATA_END = date(2025, 1, 1), date(2025, 4, 30)
+# A level is saturated when doubling concurrency gains less throughput than this
+SATURATION_GAIN = 0.10
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Nearest-rank percentile"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+
+def page_paths(mode: str) -> Dict[str, List[str]]:
+    """Request paths of one view of each dashboard page"""
+    from app.api.bundle import PAGES
+
+    if mode == "bundle":
+        return {page: [BUNDLE_PATH.format(page=page)] for page in PAGES}
+    # Panel endpoints are looked up by route name, so the app is only imported in this mode
+    from app.main import app
+
+    return {page: [str(app.url_path_for(panel.endpoint.__name__)) for panel in panels]
+            for page, panels in PAGES.items()}
+
+
+def date_ranges(count: int, rng: random.Random) -> List[Dict[str, str]]:
+    """``count`` random start_date/end_date windows of 1-31 days; none means endpoint defaults"""
+    ranges = []
+    span = (DATA_END - DATA_START).days
+    for _ in range(count):
+        start = DATA_START + timedelta(days=rng.randrange(span))
+        end = min(DATA_END, start + timedelta(days=rng.randrange(31)))
+        ranges.append({"start_date": start.isoformat(), "end_date": end.isoformat()})
+    return ranges
+
+
+class Level:
+    """Measurements of one concurrency level"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors: Counter = Counter()
+        self.statuses: Counter = Counter()
+        self.pages: Counter = Counter()
+        self.requests = 0
+        self.failed_views = 0
+
+    def summary(self, concurrency: int, seconds: float) -> Dict[str, Any]:
+        views = len(self.latencies)
+        return {
+            "concurrency": concurrency,
+            "seconds": round(seconds, 2),
+            "views": views,
+            "requests": self.requests,
+            "views_per_second": round(views / seconds, 2),
+            "requests_per_second": round(self.requests / seconds, 2),
+            "p50_ms": round(percentile(self.latencies, 0.50), 1) if views else None,
+            "p90_ms": round(percentile(self.latencies, 0.90), 1) if views else None,
+            "p95_ms": round(percentile(self.latencies, 0.95), 1) if views else None,
+            "p99_ms": round(percentile(self.latencies, 0.99), 1) if views else None,
+            "max_ms": round(max(self.latencies), 1) if views else None,
+            "mean_ms": round(statistics.fmean(self.latencies), 1) if views else None,
+            "error_rate": round(self.failed_views / views, 4) if views else None,
+            "errors": dict(self.errors),
+            "statuses": {str(status): count for status, count in sorted(self.statuses.items())},
+            "pages": dict(self.pages),
+        }
+
+
+async def fetch(client, path: str, params: Dict[str, str], level: Optional[Level]) -> bool:
+    """One request; returns whether it succeeded and records errors on ``level``"""
+    error = None
+    try:
+        response = await client.get(path, params=params)
+    except httpx.TimeoutException:
+        error = "timeout"
+    except httpx.TransportError as e:
+        error = type(e).__name__
+    else:
+        if level is not None:
+            level.statuses[response.status_code] += 1
+        if response.status_code >= 400:
+            error = f"http_{response.status_code}"
+        elif response.headers.get("cache-control") == "no-store" and path.startswith("/api/v1/bundle/"):
+            # A bundle with a failed panel is a 200 that is kept out of the cache
+            failed = [outcome["status"] for outcome in response.json()["data"]["panels"].values()
+                      if outcome["status"] != 200]
+            if failed:
+                error = f"panel_{failed[0]}"
+    if level is not None:
+        level.requests += 1
+        if error:
+            level.errors[error] += 1
+    return error is None
+
+
+async def virtual_user(client, pages: List[Tuple[str, List[str]]], weights: List[float],
+                       ranges: List[Dict[str, str]], rng: random.Random, deadline: float,
+                       level: Optional[Level]):
+    """Load pages back to back until ``deadline``"""
+    while time.perf_counter() < deadline:
+        page, paths = rng.choices(pages, weights)[0]
+        params = rng.choice(ranges) if ranges else {}
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(fetch(client, path, params, level) for path in paths))
+        if level is not None:
+            level.latencies.append((time.perf_counter() - started) * 1000)
+            level.pages[page] += 1
+            level.failed_views += not all(outcomes)
+
+
+async def run_level(args, pages, weights, ranges, concurrency: int, rng: random.Random) -> Dict[str, Any]:
+    """Warm up, then measure ``concurrency`` virtual users for --duration seconds"""
+    connections = concurrency * max(len(paths) for _, paths in pages)
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits,
+                                 headers={"Accept-Encoding": "gzip, br"}) as client:
+        users = [random.Random(rng.random()) for _ in range(concurrency)]
+        if args.warmup > 0:
+            deadline = time.perf_counter() + args.warmup
+            await asyncio.gather(*(virtual_user(client, pages, weights, ranges, user, deadline, None)
+                                   for user in users))
+        level = Level()
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(virtual_user(client, pages, weights, ranges, user, deadline, level)
+                               for user in users))
+        # Views started before the deadline finish after it; count the whole wall time
+        return level.summary(concurrency, time.perf_counter() - started)
+
+
+def saturation(levels: List[Dict[str, Any]], max_error_rate: float) -> Dict[str, Any]:
+    """Peak throughput and the first level where more concurrency stops paying off"""
+    peak = max(levels, key=lambda level: level["views_per_second"])
+    saturated_at, reason = None, None
+    for previous, level in zip(levels, levels[1:]):
+        if (level["error_rate"] or 0) > max_error_rate:
+            saturated_at, reason = level["concurrency"], f"error rate {level['error_rate']:.1%}"
+            break
+        # Expected gain scales with the concurrency step (10% per doubling)
+        steps = math.log2(level["concurrency"] / previous["concurrency"])
+        gain = level["views_per_second"] / max(previous["views_per_second"], 1e-9) - 1
+        if gain < SATURATION_GAIN * steps:
+            saturated_at = level["concurrency"]
+            reason = (f"throughput {gain:+.0%} while p95 {previous['p95_ms']:.0f} -> {level['p95_ms']:.0f} ms")
+            break
+    return {
+        "peak_views_per_second": peak["views_per_second"],
+        "peak_concurrency": peak["concurrency"],
+        "saturated_at": saturated_at,
+        "reason": reason,
+    }
+
+
+def print_level(level: Dict[str, Any]):
+    errors = ", ".join(f"{name} {count}" for name, count in sorted(level["errors"].items())) or "-"
+    p = {key: level[key] if level[key] is not None else float("nan") for key in ("p50_ms", "p95_ms", "p99_ms")}
+    print(f"{level['concurrency']:>6} {level['views_per_second']:>9.1f} {level['requests_per_second']:>8.1f} "
+          f"{p['p50_ms']:>9.1f} {p['p95_ms']:>9.1f} {p['p99_ms']:>9.1f} {level['error_rate'] or 0:>7.1%}  {errors}",
+          flush=True)
+
+
+def print_curve(levels: List[Dict[str, Any]], width: int = 50):
+    """Throughput and p95 latency per concurrency level as horizontal bars"""
+    peak = max(level["views_per_second"] for level in levels) or 1
+    slowest = max(level["p95_ms"] or 0 for level in levels) or 1
+    print(f"\nSaturation curve ('#' views/s, up to {peak:.1f}; '-' p95, up to {slowest:.0f} ms)")
+    for level in levels:
+        throughput = "#" * round(width * level["views_per_second"] / peak)
+        latency = "-" * round(width * (level["p95_ms"] or 0) / slowest)
+        print(f"{level['concurrency']:>6} |{throughput:<{width}} {level['views_per_second']:.1f}/s")
+        print(f"{'':>6} |{latency:<{width}} {level['p95_ms'] or 0:.0f} ms")
+
+
+def parse_weights(values: List[str], pages: List[str]) -> Dict[str, float]:
+    """Page weights from ``page=weight`` pairs; the overview (landing page) counts double by default"""
+    weights = {page: 2.0 if page == "overview" else 1.0 for page in pages}
+    for value in values:
+        page, _, weight = value.partition("=")
+        if page not in weights or not weight:
+            raise argparse.ArgumentTypeError(f"expected page=weight with page in {', '.join(pages)}, got {value!r}")
+        weights[page] = float(weight)
+    return weights
+
+
+async def run(args) -> List[Dict[str, Any]]:
+    paths = page_paths(args.mode)
+    try:
+        weights = parse_weights(args.weights, list(paths))
+    except argparse.ArgumentTypeError as e:
+        raise SystemExit(f"--weights: {e}")
+    pages = [(page, paths[page]) for page in paths if weights[page] > 0]
+    page_weights = [weights[page] for page, _ in pages]
+    rng = random.Random(args.seed)
+    ranges = date_ranges(args.date_ranges, rng)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=10) as client:
+        try:
+            (await client.get("/health")).raise_for_status()
+        except httpx.HTTPError as e:
+            raise SystemExit(f"{args.url} is not reachable ({e}); start the server first")
+
+    print(f"Load test {args.url}, {args.mode} mode, {args.duration:g}s per level, "
+          f"{len(ranges) or 'default'} date range(s)")
+    print(f"{'users':>6} {'views/s':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    levels = []
+    for concurrency in args.concurrency:
+        level = await run_level(args, pages, page_weights, ranges, concurrency, rng)
+        levels.append(level)
+        print_level(level)
+        if (level["error_rate"] or 0) > args.stop_error_rate:
+            print(f"Stopping: error rate {level['error_rate']:.1%} above {args.stop_error_rate:.0%}")
+            break
+    return levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test a running server at increasing concurrency")
+    parser.add_argument("--url", default="http://localhost:8000", help="Server base URL")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64],
+                        help="Virtual users per level, in order")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before each level")
+    parser.add_argument("--mode", choices=["bundle", "panels"], default="bundle",
+                        help="A page view is one bundle request, or one request per panel")
+    parser.add_argument("--weights", nargs="*", default=[], metavar="PAGE=WEIGHT",
+                        help="Relative page popularity (default: overview 2, questions 1)")
+    parser.add_argument("--date-ranges", type=int, default=0,
+                        help="Random start/end date windows to spread views over (0 = endpoint defaults)")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Error rate that marks a level as saturated")
+    parser.add_argument("--stop-error-rate", type=float, default=0.5, help="Stop the sweep above this error rate")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmarks/results/load_test.json", help="Results JSON")
+    args = parser.parse_args()
+    if httpx is None:
+        raise SystemExit("The load test needs httpx: pip install httpx")
+    if sorted(args.concurrency) != args.concurrency or args.concurrency[0] < 1:
+        parser.error("--concurrency levels must be positive and increasing")
+
+    levels = asyncio.run(run(args))
+    print_curve(levels)
+    result = saturation(levels, args.max_error_rate)
+    print(f"\nPeak {result['peak_views_per_second']:.1f} views/s at {result['peak_concurrency']} users")
+    if result["saturated_at"]:
+        print(f"Saturated at {result['saturated_at']} users: {result['reason']}")
+    else:
+        print("Not saturated at the highest level; add higher --concurrency levels")
+
+    output = BACKEND_DIR / args.output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "url": args.url,
+            "mode": args.mode,
+            "duration": args.duration,
+            "date_ranges": args.date_ranges,
+            "timeout": args.timeout,
+        },
+        "levels": levels,
+        "saturation": result,
+    }, indent=2))
+    print(f"Wrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Benchmark: per-request overhead of the metrics middleware
+
+Times requests through a trivial ASGI app (fixed JSON body, no database)
+with and without MetricsMiddleware, plus the record_query /
+record_serialization calls a typical endpoint makes, and reports the
+difference per request. The target is well under 50 µs.
+
+Usage (from backend/):
+    python -m benchmarks.metrics_overhead
+    python -m benchmarks.metrics_overhead --requests 50000 --queries 3
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from app.middleware.metrics import MetricsMiddleware
+from app.services.metrics import record_query, record_serialization
+
+
+def make_app(queries: int):
+    async def app(scope, receive, send):
+        # Stand-in for the router: sets what a matched route leaves in the scope
+        scope["endpoint"] = app
+        scope["path_params"] = {"page": "overview"}
+        for _ in range(queries):
+            record_query(0.001, 10)
+        record_serialization(0.0001)
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": b'{"data": []}'})
+    return app
+
+
+async def run(app, requests: int) -> float:
+    """Seconds per request, over ``requests`` sequential calls"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "GET", "path": "/api/v1/bundle/overview", "headers": [],
+                 "query_string": b""}
+        await app(scope, receive, send)
+    return (time.perf_counter() - started) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=2, help="record_query calls per request")
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    bare = make_app(args.queries)
+    instrumented = MetricsMiddleware(bare)
+    bare_times, instrumented_times = [], []
+    for _ in range(args.repeat):
+        bare_times.append(asyncio.run(run(bare, args.requests)))
+        instrumented_times.append(asyncio.run(run(instrumented, args.requests)))
+
+    bare_us = statistics.median(bare_times) * 1e6
+    instrumented_us = statistics.median(instrumented_times) * 1e6
+    print(f"without middleware: {bare_us:7.2f} µs/request")
+    print(f"with middleware:    {instrumented_us:7.2f} µs/request")
+    print(f"overhead:           {instrumented_us - bare_us:7.2f} µs/request")
+
+
+if __name__ == "__main__":
+    main()
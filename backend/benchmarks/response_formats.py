@@ -0,0 +1,65 @@
+"""
+Benchmark response size and latency per endpoint for each response format
+(records, columns, arrow, parquet)
+
+Usage (from backend/, against the database in DATABASE_URL):
+    python -m benchmarks.response_formats
+    python -m benchmarks.response_formats --repeat 10 /api/v1/incentives/system
+"""
+import argparse
+import json
+import statistics
+from benchmarks.asgi import get
+
+DEFAULT_ENDPOINTS = [
+    "/api/v1/incentives/system",
+    "/api/v1/incentives/driver",
+    "/api/v1/wait-time/current",
+    "/api/v1/surge/events",
+    "/api/v1/variability/trends",
+    "/api/v1/efficiency/timeseries",
+    "/api/v1/efficiency/demand-correlation",
+    "/api/v1/zones/net-profit",
+]
+FORMATS = ["records", "columns", "arrow", "parquet"]
+
+
+def measure(app, path: str, result_format: str, repeat: int) -> dict:
+    """Median latency and body size of one endpoint in one format"""
+    url = f"{path}{'&' if '?' in path else '?'}format={result_format}"
+    get(app, url)  # warm-up (imports, SQLite page cache)
+    timings, size, status = [], 0, 0
+    for _ in range(repeat):
+        response = get(app, url)
+        timings.append(response.elapsed_ms)
+        size, status = len(response.body), response.status
+    return {"status": status, "bytes": size, "ms": statistics.median(timings)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare response formats per endpoint")
+    parser.add_argument("endpoints", nargs="*", default=DEFAULT_ENDPOINTS, help="Endpoint paths to benchmark")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed requests per endpoint and format")
+    parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    from app.main import app
+
+    results = []
+    print(f"{'endpoint':40}" + "".join(f"{result_format:>20}" for result_format in FORMATS))
+    for path in args.endpoints:
+        row = {"endpoint": path}
+        for result_format in FORMATS:
+            row[result_format] = measure(app, path, result_format, args.repeat)
+        print(f"{path:40}" + "".join(
+            f"{row[result_format]['bytes']:>11,}B {row[result_format]['ms']:>6.1f}ms" for result_format in FORMATS
+        ))
+        results.append(row)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Benchmark: SQLite connection settings for the analytics queries
+
+Compares the previous per-connection setup (1GB page cache, temp files on
+disk, no mmap, ``PRAGMA optimize`` on every connect) with the read-only
+engine's settings from app.database.connection (mode=ro, query_only,
+mmap, 16MB cache), with and without ``temp_store=MEMORY``. Reports the
+cost of opening a connection and the median time of large GROUP BY /
+ORDER BY queries shaped like the zone x hour endpoints.
+
+Usage (from backend/; needs a loaded SQLite database):
+    DATABASE_URL=sqlite:///./nyc_taxi.db python -m benchmarks.sqlite_pragmas
+    python -m benchmarks.sqlite_pragmas --database ./nyc_taxi.db --repeat 10
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import time
+from sqlalchemy.engine import make_url
+from app.database.connection import SQLITE_CACHE_MB, SQLITE_MMAP_MB, SQLITE_TEMP_STORE
+
+SETTINGS = {
+    "previous": (
+        "file:{path}",
+        ["PRAGMA journal_mode=WAL", "PRAGMA cache_size=-256000", "PRAGMA synchronous=NORMAL", "PRAGMA optimize"],
+    ),
+    "read-only tuned": (
+        "file:{path}?mode=ro",
+        ["PRAGMA query_only=ON", f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}",
+         f"PRAGMA temp_store={SQLITE_TEMP_STORE}", f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}"],
+    ),
+    "tuned, memory temp": (
+        "file:{path}?mode=ro",
+        ["PRAGMA query_only=ON", f"PRAGMA mmap_size={SQLITE_MMAP_MB * 1024 * 1024}",
+         "PRAGMA temp_store=MEMORY", f"PRAGMA cache_size=-{SQLITE_CACHE_MB * 1024}"],
+    ),
+}
+
+QUERIES = {
+    "zone x hour group by": """
+        SELECT pulocationid, strftime('%H', tpep_pickup_datetime) AS hour,
+               COUNT(*) AS trips, SUM(total_amount) AS revenue, AVG(trip_distance) AS distance
+        FROM trips
+        GROUP BY pulocationid, hour
+        ORDER BY revenue DESC
+    """,
+    "od pair group by": """
+        SELECT pulocationid, dolocationid, COUNT(*) AS trips, AVG(fare_amount) AS fare
+        FROM trips
+        GROUP BY pulocationid, dolocationid
+        ORDER BY trips DESC
+        LIMIT 100
+    """,
+    "daily distinct zones": """
+        SELECT date(tpep_pickup_datetime) AS day, COUNT(DISTINCT pulocationid) AS zones, SUM(fare_amount) AS fares
+        FROM trips
+        GROUP BY day
+        ORDER BY day
+    """,
+    "sorted scan": """
+        SELECT tpep_pickup_datetime, fare_amount, tip_amount
+        FROM trips
+        ORDER BY fare_amount DESC, tip_amount DESC
+        LIMIT 1000
+    """,
+}
+
+
+def connect(path: str, setting: str) -> sqlite3.Connection:
+    uri, pragmas = SETTINGS[setting]
+    conn = sqlite3.connect(uri.format(path=path), uri=True)
+    for pragma in pragmas:
+        conn.execute(pragma).fetchall()
+    return conn
+
+
+def median_ms(fn, repeat: int) -> float:
+    """Median wall time of ``fn`` in milliseconds"""
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite connection settings")
+    parser.add_argument("--database", default=None, help="SQLite file (default: from DATABASE_URL)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per query")
+    args = parser.parse_args()
+
+    path = args.database or make_url(os.getenv("DATABASE_URL", "sqlite:///./nyc_taxi.db")).database
+    path = os.path.abspath(path)
+    print(f"Database: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+    print(f"{'':24} " + " ".join(f"{setting:>18}" for setting in SETTINGS))
+    row = [median_ms(lambda: connect(path, setting).close(), args.repeat) for setting in SETTINGS]
+    print(f"{'open connection':24} " + " ".join(f"{ms:>16.2f}ms" for ms in row))
+
+    connections = {setting: connect(path, setting) for setting in SETTINGS}
+    for name, query in QUERIES.items():
+        row = [median_ms(lambda: conn.execute(query).fetchall(), args.repeat) for conn in connections.values()]
+        print(f"{name:24} " + " ".join(f"{ms:>16.2f}ms" for ms in row))
+    for conn in connections.values():
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
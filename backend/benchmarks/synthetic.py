@@ -0,0 +1,53 @@
+"""
+Synthetic benchmark database
+
+Writes synthetic TLC parquet files (app.pipelines.synthetic) to a
+temporary directory and loads them with the ETL itself (taxi zones,
+``load_parquet_to_sql``, rollups), so the benchmark database has the
+production layout, cleaning and rollups. The same seed and row count
+always produce the same rows.
+"""
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List
+from app.pipelines.synthetic import SyntheticConfig, generate
+
+ZONES_CSV = Path(__file__).resolve().parent.parent / "data" / "taxi_zone_lookup.csv"
+
+
+def build_database(engine, rows: int, months: List[str], seed: int = 42, config: SyntheticConfig = None) -> int:
+    """
+    Load synthetic trips, taxi zones and rollups into the DATABASE_URL database
+
+    Args:
+        engine: Writer engine of the (empty or disposable) benchmark database;
+            must point at DATABASE_URL, which the ETL loads into
+        rows: Total trips generated, spread over ``months`` (the ETL drops
+            invalid durations and stray pickups, like in the real files)
+        months: Months to generate as YYYY-MM
+        seed: Random seed
+        config: Distribution knobs of the generator
+
+    Returns:
+        Number of trips loaded
+    """
+    from app.database import models
+    from app.pipelines.etl import load_parquet_to_sql, load_taxi_zones
+    from app.pipelines.partitions import ensure_trips_layout
+    from app.pipelines.rollups import build_rollups
+    from sqlalchemy import text
+
+    ensure_trips_layout(engine)
+    # The declarative Base the models are registered on
+    models.Base.metadata.create_all(bind=engine)
+
+    with tempfile.TemporaryDirectory(prefix="synthetic-tlc-") as data_dir:
+        generate(data_dir, rows, months, seed, config)
+        shutil.copy(ZONES_CSV, data_dir)
+        load_taxi_zones(data_dir)
+        load_parquet_to_sql(data_dir, batch_size=50000, months=months)
+    build_rollups(engine)
+
+    with engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM trips")).scalar()
@@ -0,0 +1,197 @@
+"""
+Benchmark: page reads of date-filtered aggregates per trips row layout
+
+Builds the same trips (and indexes, rollups, ANALYZE) four times with
+app.pipelines.slicing, differing only in the physical row order of each
+month table:
+
+* shuffled - arrival order, as ``to_sql`` wrote whatever the files held
+* pickup - sorted by pickup time (the ETL before rows were clustered)
+* day_zone - sorted by pickup day, then pickup zone (CLUSTER_ORDER_SQL, now the default)
+* without_rowid - WITHOUT ROWID tables keyed on (tpep_pickup_datetime, id)
+
+and runs date-filtered aggregates over the ``trips`` view on each, for a
+day, a week and a month window. Page reads are counted exactly: every query
+runs on a fresh connection with memory mapping off and a page cache large
+enough to hold everything, so each page the query touches is read once
+through ``read()``, and the bytes read (``rchar`` in /proc/self/io, so
+Linux only) divided by the page size is the number of distinct pages. The
+OS page cache is warm, so the timings show CPU and copying cost rather than
+disk seeks; on a cold cache or network storage page reads dominate.
+
+Usage (from backend/):
+    python -m benchmarks.trips_layout                          # DATABASE_URL's SQLite file
+    python -m benchmarks.trips_layout --database benchmarks/data/trips_1000000_seed42.db --repeat 5
+
+Results go to benchmarks/results/trips_layout.json. The source database is
+only read.
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+from sqlalchemy.engine import make_url
+from app.pipelines.partitions import CLUSTER_ORDER_SQL
+from app.pipelines.slicing import build_serving_database
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+LAYOUTS = {
+    "shuffled": {"order_by": "RANDOM()"},
+    "pickup": {"order_by": "tpep_pickup_datetime"},
+    "day_zone": {"order_by": CLUSTER_ORDER_SQL},
+    "without_rowid": {"without_rowid": True},
+}
+
+WINDOW = "tpep_pickup_datetime >= :start AND tpep_pickup_datetime < :end"
+QUERIES = {
+    "count_revenue": f"SELECT COUNT(*), SUM(total_amount) FROM trips WHERE {WINDOW}",
+    "zone_revenue": f"""
+        SELECT pulocationid, COUNT(*), SUM(fare_amount), SUM(total_amount) FROM trips
+        WHERE {WINDOW} AND tpep_dropoff_datetime > tpep_pickup_datetime
+        GROUP BY pulocationid
+    """,
+    "hourly_distance": f"""
+        SELECT strftime('%H', tpep_pickup_datetime) AS hour, COUNT(*), AVG(trip_distance) FROM trips
+        WHERE {WINDOW} GROUP BY hour
+    """,
+    "one_zone": f"SELECT COUNT(*), AVG(total_amount) FROM trips WHERE pulocationid = :zone AND {WINDOW}",
+}
+
+
+def read_bytes() -> Optional[int]:
+    """Bytes this process has read through read() so far (None off Linux)"""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("rchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def windows(conn: sqlite3.Connection) -> Dict[str, Dict[str, str]]:
+    """A day, a week and a month inside the first loaded month"""
+    first = conn.execute("SELECT MIN(tpep_pickup_datetime) FROM trips").fetchone()[0]
+    month = date.fromisoformat(first[:7] + "-01")
+    next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+    day = month + timedelta(days=14)
+    return {
+        "day": {"start": day.isoformat(), "end": (day + timedelta(days=1)).isoformat()},
+        "week": {"start": day.isoformat(), "end": (day + timedelta(days=7)).isoformat()},
+        "month": {"start": month.isoformat(), "end": next_month.isoformat()},
+    }
+
+
+def measure(database: Path, sql: str, params: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    """Distinct pages read and median time of one query on fresh connections"""
+    overhead = -read_bytes() + read_bytes() if read_bytes() is not None else None
+    timings, pages, rows = [], None, None
+    for _ in range(repeat):
+        conn = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+        try:
+            # Every page goes through read(), and no page is read twice
+            conn.execute("PRAGMA mmap_size = 0")
+            conn.execute("PRAGMA cache_size = -4194304")
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchall()  # schema and header already read
+            before = read_bytes()
+            started = time.perf_counter()
+            rows = conn.execute(sql, params).fetchall()
+            timings.append((time.perf_counter() - started) * 1000)
+            after = read_bytes()
+        finally:
+            conn.close()
+        if before is not None:
+            pages = (after - before - overhead) // page_size
+    return {"pages": pages, "ms": round(statistics.median(timings), 2), "rows": rows}
+
+
+def same_rows(a, b) -> bool:
+    """Whether two results match (floating point sums differ in the last digits by row order)"""
+    normalize = lambda rows: sorted(tuple(round(v, 4) if isinstance(v, float) else v for v in row) for row in rows)
+    return normalize(a) == normalize(b)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare page reads of date-filtered aggregates per trips layout")
+    parser.add_argument("--database", help="SQLite database file (default: DATABASE_URL)")
+    parser.add_argument("--layouts", nargs="+", choices=list(LAYOUTS), default=list(LAYOUTS))
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per query")
+    parser.add_argument("--scratch", help="Directory for the layout copies (default: a temporary one)")
+    parser.add_argument("--keep-scratch", action="store_true", help="Keep the layout copies")
+    parser.add_argument("--output", default="benchmarks/results/trips_layout.json", help="Results JSON")
+    args = parser.parse_args()
+
+    url = make_url(args.database and f"sqlite:///{args.database}"
+                   or os.getenv("DATABASE_URL", "sqlite:///./nyc_taxi.db"))
+    if url.get_backend_name() != "sqlite":
+        parser.error("the layout benchmark works on SQLite databases; pass --database FILE")
+    source = Path(url.database).resolve()
+    if not source.exists():
+        parser.error(f"{source} does not exist")
+    if read_bytes() is None:
+        print("Warning: /proc/self/io is not available; only timings are reported")
+
+    scratch = Path(args.scratch).resolve() if args.scratch else Path(tempfile.mkdtemp(prefix="trips-layout-",
+                                                                                       dir=source.parent))
+    scratch.mkdir(parents=True, exist_ok=True)
+    results = {"database": str(source), "repeat": args.repeat, "layouts": {}, "queries": {}}
+    try:
+        databases = {}
+        for layout in args.layouts:
+            print(f"\n== Building {layout}")
+            databases[layout] = scratch / f"{layout}.db"
+            steps = build_serving_database(str(databases[layout]), source=str(source), **LAYOUTS[layout])
+            results["layouts"][layout] = {
+                "build_seconds": round(sum(seconds for _, seconds, _ in steps), 1),
+                "size_mb": steps[-1][2],
+            }
+
+        with sqlite3.connect(f"file:{source}?mode=ro", uri=True) as conn:
+            ranges = windows(conn)
+            zone = conn.execute("""
+                SELECT pulocationid FROM trips WHERE tpep_pickup_datetime >= :start AND tpep_pickup_datetime < :end
+                GROUP BY pulocationid ORDER BY COUNT(*) DESC LIMIT 1
+            """, ranges["month"]).fetchone()[0]
+
+        print(f"\nPages read (ms) per query, window and layout; one_zone = zone {zone}")
+        print(f"{'query':<16} {'window':<6}" + "".join(f"{layout:>22}" for layout in args.layouts))
+        for name, sql in QUERIES.items():
+            for window, params in ranges.items():
+                params = dict(params, zone=zone)
+                measured = {layout: measure(database, sql, params, args.repeat) for layout, database in databases.items()}
+                reference = next(iter(measured.values()))["rows"]
+                if not all(same_rows(result["rows"], reference) for result in measured.values()):
+                    print(f"Warning: {name}/{window} returned different rows across layouts")
+                results["queries"][f"{name}/{window}"] = {
+                    layout: {"pages": result["pages"], "ms": result["ms"]} for layout, result in measured.items()
+                }
+                print(f"{name:<16} {window:<6}" + "".join(
+                    f"{result['pages'] if result['pages'] is not None else '-':>13} ({result['ms']:6.1f})"
+                    for result in measured.values()
+                ))
+
+        print(f"\n{'layout':<16} {'size MB':>8} {'build s':>8}")
+        for layout, summary in results["layouts"].items():
+            print(f"{layout:<16} {summary['size_mb']:8.1f} {summary['build_seconds']:8.1f}")
+    finally:
+        if not args.keep_scratch:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    output = BACKEND_DIR / args.output
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nWrote {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -39,7 +39,7 @@ def check_database():
                 result = conn.execute(text("""
                     SELECT name 
                     FROM sqlite_master 
-                    WHERE type='table'
+                    WHERE type IN ('table', 'view')
                 """))
                 tables = [row[0] for row in result]
             else:
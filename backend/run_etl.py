@@ -8,20 +8,26 @@ import argparse
 # Add parent directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app.pipelines.etl import load_taxi_zones, load_parquet_to_sql
+from app.pipelines.etl import MONTHS, engine, load_taxi_zones, load_parquet_to_sql, refuse_live_load
+from app.pipelines.partitions import month_bounds
+from app.pipelines.rollups import build_rollups
 
 if __name__ == "__main__":
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Run ETL pipeline to load data into database')
     parser.add_argument('--data-dir', type=str, default='../data',
                         help='Directory containing data files (default: ../data)')
+    parser.add_argument('--months', nargs='+', default=MONTHS, metavar='YYYY-MM',
+                        help='Months to (re)load; each replaces its trips partition (default: all)')
     args = parser.parse_args()
+    refuse_live_load()
     
     data_dir = args.data_dir
     
     print("Starting ETL Pipeline...")
     print("=" * 50)
     print(f"Data directory: {data_dir}")
+    print(f"Months: {', '.join(args.months)}")
     print("=" * 50)
     
     # Load taxi zones first
@@ -38,7 +44,7 @@ if __name__ == "__main__":
     # Load trip data
     print("\n2. Loading Trip Data...")
     try:
-        load_parquet_to_sql(data_dir=data_dir)
+        loaded_months = load_parquet_to_sql(data_dir=data_dir, months=args.months)
         print("[OK] Trip data loaded successfully")
     except Exception as e:
         print(f"[ERROR] Error loading trip data: {e}")
@@ -46,6 +52,18 @@ if __name__ == "__main__":
         traceback.print_exc()
         sys.exit(1)
     
+    # Build rollups from the loaded trips
+    print("\n3. Building Rollup Tables...")
+    try:
+        for month in loaded_months:
+            build_rollups(engine, *month_bounds(month))
+        print("[OK] Rollup tables built successfully")
+    except Exception as e:
+        print(f"[ERROR] Error building rollup tables: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+    
     print("\n" + "=" * 50)
     print("ETL Pipeline Completed Successfully!")
     print("=" * 50)
@@ -0,0 +1,10 @@
+"""
+Shared test setup
+
+The app reads DATABASE_URL at import time, so point it at a throwaway
+SQLite file before any app module is imported.
+"""
+import os
+import tempfile
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='nyc-taxi-tests-'), 'test.db')}"
@@ -0,0 +1,71 @@
+import json
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.api.dependencies import response_format
+from app.middleware.response_cache import ResponseCacheMiddleware
+from app.utils.arrow import ARROW_MEDIA_TYPE, PARQUET_MEDIA_TYPE
+from app.utils.helpers import format_response
+
+ASSUMPTIONS = {"note": "test"}
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = FastAPI()
+
+    @app.get("/api/v1/zones")
+    def zones(result_format: str = Depends(response_format)):
+        data = {"zone_id": [1, 2, 3], "revenue": [10.5, None, 7.25]}
+        if result_format == "records":
+            data = [dict(zip(data, row)) for row in zip(*data.values())]
+        return format_response(data, ASSUMPTIONS, result_format)
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    app.add_middleware(ResponseCacheMiddleware, engine=engine, version_ttl=0)
+    return TestClient(app)
+
+
+def _arrow_table(body: bytes) -> pa.Table:
+    return pa.ipc.open_stream(body).read_all()
+
+
+def test_format_param_selects_arrow(client):
+    response = client.get("/api/v1/zones?format=arrow")
+
+    assert response.headers["content-type"] == ARROW_MEDIA_TYPE
+    table = _arrow_table(response.content)
+    assert table.column("zone_id").to_pylist() == [1, 2, 3]
+    assert table.column("revenue").to_pylist() == [10.5, None, 7.25]
+    assert json.loads(table.schema.metadata[b"assumptions"]) == ASSUMPTIONS
+
+
+@pytest.mark.parametrize("accept", ["application/vnd.apache.parquet", "application/x-parquet",
+                                    "text/html, application/vnd.apache.parquet;q=0.9"])
+def test_accept_header_selects_parquet(client, accept):
+    response = client.get("/api/v1/zones", headers={"Accept": accept})
+
+    assert response.headers["content-type"] == PARQUET_MEDIA_TYPE
+    table = pq.read_table(pa.BufferReader(response.content))
+    assert table.column("zone_id").to_pylist() == [1, 2, 3]
+
+
+def test_explicit_format_wins_over_accept(client):
+    response = client.get("/api/v1/zones?format=records", headers={"Accept": ARROW_MEDIA_TYPE})
+
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["data"][0] == {"zone_id": 1, "revenue": 10.5}
+
+
+def test_cache_keeps_negotiated_formats_apart(client):
+    arrow = client.get("/api/v1/zones", headers={"Accept": ARROW_MEDIA_TYPE})
+    plain = client.get("/api/v1/zones")
+    arrow_again = client.get("/api/v1/zones", headers={"Accept": ARROW_MEDIA_TYPE})
+
+    assert plain.headers["content-type"] == "application/json"
+    assert arrow_again.headers["x-cache"] == "HIT"
+    assert arrow_again.content == arrow.content
+    assert "Accept" in arrow.headers["vary"]
@@ -0,0 +1,24 @@
+import asyncio
+import threading
+import time
+from app.api import bundle
+
+
+def test_panel_counts_track_running_and_queued_panels(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(bundle, "run_panel", lambda *args: release.wait(5) and {"status": 200})
+
+    async def run(panels):
+        futures = [bundle.submit_panel(None, {}, None, None, "records") for _ in range(panels)]
+        deadline = time.monotonic() + 5
+        while bundle.panel_counts()["running"] < bundle.BUNDLE_WORKERS and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+        during = bundle.panel_counts()
+        release.set()
+        return during, await asyncio.gather(*futures)
+
+    during, outcomes = asyncio.run(run(bundle.BUNDLE_WORKERS + 2))
+
+    assert during == {"running": bundle.BUNDLE_WORKERS, "queued": 2}
+    assert outcomes == [{"status": 200}] * (bundle.BUNDLE_WORKERS + 2)
+    assert bundle.panel_counts() == {"running": 0, "queued": 0}
@@ -0,0 +1,41 @@
+from datetime import date
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from app.api.dependencies import DateRange, date_range
+
+app = FastAPI()
+
+
+@app.get("/range")
+def get_range(dates: DateRange = Depends(date_range("2025-01-01", "2025-01-31"))):
+    return {"params": dates.params, "describe": dates.describe()}
+
+
+client = TestClient(app)
+
+
+def test_defaults_and_exclusive_end():
+    body = client.get("/range").json()
+    assert body["params"] == {"range_start": "2025-01-01", "range_end": "2025-02-01"}
+    assert body["describe"] == "2025-01-01 to 2025-01-31"
+
+
+def test_single_day_range():
+    body = client.get("/range?start_date=2025-03-05&end_date=2025-03-05").json()
+    assert body["params"] == {"range_start": "2025-03-05", "range_end": "2025-03-06"}
+
+
+def test_start_after_end_is_rejected():
+    response = client.get("/range?start_date=2025-02-01&end_date=2025-01-15")
+    assert response.status_code == 422
+    assert response.json()["detail"] == "start_date must not be after end_date"
+
+
+@pytest.mark.parametrize("query", ["start_date=2025-13-01", "end_date=yesterday"])
+def test_malformed_dates_are_rejected(query):
+    assert client.get(f"/range?{query}").status_code == 422
+
+
+def test_end_exclusive_crosses_year():
+    assert DateRange(date(2024, 12, 1), date(2024, 12, 31)).end_exclusive == date(2025, 1, 1)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+from app.services.downsample import downsample_indices, lttb_indices, minmax_indices
+
+
+def test_lttb_keeps_endpoints_and_requested_count():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 50)
+
+    kept = lttb_indices(x, y, 100)
+
+    assert len(kept) == 100
+    assert kept[0] == 0 and kept[-1] == 999
+    assert np.all(np.diff(kept) > 0)
+
+
+def test_lttb_keeps_a_spike():
+    x = np.arange(500, dtype=float)
+    y = np.zeros(500)
+    y[237] = 100.0
+
+    assert 237 in lttb_indices(x, y, 20)
+
+
+def test_lttb_returns_everything_when_not_reducing():
+    x = np.arange(10, dtype=float)
+    assert list(lttb_indices(x, x, 10)) == list(range(10))
+    assert list(lttb_indices(x, x, 50)) == list(range(10))
+    assert list(lttb_indices(x, x, 2)) == list(range(10))
+
+
+def test_lttb_tolerates_nan():
+    x = np.arange(100, dtype=float)
+    y = np.linspace(0, 1, 100)
+    y[40:45] = np.nan
+
+    kept = lttb_indices(x, y, 10)
+
+    assert len(kept) == 10
+
+
+def test_minmax_keeps_bucket_extremes():
+    y = np.array([5, 1, 9, 3, 7, 2, 8, 4], dtype=float)
+
+    kept = minmax_indices(y, 4)
+
+    # Two buckets of four: (1 at 1, 9 at 2) and (2 at 5, 8 at 6)
+    assert list(kept) == [1, 2, 5, 6]
+
+
+def test_downsample_indices_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        downsample_indices(np.arange(10), np.arange(10), 5, "every_other")
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from app.services.histogram import (
+    BIN_RATIO, DURATION_BIN_COUNT, DURATION_EDGES, histogram_quantiles, summarize_bins
+)
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+
+def _bins(durations):
+    """Per-bin counts of durations, bins as in the duration_histogram rollup"""
+    return np.bincount(np.searchsorted(DURATION_EDGES, durations, side="right"), minlength=DURATION_BIN_COUNT)
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_quantiles_within_documented_error_between_the_edges(seed):
+    rng = np.random.default_rng(seed)
+    durations = rng.lognormal(mean=np.log(12), sigma=0.8, size=20000).clip(DURATION_EDGES[0], DURATION_EDGES[-1] * 0.99)
+
+    estimated = histogram_quantiles(_bins(durations)[None, :], np.array([durations.min()]),
+                                    np.array([durations.max()]), QUANTILES)[0]
+    exact = np.quantile(durations, QUANTILES)
+
+    assert np.all(np.abs(estimated / exact - 1) <= BIN_RATIO - 1)
+
+
+def test_underflow_and_overflow_quantiles_stay_within_min_and_max():
+    durations = np.array([0.05, 0.1, 0.2, 0.3, 800.0, 900.0, 1000.0])
+
+    estimated = histogram_quantiles(_bins(durations)[None, :], np.array([0.05]), np.array([1000.0]), (0.0, 0.25, 1.0))[0]
+
+    assert estimated[0] == pytest.approx(0.05)
+    assert 0.05 <= estimated[1] < DURATION_EDGES[0]
+    assert estimated[2] == pytest.approx(1000.0)
+
+
+def test_single_value_group_is_exact():
+    counts = _bins(np.full(50, 7.5))[None, :]
+    estimated = histogram_quantiles(counts, np.array([7.5]), np.array([7.5]), QUANTILES)[0]
+    assert np.allclose(estimated, 7.5)
+
+
+def test_empty_group_is_nan():
+    counts = np.zeros((1, DURATION_BIN_COUNT))
+    assert np.isnan(histogram_quantiles(counts, np.array([np.inf]), np.array([-np.inf]))).all()
+
+
+def test_summarize_bins_moments_are_exact():
+    rng = np.random.default_rng(3)
+    durations = rng.uniform(1, 60, size=500)
+    trips = pd.DataFrame({"hour_of_day": rng.integers(0, 2, size=500), "duration": durations})
+    trips["duration_bin"] = np.searchsorted(DURATION_EDGES, trips["duration"], side="right")
+    rollup = trips.groupby(["hour_of_day", "duration_bin"])["duration"].agg(
+        trip_count="count", duration_sum="sum", duration_sq_sum=lambda d: (d * d).sum(),
+        duration_min="min", duration_max="max",
+    ).reset_index()
+
+    summary = summarize_bins(rollup, ["hour_of_day"]).set_index("hour_of_day")
+
+    for hour, group in trips.groupby("hour_of_day")["duration"]:
+        row = summary.loc[hour]
+        assert row["trip_count"] == len(group)
+        assert row["mean_duration"] == pytest.approx(group.mean())
+        assert row["std_duration"] == pytest.approx(group.std(ddof=1))
+        assert row["min_duration"] == group.min() and row["max_duration"] == group.max()
+        assert row["min_duration"] <= row["p25_duration"] <= row["median_duration"] <= row["p75_duration"]
@@ -0,0 +1,95 @@
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, text
+from app.pipelines.partitions import (
+    TRIP_COLUMN_NAMES, drop_month, index_definition_for, list_partitions, load_month, month_id_base, trips_layout
+)
+
+
+def _trips(pickups):
+    pickup = pd.to_datetime(pd.Series(pickups))
+    frame = pd.DataFrame({name: 1 for name in TRIP_COLUMN_NAMES if name != "id"}, index=pickup.index)
+    frame["tpep_pickup_datetime"] = pickup
+    frame["tpep_dropoff_datetime"] = pickup + pd.Timedelta(minutes=10)
+    frame["pulocationid"] = range(len(pickup))
+    frame["total_amount"] = 10.0
+    return frame
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'trips.db'}")
+
+
+def _scalar(engine, sql, **params):
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).scalar()
+
+
+def test_months_load_into_tables_behind_the_view(engine):
+    january = _trips(["2025-01-01 00:00", "2025-01-31 23:59", "2025-02-01 00:00", "2024-12-31 23:59"])
+    assert load_month(engine, "2025-01", january) == 2  # rows of other months are dropped
+    load_month(engine, "2025-02", _trips(["2025-02-10 08:00", "2025-02-11 09:00", "2025-02-12 10:00"]))
+
+    with engine.connect() as conn:
+        assert trips_layout(conn) == "partitioned"
+        assert list_partitions(conn) == ["trips_2025_01", "trips_2025_02"]
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips") == 5
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips WHERE tpep_pickup_datetime >= :start "
+                           "AND tpep_pickup_datetime < :end", start="2025-02-01", end="2025-03-01") == 3
+    assert _scalar(engine, "SELECT MIN(id) FROM trips_2025_02") == month_id_base("2025-02") + 1
+    assert _scalar(engine, "SELECT COUNT(DISTINCT id) FROM trips") == 5
+
+
+def test_reloading_a_month_replaces_its_rows(engine):
+    load_month(engine, "2025-01", _trips(["2025-01-05 10:00"] * 4))
+    load_month(engine, "2025-02", _trips(["2025-02-05 10:00"]))
+
+    load_month(engine, "2025-01", _trips(["2025-01-06 10:00"] * 2))
+
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips_2025_01") == 2
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips") == 3
+    assert _scalar(engine, "SELECT COUNT(*) FROM sqlite_master WHERE name LIKE '%staging%'") == 0
+
+
+def test_month_tables_reject_rows_of_other_months(engine):
+    load_month(engine, "2025-01", _trips(["2025-01-05 10:00"]))
+
+    with pytest.raises(Exception, match="CHECK"):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO trips_2025_01 (tpep_pickup_datetime, tpep_dropoff_datetime, "
+                              "pulocationid, dolocationid) VALUES ('2025-02-01 00:00:00', "
+                              "'2025-02-01 00:10:00', 1, 1)"))
+
+
+def test_drop_month_removes_it_from_the_view(engine):
+    load_month(engine, "2025-01", _trips(["2025-01-05 10:00"]))
+    load_month(engine, "2025-02", _trips(["2025-02-05 10:00", "2025-02-06 10:00"]))
+
+    drop_month(engine, "2025-01")
+
+    with engine.connect() as conn:
+        assert list_partitions(conn) == ["trips_2025_02"]
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips") == 2
+
+    drop_month(engine, "2025-02")
+    assert _scalar(engine, "SELECT COUNT(*) FROM trips") == 0  # empty, correctly shaped view
+
+
+@pytest.mark.parametrize("definition, expected", [
+    ("CREATE INDEX idx_trips_pickup ON ONLY public.trips USING btree (tpep_pickup_datetime)",
+     "CREATE INDEX ON trips_2025_01_staging USING btree (tpep_pickup_datetime)"),
+    ("CREATE INDEX trips_2025_01_pulocationid_idx ON public.trips_2025_01 USING btree (pulocationid)",
+     "CREATE INDEX ON trips_2025_01_staging USING btree (pulocationid)"),
+    ("CREATE UNIQUE INDEX trips_pkey ON ONLY public.trips USING btree (id, tpep_pickup_datetime)",
+     "CREATE UNIQUE INDEX ON trips_2025_01_staging USING btree (id, tpep_pickup_datetime)"),
+    ("CREATE INDEX idx_trips_pickup_brin ON ONLY public.trips USING brin (tpep_pickup_datetime) "
+     "WITH (pages_per_range='32')",
+     "CREATE INDEX ON trips_2025_01_staging USING brin (tpep_pickup_datetime) WITH (pages_per_range='32')"),
+    ("CREATE INDEX idx_trips_zone_pickup ON ONLY public.trips USING btree (pulocationid, tpep_pickup_datetime) "
+     "INCLUDE (total_amount) WHERE (tpep_dropoff_datetime > tpep_pickup_datetime)",
+     "CREATE INDEX ON trips_2025_01_staging USING btree (pulocationid, tpep_pickup_datetime) "
+     "INCLUDE (total_amount) WHERE (tpep_dropoff_datetime > tpep_pickup_datetime)"),
+])
+def test_index_definition_is_retargeted_at_the_staging_table(definition, expected):
+    assert index_definition_for(definition, "trips_2025_01_staging") == expected
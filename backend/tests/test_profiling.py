@@ -0,0 +1,61 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.middleware.profiling import ProfilingMiddleware
+from app.services.profiler import _frame_key
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    app = FastAPI()
+
+    @app.get("/api/v1/data")
+    def data():
+        return {"total": sum(range(100000))}
+
+    app.add_middleware(ProfilingMiddleware)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("query, headers", [
+    ("", {}),
+    ("?profile=0", {}),
+    ("?profile=false", {}),
+    ("?profile=", {}),
+    ("", {"X-Profile": "0"}),
+])
+def test_non_profile_requests_pass_through(client, query, headers):
+    response = client.get(f"/api/v1/data{query}", headers=headers)
+
+    assert response.status_code == 200
+    assert response.json() == {"total": 4999950000}
+
+
+@pytest.mark.parametrize("query, headers", [
+    ("?profile=1", {}),
+    ("?profile=collapsed", {"X-Admin-Token": "wrong"}),
+    ("", {"X-Profile": "true"}),
+])
+def test_profile_requests_need_the_admin_token(client, query, headers):
+    assert client.get(f"/api/v1/data{query}", headers=headers).status_code == 403
+
+
+def test_admin_gets_the_profile_instead_of_the_body(client):
+    response = client.get("/api/v1/data?profile=1", headers={"X-Admin-Token": "secret"})
+
+    assert response.status_code == 200
+    assert response.headers["x-profile-status"] == "200"
+    assert "speedscope" in response.json()["$schema"]
+
+
+def test_frame_key_falls_back_to_co_name():
+    class Code:
+        co_name = "handler"
+        co_filename = "app/api/zones.py"
+        co_firstlineno = 12
+
+    class FrameWithoutQualname:
+        f_code = Code()
+
+    assert _frame_key(FrameWithoutQualname()) == ("handler", "app/api/zones.py", 12)
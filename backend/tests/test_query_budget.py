@@ -0,0 +1,100 @@
+import threading
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.main import query_timeout_handler
+from app.middleware.query_budget import QueryBudgetMiddleware
+from app.services import query_budget
+from app.services.db_service import DatabaseService
+from app.services.query_budget import QueryBudget, QueryTimeout, current_budget
+from app.services.single_flight import SingleFlight
+
+# About a second of SQLite VM work, interruptible by the progress handler
+SLOW_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 3000000) SELECT COUNT(*) FROM c"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'budget.db'}", connect_args={"check_same_thread": False})
+
+
+def test_query_over_budget_returns_structured_503(engine, monkeypatch):
+    monkeypatch.setitem(query_budget.ENDPOINT_BUDGETS, "/api/v1/slow", 0.2)
+    app = FastAPI()
+    app.add_exception_handler(QueryTimeout, query_timeout_handler)
+    app.add_middleware(QueryBudgetMiddleware)
+
+    @app.get("/api/v1/slow")
+    def slow():
+        with Session(engine) as db:
+            return {"count": DatabaseService(db).execute_scalar(SLOW_QUERY)}
+
+    started = time.monotonic()
+    response = TestClient(app).get("/api/v1/slow")
+
+    assert time.monotonic() - started < 1
+    assert response.status_code == 503
+    assert response.headers["cache-control"] == "no-store"
+    body = response.json()
+    assert body["error"] == "query_timeout"
+    assert body["cost"]["budget_ms"] == 200
+
+
+def _run_with_budget(engine, seconds, results, name, delay=0.0):
+    time.sleep(delay)
+    current_budget.set(QueryBudget(seconds))
+    with Session(engine) as db:
+        try:
+            results[name] = DatabaseService(db).execute_scalar(SLOW_QUERY)
+        except QueryTimeout as e:
+            results[name] = e
+
+
+def test_waiter_reruns_a_query_stopped_by_a_shorter_budget(engine):
+    results = {}
+    threads = [
+        threading.Thread(target=_run_with_budget, args=(engine, 0.2, results, "short")),
+        threading.Thread(target=_run_with_budget, args=(engine, 30, results, "long", 0.05)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+
+    assert isinstance(results["short"], QueryTimeout)
+    assert results["long"] == 3000000
+
+
+def test_waiter_check_abandons_the_wait_without_stopping_the_leader():
+    flight = SingleFlight()
+    leader_started = threading.Event()
+    release = threading.Event()
+    leader_result = []
+
+    def slow():
+        leader_started.set()
+        release.wait(5)
+        return "done"
+
+    leader = threading.Thread(target=lambda: leader_result.append(flight.do("q", slow)))
+    leader.start()
+    leader_started.wait(5)
+
+    deadline = time.monotonic() + 0.1
+
+    def check():
+        if time.monotonic() >= deadline:
+            raise TimeoutError("waiter deadline")
+
+    started = time.monotonic()
+    with pytest.raises(TimeoutError):
+        flight.do("q", slow, check)
+    assert time.monotonic() - started < 1
+
+    release.set()
+    leader.join(5)
+    assert leader_result == ["done"]
+    assert flight.snapshot()["abandoned"] == 1
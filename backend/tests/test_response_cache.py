@@ -0,0 +1,92 @@
+import pytest
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app.middleware.response_cache import ResponseCacheMiddleware
+from app.services.dataset_version import bump_dataset_version
+
+
+@pytest.fixture
+def app_and_calls(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    calls = {"data": 0, "private": 0}
+    app = FastAPI()
+
+    @app.get("/api/v1/data")
+    def data():
+        calls["data"] += 1
+        return {"values": list(range(300))}
+
+    @app.get("/api/v1/private")
+    def private(response: Response):
+        calls["private"] += 1
+        response.headers["Cache-Control"] = "no-store"
+        return {"calls": calls["private"]}
+
+    app.add_middleware(ResponseCacheMiddleware, engine=engine, version_ttl=0)
+    return app, calls, engine
+
+
+def test_second_request_is_served_from_cache(app_and_calls):
+    app, calls, _ = app_and_calls
+    client = TestClient(app)
+
+    first = client.get("/api/v1/data", headers={"Accept-Encoding": "identity"})
+    second = client.get("/api/v1/data", headers={"Accept-Encoding": "identity"})
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers["x-cache"] == "MISS" and second.headers["x-cache"] == "HIT"
+    assert first.content == second.content
+    assert first.headers["etag"] == second.headers["etag"]
+    assert calls["data"] == 1
+
+
+def test_if_none_match_gets_304_without_running_the_endpoint(app_and_calls):
+    app, calls, _ = app_and_calls
+    client = TestClient(app)
+    etag = client.get("/api/v1/data", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    revalidated = client.get("/api/v1/data", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+    assert revalidated.headers["etag"] == etag
+    assert calls["data"] == 1
+
+    stale = client.get("/api/v1/data", headers={"Accept-Encoding": "identity", "If-None-Match": '"other"'})
+    assert stale.status_code == 200
+
+
+def test_etag_differs_per_content_encoding(app_and_calls):
+    app, _, _ = app_and_calls
+    client = TestClient(app)
+
+    plain = client.get("/api/v1/data", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/api/v1/data", headers={"Accept-Encoding": "gzip"})
+
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.content == plain.content  # decoded by the client
+    assert gzipped.headers["etag"] != plain.headers["etag"]
+    assert gzipped.headers["vary"] == "Accept-Encoding, Accept"
+
+
+def test_no_store_responses_are_not_cached(app_and_calls):
+    app, calls, _ = app_and_calls
+    client = TestClient(app)
+
+    client.get("/api/v1/private")
+    client.get("/api/v1/private")
+
+    assert calls["private"] == 2
+
+
+def test_dataset_version_bump_invalidates_entries(app_and_calls):
+    app, calls, engine = app_and_calls
+    client = TestClient(app)
+    etag = client.get("/api/v1/data", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    bump_dataset_version(engine)
+    after = client.get("/api/v1/data", headers={"Accept-Encoding": "identity", "If-None-Match": etag})
+
+    assert after.headers["x-cache"] == "MISS"
+    assert calls["data"] == 2
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import create_engine, text
+from app.database import connection
+from app.pipelines import etl
+
+
+def _served():
+    return connection.SERVING_URL, connection.engine, connection.read_engine
+
+
+def test_switch_database_refuses_a_file_that_is_not_sqlite(tmp_path):
+    path = tmp_path / "restored.db"
+    path.write_bytes(b"<html>403 Forbidden</html>" * 100)
+    before = _served()
+
+    with pytest.raises(Exception):
+        connection.switch_database(f"sqlite:///{path}")
+    assert _served() == before
+
+
+def test_switch_database_refuses_a_database_without_trips(tmp_path):
+    path = tmp_path / "empty.db"
+    with create_engine(f"sqlite:///{path}").begin() as conn:
+        conn.execute(text("CREATE TABLE taxi_zones (locationid INTEGER)"))
+    before = _served()
+
+    with pytest.raises(Exception, match="trips"):
+        connection.switch_database(f"sqlite:///{path}")
+    assert _served() == before
+
+
+def test_switch_database_refuses_another_dialect():
+    before = _served()
+
+    with pytest.raises(ValueError, match="Cannot switch"):
+        connection.switch_database("postgresql+psycopg2://user@localhost/nyc_taxi")
+    assert _served() == before
+
+
+def test_switch_database_serves_a_database_with_trips(tmp_path, monkeypatch):
+    path = tmp_path / "g2.db"
+    with create_engine(f"sqlite:///{path}").begin() as conn:
+        conn.execute(text("CREATE TABLE trips (id INTEGER)"))
+    before = _served()
+    # Restored afterwards without probing, since the test database has no trips
+    for name, value in zip(("SERVING_URL", "engine", "read_engine"), before):
+        monkeypatch.setattr(connection, name, value)
+
+    try:
+        previous = connection.switch_database(f"sqlite:///{path}")
+        assert previous == before[1:]
+        assert connection.SERVING_URL == f"sqlite:///{path}"
+        with connection.SessionLocal() as session:
+            assert session.get_bind() is connection.read_engine
+            assert session.execute(text("SELECT COUNT(*) FROM trips")).scalar() == 0
+    finally:
+        connection.engine.dispose()
+        connection.read_engine.dispose()
+        connection.SessionLocal.configure(bind=before[2])
+
+
+def test_etl_refuses_to_load_the_served_database(monkeypatch):
+    monkeypatch.setattr(etl, "SERVING_POINTER", "/var/app/current/serving.json")
+
+    with pytest.raises(SystemExit, match="bluegreen build"):
+        etl.refuse_live_load()
+
+
+def test_etl_loads_without_a_serving_pointer(monkeypatch):
+    monkeypatch.setattr(etl, "SERVING_POINTER", "")
+
+    etl.refuse_live_load()
@@ -0,0 +1,74 @@
+import threading
+import time
+import pytest
+from app.services.single_flight import SingleFlight
+
+
+def _run_concurrently(flight, key, fn, callers):
+    """Start ``callers`` threads calling flight.do at once; return their results or errors"""
+    results = [None] * callers
+    barrier = threading.Barrier(callers)
+
+    def call(i):
+        barrier.wait()
+        try:
+            results[i] = flight.do(key, fn)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_identical_calls_execute_once():
+    flight = SingleFlight()
+    executions = []
+
+    def fn():
+        executions.append(1)
+        time.sleep(0.2)
+        return ["row"]
+
+    results = _run_concurrently(flight, "q", fn, callers=5)
+
+    assert len(executions) == 1
+    assert all(result == ["row"] for result in results)
+    assert results[0] is results[1]  # the shared object, not a copy
+    stats = flight.snapshot()
+    assert stats["executions"] == 1
+    assert stats["coalesced"] == 4
+    assert stats["in_flight"] == 0
+
+
+def test_different_keys_are_not_coalesced():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+    assert flight.snapshot()["executions"] == 2
+
+
+def test_finished_call_is_not_cached():
+    flight = SingleFlight()
+    counter = iter(range(10))
+    assert flight.do("q", lambda: next(counter)) == 0
+    assert flight.do("q", lambda: next(counter)) == 1
+
+
+def test_error_is_raised_in_every_caller():
+    flight = SingleFlight()
+
+    def fn():
+        time.sleep(0.2)
+        raise ValueError("boom")
+
+    results = _run_concurrently(flight, "q", fn, callers=3)
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.snapshot()["errors"] == 1
+    # The failed call is gone, so the next caller runs again
+    assert flight.do("q", lambda: "ok") == "ok"
+
@@ -0,0 +1,64 @@
+import json
+import pytest
+from sqlalchemy import create_engine
+from app.services.slow_queries import SlowQueryLog, fingerprint, normalize_sql
+
+QUERY = """
+    -- zone revenue
+    SELECT pulocationid, SUM(total_amount) FROM trips
+    WHERE tpep_pickup_datetime >= :start AND fare_amount > 2.5
+      AND payment_type = 'cash'  /* literal */
+    GROUP BY pulocationid LIMIT 10
+"""
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'slow.db'}")
+
+
+def test_normalize_sql_replaces_literals_and_comments():
+    assert normalize_sql(QUERY) == (
+        "SELECT pulocationid, SUM(total_amount) FROM trips "
+        "WHERE tpep_pickup_datetime >= :start AND fare_amount > ? AND payment_type = ? "
+        "GROUP BY pulocationid LIMIT ?"
+    )
+
+
+def test_fingerprint_ignores_literals_and_layout_but_not_shape():
+    same = "SELECT pulocationid, SUM(total_amount) FROM trips WHERE tpep_pickup_datetime >= :start " \
+           "AND fare_amount > 0 AND payment_type = 'card' GROUP BY pulocationid LIMIT 500"
+
+    assert fingerprint(QUERY) == fingerprint(same)
+    assert fingerprint(QUERY) != fingerprint(QUERY.replace(":start", ":end"))
+    assert fingerprint("SELECT * FROM trips_2025_01") != fingerprint("SELECT * FROM trips_2025_02")
+
+
+def test_top_reports_percentiles_and_outcomes(engine, tmp_path):
+    log = SlowQueryLog(threshold_ms=1000, path=str(tmp_path / "slow.log"))
+    for ms in range(1, 101):
+        log.observe(engine, "SELECT 1", {}, ms / 1000, rows=1)
+    log.observe(engine, "SELECT 2 FROM trips", {}, 0.001, rows=0, outcome="cancelled")
+
+    fast, cancelled = log.top(sort="p95")
+    assert (fast["calls"], fast["p50_ms"], fast["p95_ms"], fast["p99_ms"], fast["max_ms"]) == (100, 50, 95, 99, 100)
+    assert fast["slow_calls"] == 0
+    assert cancelled["cancelled"] == 1
+    assert not (tmp_path / "slow.log").exists()
+
+
+def test_slow_and_timed_out_queries_are_logged_with_a_plan(engine, tmp_path):
+    path = tmp_path / "slow.log"
+    log = SlowQueryLog(threshold_ms=100, path=str(path))
+    log.observe(engine, "SELECT 1 WHERE 1 = :x", {"x": 1}, 0.5, rows=1)
+    log.observe(engine, "SELECT 2 WHERE 2 = :x", {"x": 2}, 0.01, rows=0, outcome="timeout")
+    log._writer.shutdown(wait=True)
+
+    slow, timeout = [json.loads(line) for line in path.read_text().splitlines()]
+    assert slow["fingerprint"] == fingerprint("SELECT 1 WHERE 1 = :x")
+    assert (slow["duration_ms"], slow["params"], slow["outcome"]) == (500.0, {"x": 1}, "ok")
+    assert slow["plan"]
+    assert timeout["outcome"] == "timeout"
+    # Same shape once the literals are replaced
+    [stats] = log.top()
+    assert (stats["calls"], stats["slow_calls"], stats["timeouts"]) == (2, 2, 1)
@@ -0,0 +1,66 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from app.api import variability
+from app.database.connection import get_db
+from app.database.models import DurationHistogram
+from app.main import rollups_missing_handler
+from app.pipelines.rollups import RollupsMissing
+
+ENDPOINTS = ["/api/v1/variability/heatmap", "/api/v1/variability/distribution", "/api/v1/variability/trends"]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'variability.db'}", connect_args={"check_same_thread": False})
+    DurationHistogram.__table__.create(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE trips (id INTEGER, tpep_pickup_datetime TIMESTAMP)"))
+    return engine
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.add_exception_handler(RollupsMissing, rollups_missing_handler)
+    app.include_router(variability.router, prefix="/api/v1")
+    session_factory = sessionmaker(bind=engine)
+
+    def db():
+        with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = db
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_trips_without_rollups_return_503(engine, client, path):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO trips VALUES (1, '2025-01-15 08:00:00')"))
+
+    response = client.get(path)
+
+    assert response.status_code == 503
+    assert response.headers["cache-control"] == "no-store"
+    assert response.json()["error"] == "rollups_missing"
+
+
+@pytest.mark.parametrize("path", ENDPOINTS)
+def test_empty_range_with_rollups_built_is_an_empty_200(engine, client, path):
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO trips VALUES (1, '2030-01-15 08:00:00')"))
+        conn.execute(text("""
+            INSERT INTO duration_histogram VALUES ('2030-01-15', 8, '0-2', 10, 40, 600.0, 40000.0, 5.0, 30.0)
+        """))
+
+    response = client.get(path)
+
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+
+
+def test_empty_database_is_not_missing_rollups(client):
+    assert client.get(ENDPOINTS[0]).status_code == 200
@@ -14,7 +14,7 @@ import LoadingSpinner from '../components/Common/LoadingSpinner';
 const Question2 = () => {
   const { data: timeSeriesData, isLoading: timeSeriesLoading } = useQuery({
     queryKey: ['efficiency-timeseries'],
-    queryFn: getEfficiencyTimeSeries,
+    queryFn: () => getEfficiencyTimeSeries(),
   });
 
   const { data: correlationData, isLoading: correlationLoading } = useQuery({
@@ -29,8 +29,19 @@ export interface EfficiencyHeatmapResponse {
   assumptions: Record<string, any>;
 }
 
-export const getEfficiencyTimeSeries = async (): Promise<EfficiencyTimeSeriesResponse> => {
-  const response = await api.get<EfficiencyTimeSeriesResponse>('/api/v1/efficiency/timeseries');
+export interface EfficiencyTimeSeriesParams {
+  resolution?: 'hour' | 'day' | 'week';
+  points?: number;
+  downsample?: 'lttb' | 'minmax';
+  metric?: 'efficiency' | 'total_trips' | 'total_revenue' | 'avg_duration_minutes';
+}
+
+export const getEfficiencyTimeSeries = async (
+  params: EfficiencyTimeSeriesParams = {}
+): Promise<EfficiencyTimeSeriesResponse> => {
+  const response = await api.get<EfficiencyTimeSeriesResponse>('/api/v1/efficiency/timeseries', {
+    params,
+  });
   return response.data;
 };
 